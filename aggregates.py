@@ -0,0 +1,383 @@
+"""
+Agrégats statistiques maintenus en mémoire par le processus de l'API.
+
+Le résumé par athlète (/stats/summary) est calculé une première fois par
+une requête groupée (assistée par l'index idx_performance_athlete_tested), puis
+conservé en mémoire. Chaque écriture de l'API marque les athlètes
+concernés comme modifiés (invalidate) ; la lecture suivante ne recalcule
+que leurs lignes, en une seule requête, au lieu de regrouper toute la table.
+
+Les distributions (/stats/distribution, /stats/percentile) reposent sur un
+sketch de quantiles KLL par métrique (sketches.py) : chaque insertion y est
+ajoutée directement ; une modification ou une suppression, qu'un sketch ne
+sait pas défaire, déclenche une reconstruction en masse à la lecture suivante.
+
+Les comparaisons d'athlètes (/stats/compare) sont calculées avec NumPy à
+partir de ce même résumé et conservées par ensemble d'athlètes jusqu'au
+prochain recalcul du résumé. NumPy n'est importé qu'à la première
+comparaison calculée.
+
+Les écritures sont signalées par coherence.cache_bus.publish, sur les
+canaux summary.invalidate, summary.clear, distribution.add et
+distribution.clear : les caches des autres processus (workers uvicorn,
+worker de tâches) appliquent ces événements avant leur lecture suivante.
+Après une modification directe de la base (populate_db.py, script), publier
+summary.clear et distribution.clear (ou POST /stats/sketches/rebuild).
+"""
+
+import json
+import math
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable
+
+from coherence import cache_bus
+from sketches import KLLSketch
+from statements import STATS_METRICS, statement
+
+# Paramètre de précision des sketches (erreur de rang de l'ordre de 1/k)
+SKETCH_K = int(os.getenv("SKETCH_K", 200))
+# Nombre de lignes lues par lot lors d'une reconstruction des sketches
+SKETCH_BATCH_SIZE = int(os.getenv("SKETCH_BATCH_SIZE", 10000))
+# Nombre de comparaisons (ensembles d'athlètes) conservées en mémoire
+COMPARE_CACHE_SIZE = int(os.getenv("COMPARE_CACHE_SIZE", 256))
+
+# Métriques comparées (/stats/compare) -> colonne du résumé par athlète
+COMPARE_METRICS = {
+    "ppo_best": "ppo_max",
+    "ppo_mean": "ppo_mean",
+    "vo2max": "vo2max_max",
+    "hr_max": "hr_max_max",
+    "power_to_weight": "power_to_weight_max",
+    "p1": "p1_max",
+    "p2": "p2_max",
+    "p3": "p3_max",
+}
+
+class SummaryCache:
+    """Résumé par athlète mis à jour de façon incrémentale.
+
+    Attributes:
+        columns (list[str] | None): Colonnes du résumé (None avant le premier chargement)
+    """
+
+    def __init__(self):
+        self.columns: list[str] | None = None
+        self._rows: dict[int, tuple] | None = None
+        self._ordered: list[tuple] = []
+        self._dirty: set[int] = set()
+        self._lock = threading.Lock()
+        # Incrémenté à chaque recalcul : les résultats dérivés du résumé
+        # (ComparisonCache) sont périmés dès que la version change
+        self.version = 0
+
+    def invalidate(self, athlete_ids: Iterable[int | None]):
+        """Marque des athlètes comme modifiés (à appeler après validation d'une écriture).
+
+        Args:
+            athlete_ids (Iterable[int | None]): Athlètes dont les performances,
+                le nom ou le poids ont changé (les None sont ignorés)
+        """
+        with self._lock:
+            if self._rows is not None:
+                self._dirty.update(athlete_id for athlete_id in athlete_ids if athlete_id is not None)
+
+    def clear(self):
+        """Oublie tout le résumé : la prochaine lecture le recalcule entièrement."""
+        with self._lock:
+            self.columns = None
+            self._rows = None
+            self._ordered = []
+            self._dirty.clear()
+
+    def _refresh(self, conn: sqlite3.Connection):
+        """Charge le résumé complet ou recalcule les athlètes modifiés (verrou tenu)."""
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        try:
+            if self._rows is None:
+                cursor.execute(statement("stats.summary"))
+                self.columns = [description[0] for description in cursor.description]
+                self._rows = {row[0]: row for row in cursor.fetchall()}
+            elif self._dirty:
+                cursor.execute(statement("stats.summary_for_athletes"), (json.dumps(sorted(self._dirty)),))
+                for athlete_id in self._dirty:
+                    self._rows.pop(athlete_id, None)
+                self._rows.update((row[0], row) for row in cursor.fetchall())
+            else:
+                return
+        finally:
+            cursor.close()
+        self._dirty.clear()
+        self._ordered = [self._rows[athlete_id] for athlete_id in sorted(self._rows)]
+        self.version += 1
+
+    def snapshot(self, conn: sqlite3.Connection) -> tuple[list[str], list[tuple]]:
+        """Retourne le résumé à jour, trié par athlete_id.
+
+        Args:
+            conn (sqlite3.Connection): Connexion utilisée pour les recalculs
+
+        Returns:
+            tuple: Un tuple contenant :
+                - columns (list[str]): Noms des colonnes
+                - rows (list[tuple]): Une ligne par athlète ayant des performances
+        """
+        _, columns, rows = self.versioned_snapshot(conn)
+        return columns, rows
+
+    def versioned_snapshot(self, conn: sqlite3.Connection) -> tuple[int, list[str], list[tuple]]:
+        """Retourne le résumé à jour et sa version (cf. snapshot)."""
+        cache_bus.sync(conn)
+        with self._lock:
+            self._refresh(conn)
+            return self.version, self.columns, self._ordered
+
+    def select(self, conn: sqlite3.Connection, athlete_ids: list[int] | None = None, sort_by: str | None = None,
+               descending: bool = False, limit: int | None = None, offset: int = 0) -> tuple[list[str], list[tuple], int]:
+        """Lit une page du résumé, filtrée et triée.
+
+        Args:
+            conn (sqlite3.Connection): Connexion utilisée pour les recalculs
+            athlete_ids (list[int], optional): Restreint le résumé à ces athlètes
+                (une liste vide ne retient aucune ligne)
+            sort_by (str, optional): Colonne de tri. Defaults to athlete_id.
+            descending (bool, optional): Tri décroissant. Defaults to False.
+            limit (int, optional): Taille de la page. None renvoie toutes les lignes.
+            offset (int, optional): Nombre de lignes à sauter. Defaults to 0.
+
+        Returns:
+            tuple: Un tuple contenant :
+                - columns (list[str]): Noms des colonnes
+                - rows (list[tuple]): Lignes de la page
+                - total (int): Nombre de lignes correspondant au filtre
+
+        Raises:
+            ValueError: Si la colonne de tri n'existe pas
+        """
+        columns, rows = self.snapshot(conn)
+        if athlete_ids is not None:
+            wanted = set(athlete_ids)
+            rows = [row for row in rows if row[0] in wanted]
+        if sort_by:
+            if sort_by not in columns:
+                raise ValueError(f"Colonne inconnue pour le tri : {sort_by}")
+            index = columns.index(sort_by)
+            # Les valeurs NULL restent en fin de liste quel que soit l'ordre
+            rows = (sorted((row for row in rows if row[index] is not None), key=lambda row: row[index], reverse=descending)
+                    + [row for row in rows if row[index] is None])
+        elif descending:
+            rows = rows[::-1]
+        total = len(rows)
+        if limit is not None:
+            rows = rows[offset:offset + limit]
+        return columns, rows, total
+
+class DistributionCache:
+    """Sketches de quantiles des métriques de performance, un par métrique."""
+
+    def __init__(self, k: int = SKETCH_K):
+        self.k = k
+        self._sketches: dict[str, KLLSketch] | None = None
+        self._lock = threading.Lock()
+
+    def add(self, performance: dict[str, Any]):
+        """Ajoute une performance insérée aux sketches déjà construits.
+
+        Args:
+            performance (dict): Valeurs de la performance (colonnes de STATS_METRICS)
+        """
+        with self._lock:
+            if self._sketches is not None:
+                for metric, sketch in self._sketches.items():
+                    sketch.update_many((performance.get(metric),))
+
+    def clear(self):
+        """Abandonne les sketches : la prochaine lecture les reconstruit."""
+        with self._lock:
+            self._sketches = None
+
+    def rebuild(self, conn: sqlite3.Connection) -> int:
+        """Reconstruit tous les sketches en un seul parcours de la table.
+
+        Args:
+            conn (sqlite3.Connection): Connexion à la base de données
+
+        Returns:
+            int: Nombre de performances lues
+        """
+        with self._lock:
+            return self._rebuild(conn)
+
+    def _rebuild(self, conn: sqlite3.Connection) -> int:
+        sketches = {metric: KLLSketch(self.k) for metric in STATS_METRICS}
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        rows = 0
+        try:
+            cursor.execute(statement("stats.metric_values"))
+            while batch := cursor.fetchmany(SKETCH_BATCH_SIZE):
+                rows += len(batch)
+                for metric, values in zip(STATS_METRICS, zip(*batch)):
+                    sketches[metric].update_many(values)
+        finally:
+            cursor.close()
+        self._sketches = sketches
+        return rows
+
+    def sketch(self, conn: sqlite3.Connection, metric: str) -> KLLSketch:
+        """Retourne une copie du sketch d'une métrique, reconstruit au besoin.
+
+        Args:
+            conn (sqlite3.Connection): Connexion utilisée pour une reconstruction
+            metric (str): Colonne de STATS_METRICS
+
+        Returns:
+            KLLSketch: Copie du sketch, indépendante des insertions suivantes
+        """
+        cache_bus.sync(conn)
+        with self._lock:
+            if self._sketches is None:
+                self._rebuild(conn)
+            return self._sketches[metric].copy()
+
+    def scoped_sketch(self, conn: sqlite3.Connection, metric: str, athlete_ids: list[int]) -> KLLSketch:
+        """Construit le sketch d'une métrique restreint à une liste d'athlètes (non conservé).
+
+        Args:
+            conn (sqlite3.Connection): Connexion à la base de données
+            metric (str): Colonne de STATS_METRICS
+            athlete_ids (list[int]): Athlètes visibles par l'utilisateur
+
+        Returns:
+            KLLSketch: Sketch des seules performances de ces athlètes ; la
+            lecture suit l'index (athlete_id, tested_at), son coût dépend du
+            nombre de leurs performances
+        """
+        sketch = KLLSketch(self.k)
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        try:
+            cursor.execute(statement(f"stats.values_for_athletes.{metric}"), (json.dumps(athlete_ids),))
+            while batch := cursor.fetchmany(SKETCH_BATCH_SIZE):
+                sketch.update_many(row[0] for row in batch)
+        finally:
+            cursor.close()
+        return sketch
+
+def _as_floats(values) -> list[float | None]:
+    """Convertit un vecteur NumPy en liste JSON (NaN et infinis -> None)."""
+    return [float(value) if math.isfinite(value) else None for value in values]
+
+class ComparisonCache:
+    """Comparaisons d'athlètes (valeurs et z-scores) dérivées du résumé par athlète.
+
+    Les valeurs de l'équipe de référence (squad) sont lues dans le résumé de
+    SummaryCache, puis moyennes, écarts-types et z-scores sont calculés en
+    une fois sur une matrice athlètes x métriques. Le résultat est conservé
+    par ensemble d'athlètes tant que la version du résumé ne change pas.
+    """
+
+    def __init__(self, summary: SummaryCache, size: int = COMPARE_CACHE_SIZE):
+        self.summary = summary
+        self.size = size
+        self._results: OrderedDict[tuple, dict[str, Any]] = OrderedDict()
+        self._version: int | None = None
+        self._lock = threading.Lock()
+
+    def clear(self):
+        """Oublie toutes les comparaisons conservées."""
+        with self._lock:
+            self._results.clear()
+            self._version = None
+
+    def compare(self, conn: sqlite3.Connection, athlete_ids: list[int],
+                squad_ids: list[int] | None = None) -> dict[str, Any]:
+        """Compare des athlètes entre eux et à l'équipe de référence.
+
+        Args:
+            conn (sqlite3.Connection): Connexion utilisée pour les recalculs du résumé
+            athlete_ids (list[int]): Athlètes comparés
+            squad_ids (list[int], optional): Athlètes formant l'équipe de
+                référence des z-scores. Par défaut, tous les athlètes.
+
+        Returns:
+            dict: Dictionnaire contenant :
+                - metrics (list[str]): Métriques comparées (clés de COMPARE_METRICS)
+                - athletes (list[dict]): athlete_id, name, count, valeur de chaque
+                  métrique et z_scores, dans l'ordre de athlete_ids
+                - squad (dict): size, mean et std de chaque métrique
+                - missing (list[int]): Athlètes demandés sans aucune performance
+        """
+        version, columns, rows = self.summary.versioned_snapshot(conn)
+        key = (tuple(athlete_ids), None if squad_ids is None else tuple(sorted(set(squad_ids))))
+        with self._lock:
+            if self._version != version:
+                self._results.clear()
+                self._version = version
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                return result
+        result = self._compute(columns, rows, athlete_ids, squad_ids)
+        with self._lock:
+            if self._version == version:
+                self._results[key] = result
+                while len(self._results) > self.size:
+                    self._results.popitem(last=False)
+        return result
+
+    @staticmethod
+    def _compute(columns: list[str], rows: list[tuple], athlete_ids: list[int],
+                 squad_ids: list[int] | None) -> dict[str, Any]:
+        import numpy as np
+
+        if squad_ids is not None:
+            wanted = set(squad_ids)
+            rows = [row for row in rows if row[0] in wanted]
+        names = list(COMPARE_METRICS)
+        indexes = [columns.index(column) for column in COMPARE_METRICS.values()] if columns else []
+        # Matrice athlètes x métriques (NULL -> NaN, ignorés dans les moyennes)
+        values = np.array([[row[index] for index in indexes] for row in rows], dtype=np.float64).reshape(len(rows), len(names))
+        valid = ~np.isnan(values)
+        counts = valid.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(valid, values, 0.0).sum(axis=0) / counts
+            std = np.sqrt((np.where(valid, values - mean, 0.0) ** 2).sum(axis=0) / counts)
+            z_scores = (values - mean) / np.where(std > 0, std, np.nan)
+        position = {row[0]: i for i, row in enumerate(rows)}
+        athletes, missing = [], []
+        for athlete_id in athlete_ids:
+            i = position.get(athlete_id)
+            if i is None:
+                missing.append(athlete_id)
+                continue
+            athletes.append({
+                "athlete_id": athlete_id,
+                "name": rows[i][1],
+                "count": rows[i][2],
+                **dict(zip(names, _as_floats(values[i]))),
+                "z_scores": dict(zip(names, _as_floats(np.round(z_scores[i], 3)))),
+            })
+        return {
+            "metrics": names,
+            "athletes": athletes,
+            "squad": {"size": len(rows), "mean": dict(zip(names, _as_floats(mean))),
+                      "std": dict(zip(names, _as_floats(std)))},
+            "missing": missing,
+        }
+
+# Instances partagées par les routes de l'API
+summary_cache = SummaryCache()
+distribution_cache = DistributionCache()
+comparison_cache = ComparisonCache(summary_cache)
+
+cache_bus.on("summary.invalidate", summary_cache.invalidate)
+cache_bus.on("summary.clear", lambda _: summary_cache.clear())
+cache_bus.on("distribution.add", distribution_cache.add)
+cache_bus.on("distribution.clear", lambda _: distribution_cache.clear())
+cache_bus.on_reset(summary_cache.clear)
+cache_bus.on_reset(distribution_cache.clear)
+cache_bus.on_reset(comparison_cache.clear)
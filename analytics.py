@@ -0,0 +1,202 @@
+"""
+Lectures analytiques isolées du trafic interactif (CRUD).
+
+Les exports et les statistiques qui parcourent des tables entières
+(/export/*, /stats/vo2max, /stats/ppo, /stats/weightpower,
+/stats/distribution?exact=true) ne passent pas nécessairement par
+l'exécuteur des routes interactives. ANALYTICS_READ_MODE choisit leur
+chemin de lecture :
+    - primary (défaut) : exécuteur partagé de l'API, sur la base principale
+    - wal : exécuteur dédié (ANALYTICS_WORKERS threads) sur la base
+      principale, en lecture seule ; chaque appel s'exécute dans une seule
+      transaction de lecture, donc sur un instantané WAL cohérent, sans
+      bloquer les écritures ni occuper les threads des routes interactives
+    - snapshot : exécuteur dédié sur une copie de la base
+      (ANALYTICS_SNAPSHOT_PATH), rafraîchie toutes les
+      ANALYTICS_SNAPSHOT_INTERVAL secondes par l'API de sauvegarde en ligne
+      de SQLite ; les lectures analytiques ne touchent plus le fichier
+      principal (ni ses verrous, ni ses checkpoints WAL), au prix de données
+      en retard d'au plus un intervalle
+
+Les routes servies par les caches en mémoire (/stats/summary,
+/stats/compare, /stats/percentile...) restent sur la base principale :
+leurs caches sont synchronisés par la table cache_event de cette base
+(coherence.py) et ne recalculent que les lignes modifiées.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import database
+from database import DBExecutor, connect, get_executor
+from queries import to_utc_iso
+
+# Chemin de lecture des routes analytiques : primary, wal ou snapshot
+ANALYTICS_READ_MODE = os.getenv("ANALYTICS_READ_MODE", "primary")
+# Nombre de threads (et de connexions) de l'exécuteur analytique
+ANALYTICS_WORKERS = int(os.getenv("ANALYTICS_WORKERS", 2))
+# Copie de la base lue en mode snapshot (défaut : <base>-analytics.db)
+ANALYTICS_SNAPSHOT_PATH = os.getenv("ANALYTICS_SNAPSHOT_PATH")
+# Intervalle (s) entre deux rafraîchissements de la copie
+ANALYTICS_SNAPSHOT_INTERVAL = float(os.getenv("ANALYTICS_SNAPSHOT_INTERVAL", 300))
+
+ANALYTICS_READ_MODES = ("primary", "wal", "snapshot")
+
+def snapshot_path() -> str:
+    """Chemin de la copie analytique de la base."""
+    if ANALYTICS_SNAPSHOT_PATH:
+        return ANALYTICS_SNAPSHOT_PATH
+    path = Path(database.DB_PATH)
+    return str(path.with_name(f"{path.stem}-analytics{path.suffix or '.db'}"))
+
+class ReadOnlyExecutor(DBExecutor):
+    """Exécuteur dont chaque appel est une transaction de lecture.
+
+    Les connexions refusent toute écriture (PRAGMA query_only) ; la
+    transaction ouverte avant l'appel fige, au premier SELECT, l'instantané
+    WAL lu par toutes les requêtes de l'appel.
+    """
+
+    def _open_connection(self):
+        super()._open_connection()
+        self._local.conn.execute("PRAGMA query_only = ON")
+
+    def _call(self, fn: Callable, *args, **kwargs) -> Any:
+        conn = self._local.conn
+        conn.execute("BEGIN")
+        try:
+            return fn(conn, *args, **kwargs)
+        finally:
+            conn.rollback()
+
+class SnapshotRefresher:
+    """Rafraîchit périodiquement la copie analytique de la base (thread dédié).
+
+    Attributes:
+        source (str): Chemin de la base principale
+        target (str): Chemin de la copie
+        interval (float): Intervalle (s) entre deux rafraîchissements
+        refreshed_at (str | None): Date (ISO 8601 UTC) du dernier rafraîchissement
+        duration_ms (float | None): Durée du dernier rafraîchissement
+    """
+
+    def __init__(self, source: str, target: str, interval: float = ANALYTICS_SNAPSHOT_INTERVAL):
+        self.source = source
+        self.target = target
+        self.interval = interval
+        self.refreshed_at: str | None = None
+        self.duration_ms: float | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Copie la base principale dans la copie analytique (API de sauvegarde en ligne).
+
+        Note:
+            La copie est faite en une seule étape : la lecture de la base
+            principale est une transaction WAL qui ne bloque pas ses
+            écritures. La copie est elle-même en mode WAL : ses lecteurs
+            continuent de lire l'ancienne version jusqu'à la fin de la copie.
+        """
+        with self._lock:
+            start = time.perf_counter()
+            source = connect(self.source)
+            target = sqlite3.connect(self.target)
+            try:
+                target.execute("PRAGMA journal_mode = WAL")
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            self.refreshed_at = to_utc_iso(datetime.now(timezone.utc))
+            self.duration_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    def start(self):
+        """Fait une première copie puis démarre le thread de rafraîchissement."""
+        self.refresh()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="analytics-snapshot", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except sqlite3.Error:
+                # Base verrouillée ou indisponible : la copie précédente reste lue
+                pass
+
+    def stop(self):
+        """Arrête le thread de rafraîchissement."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+_executor: DBExecutor | None = None
+_refresher: SnapshotRefresher | None = None
+_lock = threading.Lock()
+
+def start():
+    """Prépare le chemin de lecture analytique (démarrage de l'API).
+
+    Raises:
+        ValueError: Si ANALYTICS_READ_MODE n'est pas reconnu
+    """
+    global _executor, _refresher
+    if ANALYTICS_READ_MODE not in ANALYTICS_READ_MODES:
+        raise ValueError(f"ANALYTICS_READ_MODE inconnu : {ANALYTICS_READ_MODE}")
+    with _lock:
+        if _executor is not None or ANALYTICS_READ_MODE == "primary":
+            return
+        path = database.DB_PATH
+        if ANALYTICS_READ_MODE == "snapshot":
+            _refresher = SnapshotRefresher(database.DB_PATH, snapshot_path())
+            _refresher.start()
+            path = _refresher.target
+        _executor = ReadOnlyExecutor(path, ANALYTICS_WORKERS)
+        _executor.prestart()
+
+def stop():
+    """Arrête le rafraîchissement de la copie et ferme l'exécuteur analytique."""
+    global _executor, _refresher
+    with _lock:
+        if _refresher is not None:
+            _refresher.stop()
+            _refresher = None
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
+
+def status() -> dict:
+    """Mode de lecture analytique et état de la copie.
+
+    Returns:
+        dict: mode, workers et, en mode snapshot, path, refreshed_at,
+        duration_ms et interval_s
+    """
+    report = {"mode": ANALYTICS_READ_MODE,
+              "workers": ANALYTICS_WORKERS if ANALYTICS_READ_MODE != "primary" else None}
+    if _refresher is not None:
+        report.update(path=_refresher.target, refreshed_at=_refresher.refreshed_at,
+                      duration_ms=_refresher.duration_ms, interval_s=_refresher.interval)
+    return report
+
+def get_analytics_db() -> DBExecutor:
+    """Dépendance FastAPI fournissant l'exécuteur des lectures analytiques.
+
+    Returns:
+        DBExecutor: Exécuteur dédié (modes wal et snapshot) ou exécuteur
+        partagé de l'API (mode primary)
+    """
+    if ANALYTICS_READ_MODE == "primary":
+        return get_executor()
+    if _executor is None:
+        start()
+    return _executor
@@ -0,0 +1,90 @@
+"""
+Benchmark de la latence de la boucle d'événements sous charge SQLite.
+
+Simule des handlers async exécutant des lectures lourdes (liste complète
+des performances) pendant qu'une tâche « sonde » mesure le retard de la
+boucle d'événements (écart entre le réveil attendu et le réveil réel).
+
+Deux modes sont comparés :
+    - bloquant : sqlite3 appelé directement dans la coroutine (ancien
+      comportement de endpoints/users.py)
+    - exécuteur : database.DBExecutor (file de requêtes + threads dédiés)
+
+Usage:
+    python benchmarks/bench_event_loop.py [nb_lignes] [nb_requetes]
+"""
+
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DBExecutor, fetch_all
+
+QUERY = "SELECT * FROM performance"
+
+def build_db(path: str, n_rows: int):
+    """Crée une base fichier contenant n_rows performances aléatoires."""
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE performance (
+        performance_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        vo2max REAL, hr_max REAL, cadence_max REAL, ppo REAL,
+        p1 REAL, p2 REAL, p3 REAL, athlete_id INTEGER)""")
+    conn.executemany(
+        "INSERT INTO performance(vo2max,hr_max,cadence_max,ppo,p1,p2,p3,athlete_id) VALUES(?,?,?,?,?,?,?,?)",
+        [(random.uniform(45, 65), 180, 95, 350, 250, 220, 200, random.randint(1, 500)) for _ in range(n_rows)])
+    conn.commit()
+    conn.close()
+
+async def probe(stop: asyncio.Event, lags: list[float], interval: float = 0.001):
+    """Mesure le retard de réveil de la boucle toutes les `interval` secondes."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - start - interval) * 1000)
+
+async def run(mode: str, path: str, n_requests: int) -> tuple[float, list[float]]:
+    lags: list[float] = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(stop, lags))
+    executor = DBExecutor(path) if mode == "executeur" else None
+
+    async def blocking_handler():
+        conn = sqlite3.connect(path)
+        try:
+            return fetch_all(conn, QUERY)
+        finally:
+            conn.close()
+
+    async def executor_handler():
+        return await executor.fetch_all(QUERY)
+
+    handler = executor_handler if executor else blocking_handler
+    start = time.perf_counter()
+    await asyncio.gather(*(handler() for _ in range(n_requests)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+    if executor:
+        executor.shutdown()
+    return elapsed, lags
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    n_requests = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_db(path, n_rows)
+        print(f"{n_requests} lectures de {n_rows} lignes")
+        print(f"{'mode':<10} | {'total (s)':>9} | {'lag moyen (ms)':>14} | {'lag p99 (ms)':>12} | {'lag max (ms)':>12}")
+        for mode in ["bloquant", "executeur"]:
+            elapsed, lags = asyncio.run(run(mode, path, n_requests))
+            lags = sorted(lags) or [0.0]
+            p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+            print(f"{mode:<10} | {elapsed:>9.2f} | {statistics.mean(lags):>14.2f} | {p99:>12.2f} | {lags[-1]:>12.2f}")
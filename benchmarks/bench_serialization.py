@@ -0,0 +1,81 @@
+"""
+Benchmark du chemin de sérialisation JSON des listes de lignes.
+
+Compare, pour un nombre croissant de performances :
+    - le chemin historique : fetchall() de sqlite3.Row puis
+      jsonable_encoder + JSONResponse (ce que fait FastAPI par défaut)
+    - le chemin des routes de liste : database.fetch_all (tuples) puis
+      serialization.negotiated_response en JSON, forme "records"
+    - le même chemin, forme "columns"
+
+La requête simulée n'accepte que JSON, sans compression : seul le coût de
+la sérialisation est mesuré.
+
+Usage:
+    python benchmarks/bench_serialization.py [nb_lignes ...]
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from database import fetch_all
+from serialization import negotiated_response
+
+# Requête HTTP minimale : JSON, sans Accept-Encoding
+JSON_REQUEST = Request({"type": "http", "headers": [(b"accept", b"application/json")]})
+
+def build_db(n_rows: int) -> sqlite3.Connection:
+    """Crée une base en mémoire contenant n_rows performances aléatoires."""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("""CREATE TABLE performance (
+        performance_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        vo2max REAL, hr_max REAL, cadence_max REAL, ppo REAL,
+        p1 REAL, p2 REAL, p3 REAL, athlete_id INTEGER)""")
+    conn.executemany(
+        "INSERT INTO performance(vo2max,hr_max,cadence_max,ppo,p1,p2,p3,athlete_id) VALUES(?,?,?,?,?,?,?,?)",
+        [(round(random.uniform(45, 65), 2), random.randint(160, 200), random.randint(80, 110),
+          random.randint(280, 400), random.randint(180, 300), random.randint(160, 280),
+          random.randint(140, 260), random.randint(1, 500)) for _ in range(n_rows)])
+    return conn
+
+def legacy_path(conn: sqlite3.Connection) -> bytes:
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM performance")
+    return JSONResponse(jsonable_encoder(cursor.fetchall())).body
+
+def fast_path(conn: sqlite3.Connection, shape: str) -> bytes:
+    columns, rows = fetch_all(conn, "SELECT * FROM performance")
+    return negotiated_response(JSON_REQUEST, columns, rows, shape).body
+
+def timeit(fn, repeat: int = 5) -> tuple[float, int]:
+    """Retourne le meilleur temps (ms) sur `repeat` essais et la taille du corps."""
+    best, size = float("inf"), 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn()
+        best = min(best, time.perf_counter() - start)
+        size = len(body)
+    return best * 1000, size
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    print(f"{'lignes':>8} | {'chemin':<16} | {'temps (ms)':>10} | {'taille (Ko)':>11}")
+    for n_rows in sizes:
+        conn = build_db(n_rows)
+        for label, fn in [
+            ("jsonable_encoder", lambda: legacy_path(conn)),
+            ("rapide/records", lambda: fast_path(conn, "records")),
+            ("rapide/columns", lambda: fast_path(conn, "columns")),
+        ]:
+            ms, size = timeit(fn)
+            print(f"{n_rows:>8} | {label:<16} | {ms:>10.1f} | {size / 1024:>11.1f}")
+        conn.close()
@@ -0,0 +1,70 @@
+"""
+Benchmark du démarrage à froid de l'API.
+
+Chaque mesure est faite dans un nouvel interpréteur, sur une base temporaire
+peuplée (populate_db.py) :
+    - import : import de main (FastAPI, routeurs et dépendances)
+    - démarrage : cycle de vie (lifespan) jusqu'à la première requête possible
+    - 1re requête : GET /stats/summary, servie depuis des caches déjà construits
+
+Le détail des étapes du démarrage (app.state.startup) est aussi affiché.
+
+Usage:
+    python benchmarks/bench_startup.py [nb_mesures]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Script exécuté dans chaque interpréteur : affiche les durées en JSON
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+from utils import create_access_token
+token = create_access_token({"sub": sys.argv[1]})
+with TestClient(main.app) as client:
+    started = time.perf_counter()
+    client.get("/stats/summary", headers={"Authorization": f"Bearer {token}"})
+    served = time.perf_counter()
+    steps = main.app.state.startup
+print(json.dumps({"import": (imported - start) * 1000, "startup": (started - imported) * 1000,
+                  "first_request": (served - started) * 1000, "steps": steps}))
+"""
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        env = {**os.environ, "DB_PATH": db_path, "JOB_WORKERS": "0",
+               "SECRET_KEY": os.getenv("SECRET_KEY", "bench-secret")}
+        sys.path.insert(0, ROOT)
+        os.environ.update(env)
+        import database
+        database.DB_PATH = db_path
+        database.init_db()
+        import populate_db
+        import sqlite3
+        populate_db.populate_database(db_path)
+        with sqlite3.connect(db_path) as conn:
+            email = conn.execute("SELECT email FROM user LIMIT 1").fetchone()[0]
+
+        results = []
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, "-c", PROBE, email], cwd=ROOT, env=env,
+                                    capture_output=True, text=True, check=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+        print(f"{runs} démarrages à froid (médiane, ms)")
+        for key, label in [("import", "import"), ("startup", "démarrage"), ("first_request", "1re requête")]:
+            print(f"{label:<12} | {statistics.median(result[key] for result in results):>8.1f}")
+        steps = results[-1]["steps"]
+        print("étapes : " + ", ".join(f"{step} {duration} ms" for step, duration in steps.items()))
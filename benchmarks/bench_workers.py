@@ -0,0 +1,128 @@
+"""
+Benchmark du débit de l'API en fonction du nombre de workers uvicorn (serve.py).
+
+Pour chaque nombre de workers, l'API est démarrée sur une base temporaire
+peuplée (populate_db.py), puis des processus clients envoient des requêtes
+en continu (connexions keep-alive) pendant une durée fixe. Le débit
+(requêtes/s) et l'accélération par rapport à un worker sont affichés.
+
+Avant la mesure, une écriture est faite sur un worker puis le résumé est
+relu plusieurs fois (les lectures se répartissent entre les workers) : le
+nombre de performances doit être identique partout (cohérence des caches
+via coherence.py).
+
+L'accélération ne peut être proche du nombre de workers que si la machine
+dispose d'au moins autant de cœurs libres, clients compris.
+
+Usage:
+    python benchmarks/bench_workers.py [workers,...] [durée_s] [clients]
+"""
+
+import http.client
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PORT = 8765
+PATH = "/stats/summary?limit=50&sort=ppo_max&order=desc"
+
+def wait_for_port(port: int, timeout: float = 30.0):
+    """Attend que le serveur accepte les connexions."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"le serveur n'écoute pas sur le port {port}")
+
+def request(conn: http.client.HTTPConnection, method: str, path: str, headers: dict, body: dict | None = None):
+    conn.request(method, path, body=json.dumps(body) if body else None,
+                 headers={**headers, "Content-Type": "application/json"})
+    response = conn.getresponse()
+    return response.status, response.read()
+
+def client(token: str, duration: float, counts: multiprocessing.Queue):
+    """Envoie des requêtes pendant duration secondes et rapporte leur nombre."""
+    conn = http.client.HTTPConnection("127.0.0.1", PORT)
+    headers = {"Authorization": f"Bearer {token}"}
+    done = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        status, _ = request(conn, "GET", PATH, headers)
+        if status == 200:
+            done += 1
+    counts.put(done)
+
+def check_coherence(token: str, reads: int = 40) -> bool:
+    """Écrit une performance puis vérifie que toutes les lectures la voient."""
+    headers = {"Authorization": f"Bearer {token}"}
+    performance = {"vo2max": 60, "hr_max": 190, "rf_max": 50, "cadence_max": 110, "ppo": 400,
+                   "p1": 300, "p2": 280, "p3": 250, "athlete_id": 1}
+    # Une connexion par lecture : les requêtes se répartissent entre les workers
+    for _ in range(reads):
+        request(http.client.HTTPConnection("127.0.0.1", PORT), "GET", "/stats/summary", headers)
+    request(http.client.HTTPConnection("127.0.0.1", PORT), "POST", "/performances/create", headers, performance)
+    counts = set()
+    for _ in range(reads):
+        _, body = request(http.client.HTTPConnection("127.0.0.1", PORT), "GET", "/stats/summary", headers)
+        counts.add(sum(row["count"] for row in json.loads(body)))
+    return len(counts) == 1
+
+def run(workers: int, db_path: str, token: str, env: dict, duration: float, n_clients: int) -> tuple[float, bool]:
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "serve.py"), "--workers", str(workers),
+         "--port", str(PORT), "--job-workers", "0"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(PORT)
+        coherent = check_coherence(token)
+        counts = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=client, args=(token, duration, counts)) for _ in range(n_clients)]
+        for process in processes:
+            process.start()
+        total = sum(counts.get() for _ in processes)
+        for process in processes:
+            process.join()
+        return total / duration, coherent
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    worker_counts = [int(n) for n in (sys.argv[1] if len(sys.argv) > 1 else "1,2,4").split(",")]
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+    n_clients = int(sys.argv[3]) if len(sys.argv) > 3 else 2 * max(worker_counts)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        env = {**os.environ, "DB_PATH": db_path, "SECRET_KEY": os.getenv("SECRET_KEY", "bench-secret")}
+        os.environ.update(env)
+        import database
+        database.DB_PATH = db_path
+        database.init_db()
+        import populate_db
+        populate_db.populate_database(db_path)
+        from utils import create_access_token
+        import sqlite3
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("UPDATE user SET role = 'admin' WHERE user_id = 1")
+            email = conn.execute("SELECT email FROM user WHERE user_id = 1").fetchone()[0]
+        token = create_access_token({"sub": email})
+
+        print(f"{n_clients} clients, {duration:.0f} s par mesure, {os.cpu_count()} cœur(s), GET {PATH}")
+        print(f"{'workers':>7} | {'req/s':>8} | {'accélération':>12} | {'caches cohérents':>16}")
+        baseline = None
+        for workers in worker_counts:
+            throughput, coherent = run(workers, db_path, token, env, duration, n_clients)
+            baseline = baseline or throughput
+            print(f"{workers:>7} | {throughput:>8.0f} | {throughput / baseline:>11.2f}x | {'oui' if coherent else 'NON':>16}")
@@ -0,0 +1,100 @@
+"""
+Affectation des athlètes aux coachs (table coach_athlete).
+
+Un administrateur voit tous les athlètes ; un coach ne voit que les athlètes
+qui lui sont affectés. Les routes de liste restreignent leurs requêtes par
+une sous-requête ou une jointure sur la clé primaire (coach_id, athlete_id) :
+le coût d'une lecture dépend du nombre d'athlètes du coach, pas de la taille
+du club.
+
+Un athlète créé par un coach (route /athletes/create, inscription en masse)
+lui est affecté automatiquement ; les autres affectations sont gérées par
+les administrateurs (/athletes/assignments).
+"""
+
+import json
+import sqlite3
+from datetime import datetime, timezone
+from typing import Any
+
+import queries
+from queries import to_utc_iso
+from statements import statement
+
+def coach_scope(current_user: dict) -> int | None:
+    """Identifiant du coach dont les athlètes bornent les lectures (None : aucune restriction)."""
+    return current_user["user_id"] if current_user["role"] == "coach" else None
+
+def visible_athletes(conn: sqlite3.Connection, current_user: dict) -> list[int] | None:
+    """Identifiants des athlètes visibles par l'utilisateur (None : tous, pour un admin).
+
+    Un coach voit les athlètes qui lui sont affectés, un athlète ses propres
+    profils (athlete.user_id).
+    """
+    if current_user["role"] == "admin":
+        return None
+    if current_user["role"] == "coach":
+        return athlete_ids(conn, current_user["user_id"])
+    return [row[0] for row in conn.execute(statement("athlete.ids_for_user"), (current_user["user_id"],))]
+
+def athlete_ids(conn: sqlite3.Connection, coach_id: int) -> list[int]:
+    """Identifiants des athlètes affectés à un coach, par ordre croissant."""
+    return [row[0] for row in conn.execute(statement("coach_athlete.athlete_ids"), (coach_id,))]
+
+def all_assigned(conn: sqlite3.Connection, coach_id: int, ids: list[int]) -> bool:
+    """Indique si tous les athlètes d'une liste sont affectés au coach (une seule requête)."""
+    ids = sorted(set(ids))
+    count = conn.execute(statement("coach_athlete.count_assigned"), (coach_id, json.dumps(ids))).fetchone()[0]
+    return count == len(ids)
+
+def all_owned(conn: sqlite3.Connection, user_id: int, ids: list[int]) -> bool:
+    """Indique si tous les athlètes d'une liste sont des profils de l'utilisateur (une seule requête)."""
+    ids = sorted(set(ids))
+    count = conn.execute(statement("athlete.count_owned"), (user_id, json.dumps(ids))).fetchone()[0]
+    return count == len(ids)
+
+def assign(conn: sqlite3.Connection, coach_id: int, ids: list[int], commit: bool = True) -> int:
+    """Affecte des athlètes à un coach (les affectations existantes sont ignorées).
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        coach_id (int): Identifiant de l'utilisateur coach
+        ids (list[int]): Identifiants des athlètes
+        commit (bool, optional): Valide la transaction. Defaults to True.
+
+    Returns:
+        int: Nombre de nouvelles affectations
+    """
+    now = to_utc_iso(datetime.now(timezone.utc))
+    before = conn.total_changes
+    conn.executemany(statement("coach_athlete.assign"), [(coach_id, athlete_id, now) for athlete_id in ids])
+    if commit:
+        conn.commit()
+    return conn.total_changes - before
+
+def unassign(conn: sqlite3.Connection, coach_id: int, athlete_id: int) -> int:
+    """Retire un athlète à un coach. Retourne le nombre d'affectations supprimées."""
+    rowcount = conn.execute(statement("coach_athlete.unassign"), (coach_id, athlete_id)).rowcount
+    conn.commit()
+    return rowcount
+
+def create_athlete(conn: sqlite3.Connection, row: dict[str, Any], coach_id: int | None = None) -> int:
+    """Crée un athlète et, s'il est créé par un coach, le lui affecte dans la même transaction.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        row (dict): Colonnes de la table athlete
+        coach_id (int, optional): Coach auquel affecter l'athlète
+
+    Returns:
+        int: Identifiant de l'athlète créé
+    """
+    try:
+        athlete_id = queries.insert_data(conn, "athlete", row, commit=False)
+        if coach_id is not None:
+            assign(conn, coach_id, [athlete_id], commit=False)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    return athlete_id
@@ -0,0 +1,132 @@
+"""
+Cohérence des caches en mémoire entre processus (workers uvicorn, worker de tâches).
+
+Chaque processus tient ses propres caches (aggregates.summary_cache,
+aggregates.distribution_cache, ...). Sans coordination, une écriture servie
+par un worker laisserait les caches des autres workers périmés.
+
+Le bus d'invalidation ne dépend d'aucun service externe : il s'appuie sur
+la table cache_event de la base partagée.
+    - publish : applique les événements aux caches du processus courant puis
+      les ajoute à cache_event (canal, données JSON, processus d'origine)
+    - sync : avant chaque lecture d'un cache, une requête de plage sur la clé
+      primaire (event_id > dernier événement vu) récupère les événements
+      publiés depuis par les autres processus et les applique ; sans
+      nouvel événement, son coût est celui d'une recherche d'index
+    - les événements plus anciens que CACHE_EVENT_RETENTION sont purgés ; un
+      processus qui a manqué des événements purgés vide tous ses caches
+
+Les caches s'abonnent à un canal avec on(canal, fonction) et à la
+réinitialisation complète avec on_reset(fonction).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+
+from queries import to_utc_iso
+from statements import statement
+
+# Durée de conservation (s) des événements d'invalidation
+CACHE_EVENT_RETENTION = float(os.getenv("CACHE_EVENT_RETENTION", 3600))
+# Intervalle minimal (s) entre deux lectures de cache_event par processus (0 : à chaque lecture)
+CACHE_SYNC_INTERVAL = float(os.getenv("CACHE_SYNC_INTERVAL", 0))
+# Purge des anciens événements toutes les PRUNE_EVERY publications du processus
+PRUNE_EVERY = 256
+
+class CacheBus:
+    """Bus d'invalidation des caches du processus, partagé via la table cache_event.
+
+    Attributes:
+        origin (str): Identifiant unique du processus (ses propres événements
+            ne lui sont pas réappliqués)
+    """
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self._handlers: dict[str, list[Callable[[Any], None]]] = {}
+        self._resets: list[Callable[[], None]] = []
+        self._last_seen: int | None = None
+        self._published = 0
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def on(self, channel: str, handler: Callable[[Any], None]):
+        """Abonne une fonction aux événements d'un canal (elle reçoit les données)."""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def on_reset(self, handler: Callable[[], None]):
+        """Abonne une fonction à la réinitialisation complète (événements manqués)."""
+        self._resets.append(handler)
+
+    def _apply(self, channel: str, data: Any):
+        for handler in self._handlers.get(channel, ()):
+            handler(data)
+
+    def publish(self, conn: sqlite3.Connection, *events: tuple[str, Any]):
+        """Applique des événements localement et les diffuse aux autres processus.
+
+        Args:
+            conn (sqlite3.Connection): Connexion à la base de données
+            *events (tuple[str, Any]): Couples (canal, données sérialisables en JSON)
+
+        Note:
+            À appeler après la validation de l'écriture concernée ; les
+            événements sont ajoutés dans une transaction dédiée.
+        """
+        for channel, data in events:
+            self._apply(channel, data)
+        now = datetime.now(timezone.utc)
+        try:
+            conn.executemany(statement("cache_event.insert"), [
+                (channel, json.dumps(data, default=str), self.origin, to_utc_iso(now)) for channel, data in events])
+            self._published += 1
+            if self._published % PRUNE_EVERY == 0:
+                conn.execute(statement("cache_event.prune"),
+                             (to_utc_iso(now - timedelta(seconds=CACHE_EVENT_RETENTION)),))
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+
+    def sync(self, conn: sqlite3.Connection) -> int:
+        """Applique les événements publiés par les autres processus depuis le dernier appel.
+
+        Args:
+            conn (sqlite3.Connection): Connexion à la base de données
+
+        Returns:
+            int: Nombre d'événements appliqués
+        """
+        if CACHE_SYNC_INTERVAL and time.monotonic() - self._checked < CACHE_SYNC_INTERVAL:
+            return 0
+        with self._lock:
+            self._checked = time.monotonic()
+            if self._last_seen is None:
+                # Premier appel : les caches sont vides, seul le point de départ compte
+                row = conn.execute(statement("cache_event.latest")).fetchone()
+                self._last_seen = row[0] or 0
+                return 0
+            rows = conn.execute(statement("cache_event.since"), (self._last_seen,)).fetchall()
+            if not rows:
+                return 0
+            applied = 0
+            if rows[0][0] > self._last_seen + 1:
+                # Événements purgés avant d'avoir été vus : tout est à recalculer
+                for handler in self._resets:
+                    handler()
+            else:
+                for _, channel, data, origin in rows:
+                    if origin != self.origin:
+                        self._apply(channel, json.loads(data))
+                        applied += 1
+            self._last_seen = rows[-1][0]
+            return applied
+
+# Bus partagé du processus
+cache_bus = CacheBus()
@@ -1,12 +1,28 @@
+import asyncio
+import os
 import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable
+
+from statements import DB_CACHED_STATEMENTS, TrackedConnection, aggregate_stats, warm_statements
 
 """
 Module de gestion de la base de données pour l'application de cyclisme.
 Ce module fournit les fonctions nécessaires pour initialiser et gérer
-la connexion à la base de données SQLite.
+la connexion à la base de données SQLite, ainsi qu'un exécuteur dédié
+permettant aux handlers async d'accéder à la base sans bloquer la boucle
+d'événements.
 """
 
+DB_PATH = os.getenv("DB_PATH", "cycling.db")
+# Nombre de threads (et donc de connexions) de l'exécuteur SQLite
+DB_WORKERS = int(os.getenv("DB_WORKERS", 4))
+# Attente maximale (ms) sur un verrou d'écriture avant SQLITE_BUSY
+DB_BUSY_TIMEOUT = int(os.getenv("DB_BUSY_TIMEOUT", 5000))
+
 def get_db():
     """Crée et retourne une connexion à la base de données.
 
@@ -18,7 +34,7 @@ def get_db():
         La connexion est automatiquement fermée après utilisation grâce
         au mot-clé yield.
     """
-    connexion = sqlite3.connect("cycling.db")
+    connexion = sqlite3.connect(DB_PATH)
     connexion.row_factory = sqlite3.Row
     try:
         yield connexion
@@ -32,15 +48,23 @@ def init_db():
         - user : Table des utilisateurs (athlètes, coachs, admin)
         - athlete : Table des informations spécifiques aux athlètes
         - performance : Table des performances des athlètes
+        - training_session, training_load_daily : Charge d'entraînement
+        - job : File des tâches de fond
+        - cache_event : Invalidation des caches entre processus
+        - refresh_token : Jetons de renouvellement des tokens d'accès
+        - athlete_search : Index plein texte (FTS5) des athlètes
+        - coach_athlete : Affectation des athlètes aux coachs
 
     Tables créées:
         user:
             - user_id (INTEGER): Clé primaire auto-incrémentée
             - name (TEXT): Nom de l'utilisateur
-            - email (TEXT): Email unique de l'utilisateur
+            - email (TEXT): Email unique de l'utilisateur, en minuscules
             - password (TEXT): Mot de passe hashé
             - role (TEXT): Rôle de l'utilisateur (default: "athlete")
 
+        Index unique idx_user_email_lower : (lower(email)), unicité sans casse
+
         athlete:
             - athlete_id (INTEGER): Clé primaire auto-incrémentée
             - name (TEXT): Nom de l'athlète
@@ -55,13 +79,80 @@ def init_db():
             - vo2max (REAL): Consommation maximale d'oxygène
             - hr_max (REAL): Fréquence cardiaque maximale
             - cadence_max (REAL): Cadence maximale
+            - rf_max (REAL): Fréquence respiratoire maximale (optionnelle)
             - ppo (REAL): Puissance maximale
             - p1 (REAL): Puissance zone 1
             - p2 (REAL): Puissance zone 2
             - p3 (REAL): Puissance zone 3
             - athlete_id (INTEGER): Clé étrangère vers la table athlete
+            - tested_at (TEXT): Date et heure du test (ISO 8601, UTC)
+
+        Index idx_performance_athlete_tested : (athlete_id, tested_at)
+
+        training_session:
+            - session_id (INTEGER): Clé primaire auto-incrémentée
+            - athlete_id (INTEGER): Clé étrangère vers la table athlete
+            - session_date (TEXT): Jour de la séance (AAAA-MM-JJ)
+            - duration_s, average_power, normalized_power (REAL): Durée et puissances
+            - intensity_factor, tss (REAL): Facteur d'intensité et score de stress
+            - ftp (REAL): FTP utilisée pour le calcul
+
+        training_load_daily (clé primaire (athlete_id, day)):
+            - athlete_id (INTEGER): Identifiant de l'athlète
+            - day (TEXT): Jour (AAAA-MM-JJ), sans trou depuis la première séance
+            - tss (REAL): TSS cumulée du jour
+            - ctl, atl, tsb (REAL): Forme, fatigue et fraîcheur en fin de journée
+
+        job (file des tâches de fond, cf. jobs.py):
+            - job_id (INTEGER): Clé primaire auto-incrémentée
+            - kind (TEXT): Type de tâche (ingestion, reprocessing, export)
+            - params, result (TEXT): Paramètres et résultat (JSON)
+            - status (TEXT): queued, running, succeeded, failed ou cancelled
+            - attempts, max_attempts (INTEGER): Tentatives effectuées et autorisées
+            - cancel_requested (INTEGER): Annulation demandée pendant l'exécution
+            - submitted_by (INTEGER): Utilisateur ayant soumis la tâche
+            - worker (TEXT): Worker ayant réservé la tâche
+            - error (TEXT): Dernière erreur
+            - created_at, run_after, started_at, finished_at (TEXT): Dates (ISO 8601, UTC)
+            - duration_ms (REAL): Durée de la dernière exécution
+
+        Index idx_job_status_run_after : (status, run_after)
+
+        cache_event (invalidation des caches entre processus, cf. coherence.py):
+            - event_id (INTEGER): Clé primaire auto-incrémentée (ordre de publication)
+            - channel (TEXT): Canal (ex: summary.invalidate)
+            - data (TEXT): Données de l'événement (JSON)
+            - origin (TEXT): Processus ayant publié l'événement
+            - created_at (TEXT): Date de publication (ISO 8601, UTC)
+
+        refresh_token (jetons de renouvellement, cf. refresh_tokens.py):
+            - token_id (INTEGER): Clé primaire auto-incrémentée
+            - user_id (INTEGER): Clé étrangère vers la table user
+            - token_hash (TEXT): Empreinte SHA-256 unique du jeton (jamais le jeton)
+            - family (TEXT): Lignée de rotation (révoquée en bloc)
+            - created_at, expires_at, revoked_at (TEXT): Dates (ISO 8601, UTC)
+
+        Index idx_refresh_token_family : (family)
+        Index idx_refresh_token_user : (user_id)
+
+        athlete_search (table virtuelle FTS5, rowid = athlete_id):
+            - name (TEXT): Nom de l'athlète
+            - user_name, email (TEXT): Nom et email de l'utilisateur associé
+
+        Tenue à jour par des triggers sur athlete et user, reconstruite si
+        son nombre de lignes diffère de celui de athlete (base existante).
+
+        coach_athlete (clé primaire (coach_id, athlete_id), cf. coaching.py):
+            - coach_id (INTEGER): Clé étrangère vers la table user (rôle coach)
+            - athlete_id (INTEGER): Clé étrangère vers la table athlete
+            - assigned_at (TEXT): Date d'affectation (ISO 8601, UTC)
+
+        Index idx_coach_athlete_athlete : (athlete_id, coach_id)
+
+        À sa création dans une base existante, chaque athlète est affecté à
+        chaque coach : les coachs conservent l'accès qu'ils avaient.
     """
-    connexion = sqlite3.connect("cycling.db")
+    connexion = sqlite3.connect(DB_PATH)
     cursor = connexion.cursor()
 
     cursor.execute("""
@@ -96,11 +187,249 @@ def init_db():
         p2 REAL NOT NULL,
         p3 REAL NOT NULL,
         athlete_id INTEGER NOT NULL,
+        rf_max REAL,
+        tested_at TEXT,
         FOREIGN KEY (athlete_id) REFERENCES athlete(athlete_id)
     )""")
+    add_missing_columns(cursor, "performance", {"rf_max": "REAL", "tested_at": "TEXT"})
+    # Index des historiques par athlète (plages de dates) ; son préfixe athlete_id
+    # sert aussi aux agrégats par athlète (GROUP BY / filtres sur athlete_id)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_performance_athlete_tested ON performance(athlete_id, tested_at)")
+    cursor.execute("DROP INDEX IF EXISTS idx_performance_athlete")
+
+    cursor.execute("""CREATE TABLE IF NOT EXISTS training_session (
+        session_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        athlete_id INTEGER NOT NULL,
+        session_date TEXT NOT NULL,
+        duration_s REAL NOT NULL,
+        average_power REAL NOT NULL,
+        normalized_power REAL NOT NULL,
+        intensity_factor REAL NOT NULL,
+        tss REAL NOT NULL,
+        ftp REAL NOT NULL,
+        FOREIGN KEY (athlete_id) REFERENCES athlete(athlete_id)
+    )""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_training_session_athlete_date ON training_session(athlete_id, session_date)")
+
+    cursor.execute("""CREATE TABLE IF NOT EXISTS training_load_daily (
+        athlete_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        tss REAL NOT NULL,
+        ctl REAL NOT NULL,
+        atl REAL NOT NULL,
+        tsb REAL NOT NULL,
+        PRIMARY KEY (athlete_id, day)
+    ) WITHOUT ROWID""")
+
+    cursor.execute("""CREATE TABLE IF NOT EXISTS job (
+        job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        params TEXT NOT NULL DEFAULT '{}',
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL DEFAULT 3,
+        cancel_requested INTEGER NOT NULL DEFAULT 0,
+        submitted_by INTEGER,
+        worker TEXT,
+        result TEXT,
+        error TEXT,
+        created_at TEXT NOT NULL,
+        run_after TEXT NOT NULL,
+        started_at TEXT,
+        finished_at TEXT,
+        duration_ms REAL
+    )""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_job_status_run_after ON job(status, run_after)")
+
+    cursor.execute("""CREATE TABLE IF NOT EXISTS cache_event (
+        event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        channel TEXT NOT NULL,
+        data TEXT NOT NULL,
+        origin TEXT NOT NULL,
+        created_at TEXT NOT NULL
+    )""")
+
+    cursor.execute("""CREATE TABLE IF NOT EXISTS refresh_token (
+        token_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        token_hash TEXT NOT NULL UNIQUE,
+        family TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        expires_at TEXT NOT NULL,
+        revoked_at TEXT,
+        FOREIGN KEY (user_id) REFERENCES user(user_id)
+    )""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_refresh_token_family ON refresh_token(family)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_refresh_token_user ON refresh_token(user_id)")
+
+    normalize_emails(cursor)
+    create_search_index(cursor)
+    create_derived_metrics(cursor)
+
+    coach_athlete_exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'coach_athlete'").fetchone()
+    cursor.execute("""CREATE TABLE IF NOT EXISTS coach_athlete (
+        coach_id INTEGER NOT NULL,
+        athlete_id INTEGER NOT NULL,
+        assigned_at TEXT NOT NULL,
+        PRIMARY KEY (coach_id, athlete_id),
+        FOREIGN KEY (coach_id) REFERENCES user(user_id),
+        FOREIGN KEY (athlete_id) REFERENCES athlete(athlete_id)
+    ) WITHOUT ROWID""")
+    # La clé primaire sert aux listes d'un coach, cet index aux contrôles d'accès par athlète
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_coach_athlete_athlete ON coach_athlete(athlete_id, coach_id)")
+    cursor.executescript("""
+        CREATE TRIGGER IF NOT EXISTS coach_athlete_athlete_delete AFTER DELETE ON athlete BEGIN
+            DELETE FROM coach_athlete WHERE athlete_id = old.athlete_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS coach_athlete_coach_delete AFTER DELETE ON user BEGIN
+            DELETE FROM coach_athlete WHERE coach_id = old.user_id;
+        END;
+    """)
+    if not coach_athlete_exists:
+        cursor.execute("""INSERT INTO coach_athlete (coach_id, athlete_id, assigned_at)
+            SELECT u.user_id, a.athlete_id, strftime('%Y-%m-%dT%H:%M:%SZ', 'now')
+            FROM user u CROSS JOIN athlete a WHERE u.role = 'coach'""")
     connexion.commit()
     connexion.close()
 
+def normalize_emails(cursor: sqlite3.Cursor):
+    """Passe les emails en minuscules et rend leur unicité insensible à la casse.
+
+    Les emails enregistrés avant la normalisation sont convertis, sauf
+    lorsqu'un autre compte porte la même adresse à la casse près : ces
+    doublons sont laissés tels quels et l'index idx_user_email_lower reste
+    non unique jusqu'à leur fusion par un administrateur.
+
+    Args:
+        cursor (sqlite3.Cursor): Curseur de la connexion d'initialisation
+    """
+    cursor.execute("""UPDATE user SET email = lower(email) WHERE email <> lower(email)
+        AND NOT EXISTS (SELECT 1 FROM user other
+                        WHERE other.user_id <> user.user_id AND lower(other.email) = lower(user.email))""")
+    indexes = {row[1]: row[2] for row in cursor.execute("PRAGMA index_list(user)")}
+    if indexes.get("idx_user_email_lower"):
+        return
+    cursor.execute("DROP INDEX IF EXISTS idx_user_email_lower")
+    try:
+        cursor.execute("CREATE UNIQUE INDEX idx_user_email_lower ON user(lower(email))")
+    except sqlite3.IntegrityError:
+        cursor.execute("CREATE INDEX idx_user_email_lower ON user(lower(email))")
+
+def create_search_index(cursor: sqlite3.Cursor):
+    """Crée l'index plein texte des athlètes (FTS5) et ses triggers.
+
+    Les noms et emails sont découpés en mots sans accents ni casse
+    (tokenizer unicode61) ; les index de préfixes de 2 et 3 caractères
+    accélèrent les recherches par début de mot.
+
+    Args:
+        cursor (sqlite3.Cursor): Curseur de la base de données
+    """
+    cursor.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS athlete_search USING fts5(
+        name, user_name, email,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )""")
+    # Classement par pertinence : le nom de l'athlète pèse plus que celui du compte, puis l'email
+    cursor.execute("INSERT INTO athlete_search(athlete_search, rank) VALUES ('rank', 'bm25(10.0, 4.0, 2.0)')")
+    cursor.executescript("""
+        CREATE TRIGGER IF NOT EXISTS athlete_search_insert AFTER INSERT ON athlete BEGIN
+            INSERT INTO athlete_search(rowid, name, user_name, email)
+            SELECT new.athlete_id, new.name,
+                   (SELECT name FROM user WHERE user_id = new.user_id),
+                   (SELECT email FROM user WHERE user_id = new.user_id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS athlete_search_update AFTER UPDATE OF name, user_id ON athlete BEGIN
+            DELETE FROM athlete_search WHERE rowid = old.athlete_id;
+            INSERT INTO athlete_search(rowid, name, user_name, email)
+            SELECT new.athlete_id, new.name,
+                   (SELECT name FROM user WHERE user_id = new.user_id),
+                   (SELECT email FROM user WHERE user_id = new.user_id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS athlete_search_delete AFTER DELETE ON athlete BEGIN
+            DELETE FROM athlete_search WHERE rowid = old.athlete_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS athlete_search_user_update AFTER UPDATE OF name, email ON user BEGIN
+            UPDATE athlete_search SET user_name = new.name, email = new.email
+            WHERE rowid IN (SELECT athlete_id FROM athlete WHERE user_id = new.user_id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS athlete_search_user_delete AFTER DELETE ON user BEGIN
+            UPDATE athlete_search SET user_name = NULL, email = NULL
+            WHERE rowid IN (SELECT athlete_id FROM athlete WHERE user_id = old.user_id);
+        END;
+    """)
+    # Base créée avant l'index, ou modifiée sans les triggers : reconstruction complète
+    indexed = cursor.execute("SELECT COUNT(*) FROM athlete_search").fetchone()[0]
+    if indexed != cursor.execute("SELECT COUNT(*) FROM athlete").fetchone()[0]:
+        cursor.execute("DELETE FROM athlete_search")
+        cursor.execute("""INSERT INTO athlete_search(rowid, name, user_name, email)
+            SELECT a.athlete_id, a.name, u.name, u.email FROM athlete a LEFT JOIN user u ON u.user_id = a.user_id""")
+
+def create_derived_metrics(cursor: sqlite3.Cursor):
+    """Crée les métriques dérivées du poids et de la taille, et les index associés.
+
+    Les métriques sont écrites une fois, à l'écriture des données dont elles
+    dépendent, et non recalculées par jointure à chaque lecture :
+        - athlete.bmi : indice de masse corporelle (kg/m²), colonne générée
+          (VIRTUAL) ; son index en conserve la valeur
+        - performance.power_to_weight : PPO / poids (W/kg)
+        - performance.vo2max_abs : VO2max absolue (L/min), vo2max étant
+          enregistrée en ml/kg/min
+    Les deux colonnes de performance, qui dépendent du poids de l'athlète,
+    sont tenues à jour par des triggers : à l'insertion ou à la modification
+    d'une performance, et pour toutes ses performances lorsque le poids d'un
+    athlète change.
+
+    Args:
+        cursor (sqlite3.Cursor): Curseur de la base de données
+    """
+    existing = {row[1] for row in cursor.execute("PRAGMA table_xinfo(performance)").fetchall()}
+    add_missing_columns(cursor, "athlete", {"bmi": "REAL GENERATED ALWAYS AS (weight / (height * height)) VIRTUAL"})
+    add_missing_columns(cursor, "performance", {"power_to_weight": "REAL", "vo2max_abs": "REAL"})
+    cursor.executescript("""
+        CREATE TRIGGER IF NOT EXISTS performance_metrics_insert AFTER INSERT ON performance BEGIN
+            UPDATE performance SET (power_to_weight, vo2max_abs) =
+                (SELECT new.ppo / weight, new.vo2max * weight / 1000 FROM athlete WHERE athlete_id = new.athlete_id)
+            WHERE performance_id = new.performance_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS performance_metrics_update AFTER UPDATE OF ppo, vo2max, athlete_id ON performance BEGIN
+            UPDATE performance SET (power_to_weight, vo2max_abs) =
+                (SELECT new.ppo / weight, new.vo2max * weight / 1000 FROM athlete WHERE athlete_id = new.athlete_id)
+            WHERE performance_id = new.performance_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS performance_metrics_athlete_weight AFTER UPDATE OF weight ON athlete BEGIN
+            UPDATE performance SET power_to_weight = ppo / new.weight, vo2max_abs = vo2max * new.weight / 1000
+            WHERE athlete_id = new.athlete_id;
+        END;
+    """)
+    if "power_to_weight" not in existing:
+        # Colonnes ajoutées à une base existante : calcul initial en une requête
+        cursor.execute("""UPDATE performance SET (power_to_weight, vo2max_abs) =
+            (SELECT performance.ppo / weight, performance.vo2max * weight / 1000
+             FROM athlete WHERE athlete_id = performance.athlete_id)""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_athlete_bmi ON athlete(bmi)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_performance_power_to_weight ON performance(power_to_weight)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_performance_vo2max_abs ON performance(vo2max_abs)")
+
+def add_missing_columns(cursor: sqlite3.Cursor, table_name: str, columns: dict[str, str]):
+    """Ajoute à une table existante les colonnes qui lui manquent.
+
+    Permet de faire évoluer le schéma d'une base déjà créée sans la recréer
+    (CREATE TABLE IF NOT EXISTS ne modifie pas une table existante).
+
+    Args:
+        cursor (sqlite3.Cursor): Curseur sur la base à migrer
+        table_name (str): Nom de la table
+        columns (dict[str, str]): Nom de colonne -> définition SQL (ex: "REAL",
+            ou "REAL GENERATED ALWAYS AS (...) VIRTUAL")
+    """
+    # table_xinfo liste aussi les colonnes générées
+    existing = {row[1] for row in cursor.execute(f"PRAGMA table_xinfo({table_name})").fetchall()}
+    for column_name, definition in columns.items():
+        if column_name not in existing:
+            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {definition}")
+
 @contextmanager
 def db_connection():
     """Gestionnaire de contexte pour la connexion à la base de données.
@@ -117,7 +446,7 @@ def db_connection():
         L'option check_same_thread=False est utilisée pour permettre l'accès
         à la connexion depuis différents threads.
     """
-    conn = sqlite3.connect("cycling.db", check_same_thread=False)
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
     conn.row_factory = sqlite3.Row
     try:
         yield conn
@@ -136,6 +465,236 @@ def get_db():
     with db_connection() as conn:
         yield conn
 
+def connect(db_path: str = None) -> sqlite3.Connection:
+    """Ouvre une connexion configurée pour un usage longue durée.
+
+    Args:
+        db_path (str, optional): Chemin de la base. Defaults to DB_PATH.
+
+    Returns:
+        sqlite3.Connection: Connexion (TrackedConnection) avec row_factory
+        sqlite3.Row, journal WAL, busy_timeout et taille du cache de
+        statements (DB_CACHED_STATEMENTS) configurés
+
+    Note:
+        Le mode WAL permet aux lectures de se dérouler en parallèle
+        d'une écriture, ce qui est indispensable dès que plusieurs
+        threads de l'exécuteur partagent le même fichier.
+    """
+    conn = sqlite3.connect(db_path or DB_PATH, check_same_thread=False,
+                           factory=TrackedConnection, cached_statements=DB_CACHED_STATEMENTS)
+    conn.row_factory = sqlite3.Row
+    # Les PRAGMA de configuration ne comptent pas comme préparations de requêtes métier
+    cursor = sqlite3.Cursor(conn)
+    cursor.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT}")
+    cursor.execute("PRAGMA journal_mode = WAL")
+    cursor.execute("PRAGMA synchronous = NORMAL")
+    cursor.close()
+    return conn
+
+def fetch_all(conn: sqlite3.Connection, query: str, params: tuple = ()) -> tuple[list[str], list[tuple]]:
+    """Exécute une requête de lecture et retourne colonnes et lignes brutes.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        query (str): Requête SQL paramétrée
+        params (tuple, optional): Paramètres de la requête
+
+    Returns:
+        tuple: Un tuple contenant :
+            - columns (list[str]): Noms des colonnes
+            - rows (list[tuple]): Lignes de résultat sous forme de tuples
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    try:
+        cursor.execute(query, params)
+        columns = [description[0] for description in cursor.description]
+        return columns, cursor.fetchall()
+    finally:
+        cursor.close()
+
+def fetch_one(conn: sqlite3.Connection, query: str, params: tuple = ()) -> sqlite3.Row | None:
+    """Exécute une requête de lecture et retourne la première ligne.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        query (str): Requête SQL paramétrée
+        params (tuple, optional): Paramètres de la requête
+
+    Returns:
+        sqlite3.Row | None: Première ligne du résultat, ou None
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+
+def execute_write(conn: sqlite3.Connection, query: str, params: tuple = ()) -> tuple[int, int]:
+    """Exécute une requête d'écriture dans sa propre transaction.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        query (str): Requête SQL paramétrée (INSERT, UPDATE, DELETE)
+        params (tuple, optional): Paramètres de la requête
+
+    Returns:
+        tuple: Un tuple contenant :
+            - rowcount (int): Nombre de lignes affectées
+            - lastrowid (int): Identifiant de la dernière ligne insérée
+
+    Raises:
+        sqlite3.Error: La transaction est annulée avant de propager l'erreur
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+        conn.commit()
+        return cursor.rowcount, cursor.lastrowid
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+class DBExecutor:
+    """Exécuteur asynchrone des accès SQLite.
+
+    Les appels sont déposés dans la file d'un ThreadPoolExecutor dont
+    chaque thread possède sa propre connexion persistante. Les handlers
+    async attendent le résultat (await) sans bloquer la boucle d'événements,
+    et les connexions ne sont plus ouvertes/fermées à chaque requête.
+    À son ouverture, chaque connexion prépare les requêtes du registre
+    statements.STATEMENTS (cf. statements.warm_statements) : elles sont
+    dans le cache de statements avant le premier appel.
+
+    Attributes:
+        db_path (str): Chemin de la base de données
+        max_workers (int): Nombre de threads (et de connexions)
+
+    Example:
+        >>> db = DBExecutor("cycling.db")
+        >>> columns, rows = await db.fetch_all("SELECT * FROM athlete")
+        >>> rowcount, _ = await db.execute("DELETE FROM athlete WHERE athlete_id=?", (1,))
+    """
+
+    def __init__(self, db_path: str = None, max_workers: int = None):
+        self.db_path = db_path or DB_PATH
+        self.max_workers = max_workers or DB_WORKERS
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="sqlite",
+            initializer=self._open_connection,
+        )
+
+    def _open_connection(self):
+        """Ouvre et préchauffe la connexion du thread courant (initializer du pool)."""
+        conn = connect(self.db_path)
+        warm_statements(conn)
+        self._local.conn = conn
+        with self._lock:
+            self._connections.append(conn)
+
+    def _call(self, fn: Callable, *args, **kwargs) -> Any:
+        """Exécute fn(conn, ...) dans le thread courant de l'exécuteur."""
+        conn = self._local.conn
+        try:
+            return fn(conn, *args, **kwargs)
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Exécute fn(conn, *args, **kwargs) sur un thread de l'exécuteur.
+
+        Args:
+            fn (Callable): Fonction synchrone recevant la connexion en
+                premier argument. Elle constitue une unité de travail :
+                toute transaction laissée ouverte par une exception est annulée.
+
+        Returns:
+            Any: Valeur de retour de fn
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(self._call, fn, *args, **kwargs))
+
+    async def fetch_all(self, query: str, params: tuple = ()) -> tuple[list[str], list[tuple]]:
+        """Version asynchrone de fetch_all."""
+        return await self.run(fetch_all, query, params)
+
+    async def fetch_one(self, query: str, params: tuple = ()) -> sqlite3.Row | None:
+        """Version asynchrone de fetch_one."""
+        return await self.run(fetch_one, query, params)
+
+    async def execute(self, query: str, params: tuple = ()) -> tuple[int, int]:
+        """Version asynchrone de execute_write."""
+        return await self.run(execute_write, query, params)
+
+    def prestart(self):
+        """Démarre immédiatement tous les threads (et donc toutes les connexions).
+
+        ThreadPoolExecutor crée ses threads à la demande ; sans cet appel, la
+        première requête servie par chaque nouveau thread paierait
+        l'ouverture et le préchauffage de sa connexion.
+        """
+        barrier = threading.Barrier(self.max_workers)
+        futures = [self._executor.submit(barrier.wait) for _ in range(self.max_workers)]
+        for future in futures:
+            future.result()
+
+    def statement_stats(self) -> dict:
+        """Retourne les compteurs de préparation/réutilisation des requêtes du pool."""
+        with self._lock:
+            connections = list(self._connections)
+        return aggregate_stats(connections)
+
+    def shutdown(self):
+        """Arrête les threads et ferme toutes les connexions."""
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+_executor: DBExecutor | None = None
+_executor_lock = threading.Lock()
+
+def get_executor() -> DBExecutor:
+    """Retourne l'exécuteur SQLite partagé du processus (créé au premier appel).
+
+    Returns:
+        DBExecutor: Exécuteur partagé
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = DBExecutor()
+                _executor.prestart()
+    return _executor
+
+def close_executor():
+    """Arrête l'exécuteur partagé (arrêt de l'application) ; le prochain appel en recrée un."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
+
+def get_async_db() -> DBExecutor:
+    """Dépendance FastAPI fournissant l'exécuteur SQLite asynchrone.
+
+    Returns:
+        DBExecutor: Exécuteur partagé à utiliser avec await
+    """
+    return get_executor()
+
 if __name__ == "__main__":
     # Initialisation de la base de données si le script est exécuté directement
     init_db()
\ No newline at end of file
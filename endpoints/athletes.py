@@ -1,11 +1,19 @@
 # This file contains the endpoints for the athletes
 #Importing the necessary libraries
-from fastapi import APIRouter,Depends, HTTPException
-from database import get_db,init_db
-from utils import get_current_user
+from fastapi import APIRouter,Depends, HTTPException, Query, Request
+from database import DBExecutor, get_async_db
+from utils import get_accessible_athlete, get_current_user
+import coaching
+from serialization import PageParams, RowShape, negotiated_response, shape_query
+import queries
+import history
+from queries import to_utc_iso
+from statements import statement
+from coherence import cache_bus
 from pydantic import BaseModel
 import sqlite3
 from enum import Enum
+from datetime import datetime
 
 
 router=APIRouter(prefix="/athletes")
@@ -37,16 +45,28 @@ class AthleteSchema(BaseModel):
     height : float
     user_id : int
 
+#schema for a coach assignment
+class AssignmentSchema(BaseModel):
+    """
+    Schéma d'affectation d'athlètes à un coach.
+    
+    Attributes:
+        coach_id (int): Identifiant de l'utilisateur coach
+        athlete_ids (list[int]): Identifiants des athlètes à lui affecter
+    """
+    coach_id : int
+    athlete_ids : list[int]
+
 
 #POST CREATE ATHLETE
 @router.post('/create')
-def create_athlete(athlete: AthleteSchema, db: sqlite3.Connection = Depends(get_db), current_user=Depends(get_current_user)):
+async def create_athlete(athlete: AthleteSchema, db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
     """
     Crée un nouvel athlète dans la base de données.
     
     Args:
         athlete (AthleteSchema): Données de l'athlète à créer
-        db (sqlite3.Connection): Connexion à la base de données
+        db (DBExecutor): Exécuteur asynchrone de la base de données
         current_user (dict): Informations sur l'utilisateur authentifié
         
     Returns:
@@ -55,16 +75,15 @@ def create_athlete(athlete: AthleteSchema, db: sqlite3.Connection = Depends(get_
     Raises:
         HTTPException 401: Si l'utilisateur n'a pas les droits nécessaires (rôle coach ou admin)
         HTTPException 400: Si l'utilisateur associé n'existe pas
+        
+    Note:
+        Un athlète créé par un coach lui est affecté.
     """
-    cursor=db.cursor()
     role=current_user["role"]
     if role !="coach" and role !="admin":
         raise HTTPException(status_code=401, detail="You are not allowed to perform this action")
     try:
-        cursor.execute(
-            "INSERT INTO athlete(name,gender,age,weight,height,user_id) VALUES(?,?,?,?,?,?)",
-            (athlete.name,athlete.gender,athlete.age,athlete.weight,athlete.height,athlete.user_id))
-        db.commit()
+        await db.run(coaching.create_athlete, athlete.model_dump(mode="json"), coaching.coach_scope(current_user))
         # return {f"athlete no.{athlete_id:cursor.lastrowid} created sucessfully" }
         return {f"athlete name : {athlete.name} created sucessfully" }
     except sqlite3.IntegrityError as e:
@@ -73,82 +92,261 @@ def create_athlete(athlete: AthleteSchema, db: sqlite3.Connection = Depends(get_
 
 #Get athlete list 
 @router.get('/athletes')
-def get_athletes(db: sqlite3.Connection = Depends(get_db), current_user=Depends(get_current_user)):
+async def get_athletes(request: Request, shape: RowShape = shape_query, page: PageParams = Depends(),
+                       q: str | None = None, gender: GENDERENUM | None = None,
+                       bmi_min: float | None = None, bmi_max: float | None = None,
+                       db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
     """
-    Récupère la liste de tous les athlètes.
+    Récupère la liste des athlètes, avec pagination, tri et filtres côté serveur.
     
     Args:
-        db (sqlite3.Connection): Connexion à la base de données
+        request (Request): Requête HTTP (négociation du format via Accept)
+        shape (str): Forme de la réponse ("records" ou "columns")
+        page (PageParams): Pagination et tri (limit, offset, sort, order)
+        q (str, optional): Recherche sur le nom de l'athlète
+        gender (GENDERENUM, optional): Filtre sur le genre
+        bmi_min, bmi_max (float, optional): Bornes (incluses) de l'IMC,
+            colonne générée bmi indexée (également utilisable comme tri)
+        db (DBExecutor): Exécuteur asynchrone de la base de données
         current_user (dict): Informations sur l'utilisateur authentifié
         
     Returns:
-        list: Liste des athlètes enregistrés dans la base de données
+        Response: Page d'athlètes en JSON, MessagePack ou Arrow selon
+        l'en-tête Accept. L'en-tête X-Total-Count donne le nombre total
+        d'athlètes correspondant aux filtres.
         
     Raises:
         HTTPException 401: Si l'utilisateur n'a pas les droits nécessaires (rôle coach ou admin)
+        HTTPException 400: Si la colonne de tri n'existe pas
+        
+    Note:
+        Un coach ne reçoit que les athlètes qui lui sont affectés.
     """
     role=current_user["role"]
     if role !="coach" and role !="admin":
         raise HTTPException(status_code=401, detail="You are not allowed to perform this action")
-    cursor = db.cursor()
-    cursor.execute("SELECT * FROM athlete")
-    return cursor.fetchall()
+    coach_id = coaching.coach_scope(current_user)
+    if page.limit is None and not (page.sort or q or gender or bmi_min is not None or bmi_max is not None):
+        if coach_id is None:
+            columns, rows = await db.fetch_all(statement("athlete.list"))
+        else:
+            columns, rows = await db.fetch_all(statement("athlete.list_for_coach"), (coach_id,))
+        total = len(rows)
+    else:
+        scope = ("athlete_id", statement("coach_athlete.athlete_ids"), (coach_id,)) if coach_id is not None else None
+        try:
+            columns, rows, total = await db.run(
+                queries.select_page, "athlete",
+                filters={"gender": gender.value if gender else None}, ranges={"bmi": (bmi_min, bmi_max)},
+                search=("name", q), scope=scope, **page.as_kwargs())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+    return negotiated_response(request, columns, rows, shape, headers={"X-Total-Count": str(total)})
+
+
+#ATHLETE SEARCH
+@router.get('/search')
+async def search_athletes(request: Request, q: str = Query(..., min_length=1, description="Texte recherché"),
+                          limit: int = Query(20, ge=1, le=100), offset: int = Query(0, ge=0),
+                          shape: RowShape = shape_query,
+                          db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
+    """
+    Recherche des athlètes par nom, nom ou email du compte associé.
+    
+    Chaque mot saisi est un préfixe (ex: "emi zol" trouve "Émile Zola"),
+    sans tenir compte des accents ni de la casse. La recherche utilise
+    l'index plein texte athlete_search (FTS5).
+    
+    Args:
+        request (Request): Requête HTTP (négociation du format via Accept)
+        q (str): Texte recherché
+        limit (int): Taille de la page (20 par défaut)
+        offset (int): Nombre de résultats à sauter
+        shape (str): Forme de la réponse ("records" ou "columns")
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Informations sur l'utilisateur authentifié
+        
+    Returns:
+        Response: Athlètes correspondants, les plus pertinents d'abord, avec
+        l'email du compte et le score bm25 (plus il est bas, plus le résultat
+        est pertinent). L'en-tête X-Total-Count donne le nombre total de
+        résultats. Un coach ne trouve que les athlètes qui lui sont affectés.
+        
+    Raises:
+        HTTPException 401: Si l'utilisateur n'a pas les droits nécessaires (rôle coach ou admin)
+    """
+    role=current_user["role"]
+    if role !="coach" and role !="admin":
+        raise HTTPException(status_code=401, detail="You are not allowed to perform this action")
+    columns, rows, total = await db.run(queries.search_athletes, q, limit, offset, coaching.coach_scope(current_user))
+    return negotiated_response(request, columns, rows, shape, headers={"X-Total-Count": str(total)})
+
+
+#ATHLETE HISTORY
+@router.get('/{athlete_id}/history')
+async def get_athlete_history(athlete_id: int, request: Request,
+                              start: datetime | None = Query(None, alias="from"),
+                              end: datetime | None = Query(None, alias="to"),
+                              window: int = Query(3, ge=1, le=50),
+                              db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
+    """
+    Récupère l'historique daté des tests d'un athlète sur une plage de dates.
+    
+    Args:
+        athlete_id (int): Identifiant de l'athlète
+        request (Request): Requête HTTP (forme brute du paramètre "to")
+        start (datetime, optional): Début de la plage, inclus (paramètre "from")
+        end (datetime, optional): Fin de la plage, incluse (paramètre "to") ;
+            une date sans heure couvre toute la journée
+        window (int): Nombre de tests des moyennes glissantes (1 à 50)
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Informations sur l'utilisateur authentifié
+        
+    Returns:
+        dict: Tests de la plage triés par date, avec les moyennes glissantes
+        de chaque métrique (<métrique>_rolling) et la pente de tendance de
+        chaque métrique sur la plage (unités par jour)
+        
+    Raises:
+        HTTPException 401: Si un athlète demande l'historique d'un autre athlète
+        HTTPException 404: Si l'athlète n'existe pas
+    """
+    await get_accessible_athlete(athlete_id, db, current_user)
+    # "to=2025-01-31" est lu comme minuit : la borne devient la dernière seconde du jour
+    if end is not None and len(request.query_params["to"]) == len("YYYY-MM-DD"):
+        end = end.replace(hour=23, minute=59, second=59)
+    return await db.run(history.build_history, athlete_id,
+                        to_utc_iso(start) if start else None, to_utc_iso(end) if end else None, window)
 
 
 #UPDATE ATHLETE
 @router.put('/update/{athlete_id}')
-def update_athlete(athlete_id: int, athlete: AthleteSchema, db: sqlite3.Connection = Depends(get_db), current_user=Depends(get_current_user)):
+async def update_athlete(athlete_id: int, athlete: AthleteSchema, db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
     """
     Met à jour les informations d'un athlète existant.
     
     Args:
         athlete_id (int): Identifiant de l'athlète à mettre à jour
         athlete (AthleteSchema): Nouvelles données de l'athlète
-        db (sqlite3.Connection): Connexion à la base de données
+        db (DBExecutor): Exécuteur asynchrone de la base de données
         current_user (dict): Informations sur l'utilisateur authentifié
         
     Returns:
         dict: Message de confirmation avec l'identifiant de l'athlète mis à jour
         
     Raises:
-        HTTPException 401: Si l'utilisateur n'a pas les droits nécessaires (rôle coach ou admin)
+        HTTPException 401: Si l'utilisateur n'a pas les droits nécessaires (rôle coach ou admin,
+            athlète affecté au coach)
         HTTPException 404: Si l'athlète n'existe pas
     """
     role=current_user["role"]
     if role !="coach" and role !="admin":
         raise HTTPException(status_code=401, detail="You are not allowed to perform this action")
-    cursor = db.cursor()
-    cursor.execute("UPDATE athlete SET name=?, gender=?, age=?, weight=?, height=?, user_id=? WHERE athlete_id=?",
-                   (athlete.name, athlete.gender, athlete.age, athlete.weight, athlete.height, athlete.user_id, athlete_id))
-    db.commit()
-    if cursor.rowcount == 0:
+    if role == "coach":
+        await get_accessible_athlete(athlete_id, db, current_user)
+    rowcount = await db.run(queries.update_data, "athlete", athlete_id, athlete.model_dump(mode="json"))
+    if rowcount == 0:
         raise HTTPException(status_code=404, detail="Athlete not found")
+    await db.run(cache_bus.publish, ("summary.invalidate", [athlete_id]))
     return {f"Athlete no.{athlete_id} updated successfully"}
 
 #DELETE ATHLETE
 @router.delete('/delete/{athlete_id}')
-def delete_athlete(athlete_id: int, db: sqlite3.Connection = Depends(get_db), current_user=Depends(get_current_user)):
+async def delete_athlete(athlete_id: int, db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
     """
     Supprime un athlète de la base de données.
     
     Args:
         athlete_id (int): Identifiant de l'athlète à supprimer
-        db (sqlite3.Connection): Connexion à la base de données
+        db (DBExecutor): Exécuteur asynchrone de la base de données
         current_user (dict): Informations sur l'utilisateur authentifié
         
     Returns:
         dict: Message de confirmation avec l'identifiant de l'athlète supprimé
         
     Raises:
-        HTTPException 401: Si l'utilisateur n'a pas les droits nécessaires (rôle coach ou admin)
+        HTTPException 401: Si l'utilisateur n'a pas les droits nécessaires (rôle coach ou admin,
+            athlète affecté au coach)
         HTTPException 404: Si l'athlète n'existe pas
     """
     role=current_user["role"]
     if role !="coach" and role !="admin":
         raise HTTPException(status_code=401, detail="You are not allowed to perform this action")
-    cursor = db.cursor()
-    cursor.execute("DELETE FROM athlete WHERE athlete_id=?", (athlete_id,))
-    db.commit()
-    if cursor.rowcount == 0:
+    if role == "coach":
+        await get_accessible_athlete(athlete_id, db, current_user)
+    rowcount = await db.run(queries.delete_data, "athlete", athlete_id)
+    if rowcount == 0:
         raise HTTPException(status_code=404, detail="Athlete not found")
+    await db.run(cache_bus.publish, ("summary.invalidate", [athlete_id]))
     return {f"Athlete no.{athlete_id} deleted successfully"}
+
+#COACH ASSIGNMENTS
+@router.post('/assignments')
+async def assign_athletes(assignment: AssignmentSchema, db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
+    """
+    Affecte des athlètes à un coach (les affectations existantes sont conservées).
+    
+    Args:
+        assignment (AssignmentSchema): Coach et athlètes à lui affecter
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Informations sur l'utilisateur authentifié
+        
+    Returns:
+        dict: Nombre de nouvelles affectations (assigned)
+        
+    Raises:
+        HTTPException 401: Si l'utilisateur n'est pas administrateur
+        HTTPException 400: Si coach_id ne désigne pas un coach
+    """
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=401, detail="You are not allowed to perform this action")
+    coach = await db.fetch_one(statement("user.by_id"), (assignment.coach_id,))
+    if coach is None or coach["role"] != "coach":
+        raise HTTPException(status_code=400, detail="coach_id is not a coach")
+    assigned = await db.run(coaching.assign, assignment.coach_id, assignment.athlete_ids)
+    return {"assigned": assigned}
+
+@router.get('/{athlete_id}/coaches')
+async def get_athlete_coaches(athlete_id: int, db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
+    """
+    Récupère les coachs auxquels un athlète est affecté.
+    
+    Args:
+        athlete_id (int): Identifiant de l'athlète
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Informations sur l'utilisateur authentifié
+        
+    Returns:
+        list[dict]: user_id, name, email et assigned_at de chaque coach
+        
+    Raises:
+        HTTPException 401: Si l'utilisateur n'a pas accès à l'athlète
+        HTTPException 404: Si l'athlète n'existe pas
+    """
+    await get_accessible_athlete(athlete_id, db, current_user)
+    columns, rows = await db.fetch_all(statement("coach_athlete.coaches"), (athlete_id,))
+    return [dict(zip(columns, row)) for row in rows]
+
+@router.delete('/{athlete_id}/coaches/{coach_id}')
+async def unassign_athlete(athlete_id: int, coach_id: int, db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
+    """
+    Retire un athlète à un coach.
+    
+    Args:
+        athlete_id (int): Identifiant de l'athlète
+        coach_id (int): Identifiant du coach
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Informations sur l'utilisateur authentifié
+        
+    Returns:
+        dict: Message de confirmation
+        
+    Raises:
+        HTTPException 401: Si l'utilisateur n'est pas administrateur
+        HTTPException 404: Si l'athlète n'est pas affecté à ce coach
+    """
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=401, detail="You are not allowed to perform this action")
+    if await db.run(coaching.unassign, coach_id, athlete_id) == 0:
+        raise HTTPException(status_code=404, detail="Assignment not found")
+    return {f"Athlete no.{athlete_id} unassigned from coach no.{coach_id}"}
@@ -0,0 +1,50 @@
+# Description: This file contains the export endpoints used by BI tools (Power BI, notebooks)
+import json
+from fastapi import APIRouter, Depends, HTTPException, Request
+from analytics import get_analytics_db
+from database import DBExecutor, get_async_db
+from jobs import EXPORT_TABLES
+import coaching
+from utils import get_current_user
+from serialization import RowShape, negotiated_response, shape_query
+from statements import statement
+
+router=APIRouter(prefix="/export")
+
+@router.get('/{table_name}')
+async def export_table(table_name: str, request: Request, shape: RowShape = shape_query,
+                       db: DBExecutor = Depends(get_async_db), analytics_db: DBExecutor = Depends(get_analytics_db),
+                       current_user=Depends(get_current_user)):
+    """Exporte une table pour les outils de BI (le mot de passe des utilisateurs n'est jamais exporté).
+
+    Le format du corps est négocié via l'en-tête Accept (JSON, MessagePack
+    ou flux Arrow IPC) et la compression via Accept-Encoding (br, gzip).
+
+    Args:
+        table_name (str): Table à exporter (user, athlete ou performance)
+        request (Request): Requête HTTP entrante
+        shape (str): Forme de la réponse JSON/MessagePack ("records" ou "columns")
+        db (DBExecutor): Exécuteur asynchrone de la base de données (athlètes visibles)
+        analytics_db (DBExecutor): Exécuteur des lectures analytiques (cf. analytics.py)
+        current_user (dict): Utilisateur actuellement connecté
+
+    Returns:
+        Response: Contenu complet de la table pour un admin ; pour un coach,
+        les seules lignes de ses athlètes (comptes, profils, performances)
+
+    Raises:
+        HTTPException 401: Si l'utilisateur n'a pas les droits nécessaires (rôle coach ou admin)
+        HTTPException 404: Si la table demandée n'est pas exportable
+    """
+    if current_user["role"] not in ["coach", "admin"]:
+        raise HTTPException(status_code=401, detail="You are not allowed to perform this action")
+    if table_name not in EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail="Unknown export table")
+    # Affectations lues sur la base principale (la copie analytique peut être en retard)
+    visible = await db.run(coaching.visible_athletes, current_user)
+    if visible is None:
+        columns, rows = await analytics_db.fetch_all(statement(f"export.{table_name}"))
+    else:
+        columns, rows = await analytics_db.fetch_all(statement(f"export.{table_name}_for_athletes"),
+                                                     (json.dumps(visible),))
+    return negotiated_response(request, columns, rows, shape)
@@ -0,0 +1,160 @@
+# Description: This file contains the background job endpoints (submit, poll, cancel, download)
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import FileResponse
+from database import DBExecutor, get_async_db
+from utils import get_current_user
+from serialization import PageParams
+from statements import statement
+from pydantic import BaseModel, Field
+from typing import Any, Literal
+from pathlib import Path
+import queries
+import jobs
+
+router=APIRouter(prefix="/jobs")
+
+# Types de tâches réservés aux administrateurs (écritures en masse)
+ADMIN_KINDS = ("ingestion", "reprocessing", "parquet_export")
+
+class JobRequest(BaseModel):
+    """Schéma de soumission d'une tâche de fond.
+
+    Attributes:
+        kind (str): Type de tâche (ingestion, reprocessing, export ou parquet_export)
+        params (dict): Paramètres du traitement (cf. jobs.py)
+        max_attempts (int, optional): Nombre de tentatives. Defaults to JOB_MAX_ATTEMPTS.
+    """
+    kind: Literal["ingestion", "reprocessing", "export", "parquet_export"]
+    params: dict[str, Any] = Field(default_factory=dict)
+    max_attempts: int = Field(jobs.JOB_MAX_ATTEMPTS, ge=1, le=10)
+
+async def get_visible_job(job_id: int, db: DBExecutor, current_user: dict) -> dict:
+    """Récupère une tâche visible par l'utilisateur (la sienne, ou toutes pour un admin).
+
+    Raises:
+        HTTPException 404: Si la tâche n'existe pas ou appartient à un autre utilisateur
+    """
+    row = await db.fetch_one(statement("job.by_id"), (job_id,))
+    if row is None or (current_user["role"] != "admin" and row["submitted_by"] != current_user["user_id"]):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return jobs.job_to_dict(row)
+
+@router.post('', status_code=202)
+async def submit_job(job: JobRequest, db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
+    """Ajoute une tâche à la file ; elle sera exécutée par un worker.
+
+    Args:
+        job (JobRequest): Type, paramètres et nombre de tentatives
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Utilisateur actuellement connecté
+
+    Returns:
+        dict: La tâche créée (statut queued), à suivre via GET /jobs/{job_id}
+
+    Raises:
+        HTTPException 400: Si les paramètres sont invalides
+        HTTPException 401: Si l'utilisateur n'a pas les droits nécessaires (coach ou
+            admin, admin seul pour l'ingestion et les retraitements)
+    """
+    allowed = ["admin"] if job.kind in ADMIN_KINDS else ["coach", "admin"]
+    if current_user["role"] not in allowed:
+        raise HTTPException(status_code=401, detail="You are not allowed to perform this action")
+    try:
+        return await db.run(jobs.submit, job.kind, job.params, current_user["user_id"], job.max_attempts)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+@router.get('')
+async def list_jobs(response: Response, page: PageParams = Depends(),
+                    status: Literal["queued", "running", "succeeded", "failed", "cancelled"] | None = None,
+                    kind: str | None = None,
+                    db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
+    """Liste les tâches (les siennes, ou toutes pour un admin), les plus récentes d'abord par défaut.
+
+    Args:
+        response (Response): Réponse HTTP (en-tête X-Total-Count)
+        page (PageParams): Pagination et tri (limit, offset, sort, order)
+        status (str, optional): Filtre sur le statut
+        kind (str, optional): Filtre sur le type de tâche
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Utilisateur actuellement connecté
+
+    Returns:
+        list[dict]: Tâches de la page (en-tête X-Total-Count : nombre total)
+
+    Raises:
+        HTTPException 400: Si la colonne de tri n'existe pas
+    """
+    filters = {"status": status, "kind": kind}
+    if current_user["role"] != "admin":
+        filters["submitted_by"] = current_user["user_id"]
+    kwargs = page.as_kwargs()
+    if page.sort is None:
+        kwargs["descending"] = True
+    try:
+        columns, rows, total = await db.run(queries.select_page, "job", filters=filters, **kwargs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    response.headers["X-Total-Count"] = str(total)
+    return [jobs.job_to_dict(dict(zip(columns, row))) for row in rows]
+
+@router.get('/{job_id}')
+async def get_job(job_id: int, db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
+    """Récupère l'état d'une tâche (polling).
+
+    Args:
+        job_id (int): Identifiant de la tâche
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Utilisateur actuellement connecté
+
+    Returns:
+        dict: La tâche : statut, tentatives, dates, durée (ms), résultat ou dernière erreur
+
+    Raises:
+        HTTPException 404: Si la tâche n'existe pas ou n'est pas visible
+    """
+    return await get_visible_job(job_id, db, current_user)
+
+@router.delete('/{job_id}')
+async def cancel_job(job_id: int, db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
+    """Annule une tâche en attente, ou demande l'arrêt d'une tâche en cours.
+
+    Args:
+        job_id (int): Identifiant de la tâche
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Utilisateur actuellement connecté
+
+    Returns:
+        dict: La tâche après la demande (cancelled, ou running avec
+        cancel_requested jusqu'à son prochain point de contrôle)
+
+    Raises:
+        HTTPException 404: Si la tâche n'existe pas ou n'est pas visible
+        HTTPException 409: Si la tâche est déjà terminée
+    """
+    await get_visible_job(job_id, db, current_user)
+    if await db.run(jobs.cancel, job_id) is None:
+        raise HTTPException(status_code=409, detail="Job already finished")
+    return await get_visible_job(job_id, db, current_user)
+
+@router.get('/{job_id}/file')
+async def download_job_file(job_id: int, db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
+    """Télécharge le fichier produit par une tâche d'export terminée.
+
+    Args:
+        job_id (int): Identifiant de la tâche
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Utilisateur actuellement connecté
+
+    Returns:
+        FileResponse: Fichier de l'export
+
+    Raises:
+        HTTPException 404: Si la tâche n'existe pas, n'est pas visible, n'a
+            pas produit de fichier ou si celui-ci a été supprimé
+    """
+    job = await get_visible_job(job_id, db, current_user)
+    path = Path((job["result"] or {}).get("path", "")) if job["status"] == "succeeded" else None
+    if path is None or not path.is_file():
+        raise HTTPException(status_code=404, detail="No file for this job")
+    return FileResponse(path, filename=path.name)
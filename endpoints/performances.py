@@ -1,11 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
-from utils import get_current_user
-from database import get_db
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Request
+from utils import ensure_athletes_access, get_current_user
+import coaching
+from database import DBExecutor, get_async_db
+from serialization import PageParams, RowShape, negotiated_response, shape_query
+import queries
+from queries import to_utc_iso
+from statements import statement
+from coherence import cache_bus
+from pydantic import BaseModel, Field, field_validator
+from datetime import datetime, timezone
+import json
 import sqlite3
 
 router=APIRouter(prefix="/performances")
 
+# Nombre maximal de performances modifiées ou supprimées par lot
+PERFORMANCE_BATCH_MAX = 1000
+
 class Performance(BaseModel):
     """Schéma de données pour les performances d'un athlète.
 
@@ -19,6 +30,9 @@ class Performance(BaseModel):
         p2 (float): Puissance zone 2
         p3 (float): Puissance zone 3
         athlete_id (int): Identifiant unique de l'athlète associé
+        tested_at (datetime, optional): Date et heure du test. À la création,
+            l'heure courante est utilisée si elle n'est pas fournie ; à la
+            mise à jour, la date existante est conservée.
     """
     vo2max: float
     hr_max: float
@@ -29,118 +43,313 @@ class Performance(BaseModel):
     p2: float
     p3: float
     athlete_id: int
+    tested_at: datetime | None = None
+
+    def to_row(self) -> dict:
+        """Valeurs à écrire en base (tested_at en ISO 8601 UTC, omis s'il n'est pas fourni)."""
+        row = self.model_dump(exclude={"tested_at"})
+        if self.tested_at is not None:
+            row["tested_at"] = to_utc_iso(self.tested_at)
+        return row
+
+class PerformanceChanges(BaseModel):
+    """Modifications partielles d'une performance (seuls les champs fournis sont écrits).
+
+    Un champ fourni à null efface la valeur en base ; seuls rf_max et
+    tested_at l'acceptent, les autres colonnes étant NOT NULL.
+
+    Attributes:
+        vo2max, hr_max, rf_max, cadence_max, ppo, p1, p2, p3 (float, optional):
+            Nouvelles valeurs des métriques
+        athlete_id (int, optional): Nouvel athlète associé
+        tested_at (datetime, optional): Nouvelle date du test
+    """
+    vo2max: float | None = None
+    hr_max: float | None = None
+    rf_max: float | None = None
+    cadence_max: float | None = None
+    ppo: float | None = None
+    p1: float | None = None
+    p2: float | None = None
+    p3: float | None = None
+    athlete_id: int | None = None
+    tested_at: datetime | None = None
+
+    @field_validator("vo2max", "hr_max", "cadence_max", "ppo", "p1", "p2", "p3", "athlete_id")
+    @classmethod
+    def reject_null(cls, value):
+        """Refuse null sur les colonnes NOT NULL de la table performance."""
+        if value is None:
+            raise ValueError("Field cannot be null")
+        return value
+
+    def to_row(self) -> dict:
+        """Valeurs fournies à écrire en base, null compris (tested_at en ISO 8601 UTC)."""
+        row = self.model_dump(exclude_unset=True)
+        if self.tested_at is not None:
+            row["tested_at"] = to_utc_iso(self.tested_at)
+        return row
+
+class PerformanceUpdate(BaseModel):
+    """Modification d'une performance d'un lot.
+
+    Attributes:
+        performance_id (int): Identifiant de la performance
+        changes (PerformanceChanges): Champs à modifier
+    """
+    performance_id: int
+    changes: PerformanceChanges
+
+class PerformanceBatchUpdate(BaseModel):
+    """Lot de modifications de performances (PATCH /performances/batch).
+
+    Attributes:
+        updates (list[PerformanceUpdate]): Modifications, une par performance
+    """
+    updates: list[PerformanceUpdate] = Field(min_length=1, max_length=PERFORMANCE_BATCH_MAX)
+
+class PerformanceBatchDelete(BaseModel):
+    """Lot de suppressions de performances (DELETE /performances/batch).
+
+    Attributes:
+        performance_ids (list[int]): Identifiants des performances à supprimer
+    """
+    performance_ids: list[int] = Field(min_length=1, max_length=PERFORMANCE_BATCH_MAX)
+
+def _athletes_of(conn: sqlite3.Connection, performance_ids: list[int]) -> dict[int, int]:
+    """Athlète de chaque performance existante d'un lot (une seule requête)."""
+    return dict(conn.execute(statement("performance.athletes_of"), (json.dumps(performance_ids),)).fetchall())
 
 @router.post('/create')
-def create_performance(performance: Performance, db:sqlite3.Connection = Depends(get_db), current_user=Depends(get_current_user)):
+async def create_performance(performance: Performance, db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
     """Crée une nouvelle performance pour un athlète.
 
     Args:
         performance (Performance): Les données de performance à enregistrer
-        db (sqlite3.Connection): Connexion à la base de données
+        db (DBExecutor): Exécuteur asynchrone de la base de données
         current_user (dict): Utilisateur actuellement connecté
 
     Returns:
         dict: Message de confirmation de création
 
     Raises:
-        HTTPException 401: Si l'utilisateur n'a pas les droits nécessaires (role coach ou admin)
+        HTTPException 401: Si l'utilisateur n'a pas les droits nécessaires (role coach ou admin,
+            athlète affecté au coach)
         HTTPException 400: Si l'athlète associé n'existe pas dans la base de données
     """
-    cursor = db.cursor()
     role=current_user["role"]
     if role not in ["coach", "admin"]:
         raise HTTPException(status_code=401, detail="You are not allowed to perform this action")
+    await ensure_athletes_access([performance.athlete_id], db, current_user)
     try:
-        cursor.execute(
-                "INSERT INTO performance(vo2max,hr_max,hr_max,cadence_max,ppo,p1,p2,p3,athlete_id) VALUES(?,?,?,?,?,?,?,?,?)",
-                (performance.vo2max,performance.hr_max,performance.hr_max,performance.cadence_max,performance.ppo,performance.p1,performance.p2,performance.p3,performance.athlete_id))
-        db.commit()
+        row = performance.to_row()
+        row.setdefault("tested_at", to_utc_iso(datetime.now(timezone.utc)))
+        await db.run(queries.insert_data, "performance", row)
+        await db.run(cache_bus.publish, ("summary.invalidate", [performance.athlete_id]), ("distribution.add", row))
         return {"performance created successfully"}
     except sqlite3.IntegrityError as e:
         raise HTTPException(status_code=400, detail="Athlete does not exist") from e
 
-@router.put('/update/<int:performance_id>')
-def update_performance(performance_id: int, performance: Performance, db: sqlite3.Connection = Depends(get_db), current_user=Depends(get_current_user)):
+@router.put('/update/{performance_id}')
+async def update_performance(performance_id: int, performance: Performance, db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
     """Met à jour les données de performance d'un athlète.
 
     Args:
         performance_id (int): Identifiant de la performance à modifier
         performance (Performance): Nouvelles données de performance
-        db (sqlite3.Connection): Connexion à la base de données
+        db (DBExecutor): Exécuteur asynchrone de la base de données
         current_user (dict): Utilisateur actuellement connecté
 
     Returns:
         dict: Message de confirmation avec l'ID de la performance modifiée
 
     Raises:
-        HTTPException 401: Si l'utilisateur n'a pas les droits nécessaires (role coach ou admin)
+        HTTPException 401: Si l'utilisateur n'a pas les droits nécessaires (role coach ou admin,
+            athlètes affectés au coach)
         HTTPException 404: Si la performance n'est pas trouvée dans la base de données
     """
-    cursor = db.cursor()
     role=current_user["role"]
     if role not in ["coach", "admin"]:
         raise HTTPException(status_code=401, detail="You are not allowed to perform this action")
-    cursor.execute("UPDATE performance SET vo2max=?, hr_max=?, rf_max=?, cadence_max=?, ppo=?, p1=?, p2=?, p3=?, athlete_id=? WHERE performance_id=?",
-                   (performance.vo2max, performance.hr_max, performance.rf_max, performance.cadence_max, performance.ppo, performance.p1, performance.p2, performance.p3, performance.athlete_id, performance_id))
-    db.commit()
-    if cursor.rowcount == 0:
+    previous = await db.fetch_one(statement("performance.athlete_of"), (performance_id,))
+    await ensure_athletes_access([previous["athlete_id"] if previous else None, performance.athlete_id], db, current_user)
+    rowcount = await db.run(queries.update_data, "performance", performance_id, performance.to_row())
+    if rowcount == 0:
         raise HTTPException(status_code=404, detail="Performance not found")
+    await db.run(cache_bus.publish,
+                 ("summary.invalidate", [previous["athlete_id"] if previous else None, performance.athlete_id]),
+                 ("distribution.clear", None))
     return {f"Performance no.{performance_id} updated successfully"}
 
 @router.delete('/delete/{performance_id}')
-def delete_performance(performance_id: int, db: sqlite3.Connection = Depends(get_db), current_user=Depends(get_current_user)):
+async def delete_performance(performance_id: int, db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
     """Supprime une performance de la base de données.
 
     Args:
         performance_id (int): Identifiant de la performance à supprimer
-        db (sqlite3.Connection): Connexion à la base de données
+        db (DBExecutor): Exécuteur asynchrone de la base de données
         current_user (dict): Utilisateur actuellement connecté
 
     Returns:
         dict: Message de confirmation avec l'ID de la performance supprimée
 
     Raises:
-        HTTPException 401: Si l'utilisateur n'a pas les droits nécessaires (role coach ou admin)
+        HTTPException 401: Si l'utilisateur n'a pas les droits nécessaires (role coach ou admin,
+            athlète affecté au coach)
         HTTPException 404: Si la performance n'est pas trouvée dans la base de données
     """
-    cursor = db.cursor()
     role=current_user["role"]
     if role not in ["coach", "admin"]:
         raise HTTPException(status_code=401, detail="You are not allowed to perform this action")
-    cursor.execute("DELETE FROM performance WHERE performance_id=?", (performance_id,))
-    db.commit()
-    if cursor.rowcount == 0:
+    previous = await db.fetch_one(statement("performance.athlete_of"), (performance_id,))
+    await ensure_athletes_access([previous["athlete_id"] if previous else None], db, current_user)
+    rowcount = await db.run(queries.delete_data, "performance", performance_id)
+    if rowcount == 0:
         raise HTTPException(status_code=404, detail="Performance not found")
+    await db.run(cache_bus.publish, ("summary.invalidate", [previous["athlete_id"] if previous else None]),
+                 ("distribution.clear", None))
     return {f"Performance no.{performance_id} deleted successfully"}
 
+@router.patch('/batch')
+async def update_performances(batch: PerformanceBatchUpdate, db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
+    """Modifie un lot de performances en une seule transaction.
+
+    Args:
+        batch (PerformanceBatchUpdate): Identifiants et modifications partielles
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Utilisateur actuellement connecté
+
+    Returns:
+        dict: Dictionnaire contenant :
+            - updated (int): Nombre de performances modifiées
+            - results (list[dict]): performance_id et status ("updated",
+              "not_found" ou "unchanged" si aucune modification n'est fournie),
+              dans l'ordre du lot
+
+    Raises:
+        HTTPException 400: Si une performance apparaît plusieurs fois dans le lot
+        HTTPException 401: Si l'utilisateur n'a pas les droits nécessaires (role coach ou admin,
+            athlètes affectés au coach)
+
+    Note:
+        Les modifications portant sur les mêmes colonnes sont écrites par un
+        seul executemany (queries.update_many) ; en cas d'erreur, aucune
+        n'est appliquée. Les agrégats sont invalidés une seule fois pour le lot.
+    """
+    role=current_user["role"]
+    if role not in ["coach", "admin"]:
+        raise HTTPException(status_code=401, detail="You are not allowed to perform this action")
+    ids = [update.performance_id for update in batch.updates]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Duplicate performance_id in batch")
+    previous = await db.run(_athletes_of, ids)
+    rows = {update.performance_id: update.changes.to_row() for update in batch.updates}
+    new_athletes = [row["athlete_id"] for row in rows.values() if "athlete_id" in row]
+    await ensure_athletes_access([*previous.values(), *new_athletes], db, current_user)
+    updates = [(performance_id, row) for performance_id, row in rows.items() if performance_id in previous and row]
+    await db.run(queries.update_many, "performance", updates)
+    if updates:
+        await db.run(cache_bus.publish,
+                     ("summary.invalidate", [previous[performance_id] for performance_id, _ in updates] + new_athletes),
+                     ("distribution.clear", None))
+    results = [{"performance_id": performance_id,
+                "status": "not_found" if performance_id not in previous else "updated" if row else "unchanged"}
+               for performance_id, row in rows.items()]
+    return {"updated": len(updates), "results": results}
+
+@router.delete('/batch')
+async def delete_performances(batch: PerformanceBatchDelete, db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
+    """Supprime un lot de performances en une seule transaction.
+
+    Args:
+        batch (PerformanceBatchDelete): Identifiants des performances
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Utilisateur actuellement connecté
+
+    Returns:
+        dict: Dictionnaire contenant :
+            - deleted (int): Nombre de performances supprimées
+            - results (list[dict]): performance_id et status ("deleted" ou
+              "not_found"), dans l'ordre du lot
+
+    Raises:
+        HTTPException 401: Si l'utilisateur n'a pas les droits nécessaires (role coach ou admin,
+            athlètes affectés au coach)
+
+    Note:
+        Les suppressions sont faites par un seul executemany
+        (queries.delete_many) et les agrégats invalidés une seule fois.
+        Cette opération est irréversible.
+    """
+    role=current_user["role"]
+    if role not in ["coach", "admin"]:
+        raise HTTPException(status_code=401, detail="You are not allowed to perform this action")
+    ids = list(dict.fromkeys(batch.performance_ids))
+    previous = await db.run(_athletes_of, ids)
+    await ensure_athletes_access(list(previous.values()), db, current_user)
+    found = [performance_id for performance_id in ids if performance_id in previous]
+    await db.run(queries.delete_many, "performance", found)
+    if found:
+        await db.run(cache_bus.publish, ("summary.invalidate", list(set(previous.values()))),
+                     ("distribution.clear", None))
+    results = [{"performance_id": performance_id, "status": "deleted" if performance_id in previous else "not_found"}
+               for performance_id in ids]
+    return {"deleted": len(found), "results": results}
+
 @router.get('/performances')
-def get_performances(db: sqlite3.Connection = Depends(get_db), current_user=Depends(get_current_user)):
+async def get_performances(request: Request, shape: RowShape = shape_query, page: PageParams = Depends(),
+                           athlete_id: int | None = None,
+                           power_to_weight_min: float | None = None, power_to_weight_max: float | None = None,
+                           db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
     """Récupère les performances selon le rôle de l'utilisateur.
 
-    Pour les coachs et admins : récupère toutes les performances.
-    Pour les athlètes : récupère uniquement leurs propres performances.
+    Pour les admins : récupère toutes les performances, pour les coachs
+    celles des athlètes qui leur sont affectés, avec pagination, tri et
+    filtre par athlète côté serveur.
+    Pour les athlètes : récupère uniquement les performances de leur
+    profil, avec les mêmes pagination, tri et filtres.
 
     Args:
-        db (sqlite3.Connection): Connexion à la base de données
+        request (Request): Requête HTTP (négociation du format via Accept)
+        shape (str): Forme de la réponse ("records" ou "columns")
+        page (PageParams): Pagination et tri (limit, offset, sort, order)
+        athlete_id (int, optional): Filtre sur l'athlète
+        power_to_weight_min, power_to_weight_max (float, optional): Bornes
+            (incluses) du rapport PPO/poids, colonne dérivée indexée
+            (power_to_weight et vo2max_abs sont aussi utilisables comme tri)
+        db (DBExecutor): Exécuteur asynchrone de la base de données
         current_user (dict): Utilisateur actuellement connecté
 
     Returns:
-        list: Liste des performances selon les droits de l'utilisateur
-            - Toutes les performances pour les coachs/admins
-            - Performances personnelles pour les athlètes
+        Response: Liste des performances selon les droits de l'utilisateur,
+        en JSON, MessagePack ou Arrow selon l'en-tête Accept
+            - Performances visibles pour les coachs/admins, personnelles
+              pour les athlètes (en-tête X-Total-Count : nombre total de
+              lignes correspondant aux filtres)
+
+    Raises:
+        HTTPException 400: Si la colonne de tri n'existe pas
     """
-    cursor = db.cursor()
-    role=current_user["role"]
-    if role in ["coach", "admin"]:
-        cursor.execute("SELECT * FROM performance")
-        performances = cursor.fetchall()
-        return performances
+    if current_user["role"] in ["coach", "admin"]:
+        coach_id = coaching.coach_scope(current_user)
+        if coach_id is None:
+            listing, scope = ("performance.list", ()), None
+        else:
+            listing = ("performance.list_for_coach", (coach_id,))
+            scope = ("athlete_id", statement("coach_athlete.athlete_ids"), (coach_id,))
+    else:
+        listing = ("performance.list_for_user", (current_user["user_id"],))
+        scope = ("athlete_id", statement("athlete.ids_for_user"), (current_user["user_id"],))
+    if (page.limit is None and not (page.sort or athlete_id)
+            and power_to_weight_min is None and power_to_weight_max is None):
+        columns, rows = await db.fetch_all(statement(listing[0]), listing[1])
+        total = len(rows)
     else:
-        query = f"""
-            select * from performance p
-            inner join user u on p.athlete_id = u.user_id
-            where user_id = ?
-        """
-        cursor.execute(query, (current_user["user_id"],))
-        performances = cursor.fetchall()
-        return performances
\ No newline at end of file
+        try:
+            columns, rows, total = await db.run(
+                queries.select_page, "performance",
+                filters={"athlete_id": athlete_id}, ranges={"power_to_weight": (power_to_weight_min, power_to_weight_max)},
+                scope=scope, **page.as_kwargs())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+    return negotiated_response(request, columns, rows, shape, headers={"X-Total-Count": str(total)})
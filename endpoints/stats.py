@@ -1,20 +1,38 @@
 # Description: This file contains the endpoints for the stats of the athletes
-from fastapi import APIRouter,Depends, HTTPException
-from database import get_db
-from utils import get_current_user
-import sqlite3
+import json
+import time
+from fastapi import APIRouter,Depends, HTTPException, Query, Request
+import analytics
+from analytics import get_analytics_db
+from database import DBExecutor, get_async_db
+from utils import ensure_athletes_access, get_current_user
+import coaching
+from serialization import PageParams, RowShape, negotiated_response, shape_query
+from aggregates import comparison_cache, distribution_cache, summary_cache
+from coherence import cache_bus
+from statements import STATS_METRICS, statement
 
 router=APIRouter(prefix="/stats")
 
+async def _best(name: str, db: DBExecutor, analytics_db: DBExecutor, current_user: dict):
+    """Exécute la requête de maximum "stats.<name>" sur les athlètes visibles par l'utilisateur."""
+    visible = await db.run(coaching.visible_athletes, current_user)
+    if visible is None:
+        return await analytics_db.fetch_one(statement(f"stats.{name}"))
+    return await analytics_db.fetch_one(statement(f"stats.{name}_for_athletes"), (json.dumps(visible),))
+
 @router.get('/vo2max')
-def vo2max(db: sqlite3.Connection = Depends(get_db)):
+async def vo2max(db: DBExecutor = Depends(get_async_db), analytics_db: DBExecutor = Depends(get_analytics_db),
+                 current_user=Depends(get_current_user)):
     """Récupère l'athlète ayant la plus haute consommation maximale d'oxygène (VO2max).
 
     Cette fonction permet d'identifier l'athlète ayant la meilleure capacité aérobie
     parmi tous les athlètes enregistrés dans la base de données.
 
     Args:
-        db (sqlite3.Connection): Connexion à la base de données
+        db (DBExecutor): Exécuteur asynchrone de la base de données (athlètes visibles)
+        analytics_db (DBExecutor): Exécuteur des lectures analytiques (cf. analytics.py)
+        current_user (dict): Utilisateur actuellement connecté
 
     Returns:
         tuple: Un tuple contenant :
@@ -23,22 +41,25 @@ def vo2max(db: sqlite3.Connection = Depends(get_db)):
             - vo2max (float): La valeur maximale de VO2max enregistrée
 
     Note:
-        Les résultats sont groupés par athlète pour éviter les doublons
-        et seule la valeur maximale est retournée.
+        Le nom est obtenu par jointure avec la table athlete et seule
+        la ligne portant la valeur maximale est retournée. Le maximum est
+        pris parmi les athlètes visibles par l'utilisateur (ceux d'un coach,
+        ses propres profils pour un athlète, tous pour un admin).
     """
-    cursor = db.cursor()
-    cursor.execute("SELECT athlete_id, name, MAX(vo2max) FROM performance group by athlete_id,name")
-    return cursor.fetchone()
+    return await _best("vo2max", db, analytics_db, current_user)
 
 @router.get('/ppo')
-def ppo(db: sqlite3.Connection = Depends(get_db)):
+async def ppo(db: DBExecutor = Depends(get_async_db), analytics_db: DBExecutor = Depends(get_analytics_db),
+              current_user=Depends(get_current_user)):
     """Récupère l'athlète ayant la plus haute puissance maximale (PPO - Peak Power Output).
 
     Cette fonction permet d'identifier l'athlète le plus puissant en termes
     de puissance maximale développée.
 
     Args:
-        db (sqlite3.Connection): Connexion à la base de données
+        db (DBExecutor): Exécuteur asynchrone de la base de données (athlètes visibles)
+        analytics_db (DBExecutor): Exécuteur des lectures analytiques (cf. analytics.py)
+        current_user (dict): Utilisateur actuellement connecté
 
     Returns:
         tuple: Un tuple contenant :
@@ -47,15 +68,16 @@ def ppo(db: sqlite3.Connection = Depends(get_db)):
             - ppo (float): La valeur maximale de PPO enregistrée
 
     Note:
-        Les résultats sont groupés par athlète pour éviter les doublons
-        et seule la valeur maximale est retournée.
+        Le nom est obtenu par jointure avec la table athlete et seule
+        la ligne portant la valeur maximale est retournée. Le maximum est
+        pris parmi les athlètes visibles par l'utilisateur (ceux d'un coach,
+        ses propres profils pour un athlète, tous pour un admin).
     """
-    cursor = db.cursor()
-    cursor.execute("SELECT athlete_id, name, MAX(ppo) FROM performance group by athlete_id,name")
-    return cursor.fetchone()
+    return await _best("ppo", db, analytics_db, current_user)
 
 @router.get('/weightpower')
-def weightpower(db: sqlite3.Connection = Depends(get_db)):
+async def weightpower(db: DBExecutor = Depends(get_async_db), analytics_db: DBExecutor = Depends(get_analytics_db),
+                      current_user=Depends(get_current_user)):
     """Récupère l'athlète ayant le meilleur rapport puissance/poids.
 
     Cette fonction permet d'identifier l'athlète ayant le meilleur ratio
@@ -63,7 +85,9 @@ def weightpower(db: sqlite3.Connection = Depends(get_db)):
     important de performance relative.
 
     Args:
-        db (sqlite3.Connection): Connexion à la base de données
+        db (DBExecutor): Exécuteur asynchrone de la base de données (athlètes visibles)
+        analytics_db (DBExecutor): Exécuteur des lectures analytiques (cf. analytics.py)
+        current_user (dict): Utilisateur actuellement connecté
 
     Returns:
         tuple: Un tuple contenant :
@@ -72,11 +96,299 @@ def weightpower(db: sqlite3.Connection = Depends(get_db)):
             - power_to_weight (float): Le meilleur ratio puissance/poids calculé
 
     Note:
-        Les résultats sont groupés par athlète pour éviter les doublons
-        et seule la valeur maximale est retournée.
+        Le nom est obtenu par jointure avec la table athlete et seule
+        la ligne portant la valeur maximale est retournée. Le maximum est
+        pris parmi les athlètes visibles par l'utilisateur (ceux d'un coach,
+        ses propres profils pour un athlète, tous pour un admin).
         Ce ratio est particulièrement pertinent pour comparer des athlètes
         de différentes catégories de poids.
     """
-    cursor = db.cursor()
-    cursor.execute("SELECT athlete_id, name, MAX(ppo/weight) FROM performance group by athlete_id,name")
-    return cursor.fetchone()
\ No newline at end of file
+    return await _best("weightpower", db, analytics_db, current_user)
+
+@router.get('/statements')
+async def statements_stats(db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
+    """Retourne les compteurs du cache de requêtes préparées du pool SQLite.
+
+    Args:
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Utilisateur actuellement connecté
+
+    Returns:
+        dict: Dictionnaire contenant :
+            - cached_statements (int): Taille du cache par connexion
+            - parses (int): Requêtes préparées hors préchauffage
+            - reuses (int): Requêtes servies depuis le cache
+            - reuse_rate (float): Part des exécutions servies depuis le cache
+            - connections (list): Détail par connexion
+
+    Raises:
+        HTTPException 401: Si l'utilisateur n'est pas administrateur
+    """
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=401, detail="You are not allowed to perform this action")
+    return db.statement_stats()
+
+@router.get('/analytics')
+async def analytics_status(current_user=Depends(get_current_user)):
+    """Retourne le chemin de lecture des requêtes analytiques (ANALYTICS_READ_MODE).
+
+    Args:
+        current_user (dict): Utilisateur actuellement connecté
+
+    Returns:
+        dict: Dictionnaire contenant :
+            - mode (str): primary, wal ou snapshot
+            - workers (int | None): Threads de l'exécuteur analytique dédié
+            - path, refreshed_at, duration_ms, interval_s: Copie lue et
+              dernier rafraîchissement (mode snapshot)
+
+    Raises:
+        HTTPException 401: Si l'utilisateur n'est pas administrateur
+    """
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=401, detail="You are not allowed to perform this action")
+    return analytics.status()
+
+def _exact_histogram(conn, metric: str, bins: int, athlete_ids: list[int] | None = None) -> dict:
+    """Calcule l'histogramme exact d'une métrique en deux requêtes agrégées.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        metric (str): Colonne de la table performance
+        bins (int): Nombre de classes
+        athlete_ids (list[int], optional): Restreint l'histogramme à ces
+            athlètes. Par défaut, toutes les performances.
+
+    Returns:
+        dict: Bornes des classes (edges, bins + 1 valeurs) et effectifs (counts)
+    """
+    if athlete_ids is None:
+        scope, scope_params = "", ()
+    else:
+        scope, scope_params = "_for_athletes", (json.dumps(athlete_ids),)
+    low, high, count = conn.execute(statement(f"stats.range{scope}.{metric}"), scope_params).fetchone()
+    if not count:
+        return {"metric": metric, "count": 0, "exact": True, "edges": [], "counts": []}
+    width = (high - low) / bins or 1.0
+    counts = [0] * bins
+    for bucket, bucket_count in conn.execute(statement(f"stats.histogram{scope}.{metric}"),
+                                             (low, width, bins - 1, *scope_params)):
+        counts[bucket] = bucket_count
+    return {"metric": metric, "count": count, "exact": True,
+            "edges": [low + width * i for i in range(bins + 1)], "counts": counts}
+
+@router.get('/summary')
+async def summary(request: Request, shape: RowShape = shape_query, page: PageParams = Depends(),
+                  athlete_id: list[int] | None = Query(None),
+                  db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
+    """Récupère les agrégats de chaque métrique de performance par athlète.
+
+    Args:
+        request (Request): Requête HTTP (négociation du format via Accept)
+        shape (str): Forme de la réponse ("records" ou "columns")
+        page (PageParams): Pagination et tri (limit, offset, sort, order)
+        athlete_id (list[int], optional): Restreint le résumé à ces athlètes
+            (paramètre répétable : ?athlete_id=1&athlete_id=2)
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Utilisateur actuellement connecté
+
+    Returns:
+        Response: Une ligne par athlète contenant :
+            - athlete_id (int): L'identifiant de l'athlète
+            - name (str): Le nom de l'athlète
+            - count (int): Le nombre de mesures
+            - <métrique>_min, <métrique>_mean, <métrique>_max (float): Pour
+              vo2max, hr_max, rf_max, cadence_max, ppo, p1, p2 et p3
+            - power_to_weight_min, power_to_weight_mean, power_to_weight_max
+              (float): Rapport PPO/poids
+        L'en-tête X-Total-Count contient le nombre de lignes avant pagination.
+
+    Raises:
+        HTTPException 400: Si la colonne de tri n'existe pas
+
+    Note:
+        Le résumé est servi depuis aggregates.summary_cache : seules les
+        lignes des athlètes modifiés depuis la dernière lecture sont
+        recalculées. Un coach ne reçoit que les lignes des athlètes qui lui
+        sont affectés, un athlète que celles de ses propres profils.
+    """
+    visible = await db.run(coaching.visible_athletes, current_user)
+    if visible is not None:
+        athlete_id = sorted(set(visible) & set(athlete_id)) if athlete_id else visible
+    try:
+        columns, rows, total = await db.run(summary_cache.select, athlete_ids=athlete_id, **page.as_kwargs())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return negotiated_response(request, columns, rows, shape, headers={"X-Total-Count": str(total)})
+
+# Nombre maximal d'athlètes d'une comparaison
+COMPARE_MAX_ATHLETES = 50
+
+@router.get('/compare')
+async def compare(athletes: str = Query(..., description="Identifiants séparés par des virgules (ex: 1,2,3)"),
+                  db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
+    """Compare côte à côte plusieurs athlètes et les situe dans l'équipe (z-scores).
+
+    Args:
+        athletes (str): Identifiants des athlètes séparés par des virgules
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Utilisateur actuellement connecté
+
+    Returns:
+        dict: Dictionnaire contenant :
+            - metrics (list[str]): ppo_best, ppo_mean, vo2max, hr_max,
+              power_to_weight, p1, p2 et p3
+            - athletes (list[dict]): athlete_id, name, count, valeur de chaque
+              métrique et z_scores (écart à la moyenne de l'équipe, en écarts-types)
+            - squad (dict): Taille, moyenne et écart-type de l'équipe par métrique
+            - missing (list[int]): Athlètes demandés sans aucune performance
+
+    Raises:
+        HTTPException 400: Si la liste est vide, mal formée ou trop longue
+        HTTPException 401: Si l'utilisateur est un athlète, ou si un coach
+            demande un athlète qui ne lui est pas affecté
+
+    Note:
+        L'équipe de référence est l'ensemble des athlètes visibles par
+        l'utilisateur (ceux d'un coach, tous pour un administrateur). Le
+        calcul part du résumé par athlète (aggregates.summary_cache) et le
+        résultat est conservé par ensemble d'athlètes jusqu'à la prochaine
+        écriture.
+    """
+    if current_user["role"] not in ["coach", "admin"]:
+        raise HTTPException(status_code=401, detail="You are not allowed to perform this action")
+    try:
+        athlete_ids = list(dict.fromkeys(int(value) for value in athletes.split(",") if value.strip()))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail="athletes must be a comma-separated list of ids") from e
+    if not athlete_ids or len(athlete_ids) > COMPARE_MAX_ATHLETES:
+        raise HTTPException(status_code=400, detail=f"athletes must contain 1 to {COMPARE_MAX_ATHLETES} ids")
+    await ensure_athletes_access(athlete_ids, db, current_user)
+    coach_id = coaching.coach_scope(current_user)
+    squad_ids = await db.run(coaching.athlete_ids, coach_id) if coach_id is not None else None
+    return await db.run(comparison_cache.compare, athlete_ids, squad_ids)
+
+async def _visible_sketch(db: DBExecutor, metric: str, visible: list[int] | None):
+    """Sketch d'une métrique : partagé pour un admin, restreint aux athlètes visibles sinon."""
+    if visible is None:
+        return await db.run(distribution_cache.sketch, metric)
+    return await db.run(distribution_cache.scoped_sketch, metric, visible)
+
+def _check_metric(metric: str):
+    if metric not in STATS_METRICS:
+        raise HTTPException(status_code=400, detail=f"Unknown metric: {metric}")
+
+@router.get('/distribution')
+async def distribution(metric: str = "ppo", bins: int = Query(20, ge=1, le=200), exact: bool = False,
+                       db: DBExecutor = Depends(get_async_db), analytics_db: DBExecutor = Depends(get_analytics_db),
+                       current_user=Depends(get_current_user)):
+    """Récupère la distribution (histogramme) d'une métrique sur les performances visibles.
+
+    Args:
+        metric (str): Métrique (vo2max, hr_max, rf_max, cadence_max, ppo, p1, p2 ou p3)
+        bins (int): Nombre de classes (1 à 200)
+        exact (bool): Calcule l'histogramme exact en SQL (parcours de la table)
+            au lieu de l'estimer à partir du sketch de quantiles
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        analytics_db (DBExecutor): Exécuteur des lectures analytiques (calcul exact)
+        current_user (dict): Utilisateur actuellement connecté
+
+    Returns:
+        dict: Dictionnaire contenant :
+            - metric (str): La métrique demandée
+            - count (int): Le nombre de valeurs non nulles
+            - exact (bool): Indique si les effectifs sont exacts ou estimés
+            - edges (list[float]): Les bornes des classes (min et max exacts)
+            - counts (list[int]): L'effectif de chaque classe
+
+    Raises:
+        HTTPException 400: Si la métrique n'existe pas
+
+    Note:
+        Un admin lit la distribution de toutes les performances (sketch
+        partagé) ; un coach celle de ses athlètes et un athlète celle de ses
+        propres tests, à partir d'un sketch construit pour la requête.
+    """
+    _check_metric(metric)
+    visible = await db.run(coaching.visible_athletes, current_user)
+    if exact:
+        return await analytics_db.run(_exact_histogram, metric, bins, visible)
+    sketch = await _visible_sketch(db, metric, visible)
+    if not sketch.n:
+        return {"metric": metric, "count": 0, "exact": False, "edges": [], "counts": []}
+    width = (sketch.max - sketch.min) / bins or 1.0
+    edges = [sketch.min + width * i for i in range(bins + 1)]
+    return {"metric": metric, "count": sketch.n, "exact": False, "edges": edges, "counts": sketch.histogram(edges)}
+
+@router.get('/percentile')
+async def percentile(metric: str = "ppo", value: float | None = None, athlete_id: int | None = None,
+                     db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
+    """Situe une valeur, ou la meilleure valeur d'un athlète, dans la distribution d'une métrique.
+
+    Args:
+        metric (str): Métrique (vo2max, hr_max, rf_max, cadence_max, ppo, p1, p2 ou p3)
+        value (float, optional): Valeur à situer
+        athlete_id (int, optional): Athlète dont la meilleure valeur (max) est
+            située, lorsque value n'est pas fourni
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Utilisateur actuellement connecté
+
+    Returns:
+        dict: Dictionnaire contenant :
+            - metric (str): La métrique demandée
+            - value (float): La valeur située
+            - percentile (float): Part (en %) des performances inférieures ou égales
+            - count (int): Le nombre de valeurs de la distribution
+            - quantiles (dict): Les quantiles p10, p25, p50, p75 et p90
+
+    Raises:
+        HTTPException 400: Si la métrique n'existe pas ou si ni value ni athlete_id n'est fourni
+        HTTPException 401: Si l'athlète demandé n'est pas visible par
+            l'utilisateur (non affecté au coach, autre athlète)
+        HTTPException 404: Si l'athlète n'a aucune performance
+
+    Note:
+        Le rang est estimé à partir du sketch de quantiles : l'erreur est
+        bornée (environ 1 point de percentile) et le temps de réponse ne
+        dépend pas du nombre de performances. La distribution de référence
+        est celle des athlètes visibles par l'utilisateur (cf. distribution).
+    """
+    _check_metric(metric)
+    if value is None:
+        if athlete_id is None:
+            raise HTTPException(status_code=400, detail="value or athlete_id is required")
+        await ensure_athletes_access([athlete_id], db, current_user)
+        columns, rows, _ = await db.run(summary_cache.select, athlete_ids=[athlete_id])
+        if not rows:
+            raise HTTPException(status_code=404, detail="Athlete has no performance")
+        value = rows[0][columns.index(f"{metric}_max")]
+    sketch = await _visible_sketch(db, metric, await db.run(coaching.visible_athletes, current_user))
+    return {
+        "metric": metric,
+        "value": value,
+        "percentile": round(sketch.cdf(value) * 100, 2),
+        "count": sketch.n,
+        "quantiles": {f"p{q}": sketch.quantile(q / 100) for q in (10, 25, 50, 75, 90)},
+    }
+
+@router.post('/sketches/rebuild')
+async def rebuild_sketches(db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
+    """Reconstruit en masse les sketches de quantiles (après un import direct en base, par exemple).
+
+    Args:
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Utilisateur actuellement connecté
+
+    Returns:
+        dict: Nombre de performances lues et durée de la reconstruction (ms)
+
+    Raises:
+        HTTPException 401: Si l'utilisateur n'est pas administrateur
+    """
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=401, detail="You are not allowed to perform this action")
+    start = time.perf_counter()
+    # Les autres processus reconstruiront leurs sketches à leur prochaine lecture
+    await db.run(cache_bus.publish, ("distribution.clear", None))
+    rows = await db.run(distribution_cache.rebuild)
+    return {"rows": rows, "duration_ms": round((time.perf_counter() - start) * 1000, 1)}
@@ -0,0 +1,121 @@
+# Description: This file contains the training load endpoints (sessions, CTL/ATL/TSB series)
+from fastapi import APIRouter, Depends, HTTPException, Query
+from database import DBExecutor, get_async_db
+from utils import get_accessible_athlete, get_current_user
+from statements import statement
+from pydantic import BaseModel, Field
+from datetime import date
+
+router=APIRouter(prefix="/training")
+
+# Bornes utilisées lorsque la plage de jours est ouverte
+MIN_DAY = "0000-01-01"
+MAX_DAY = "9999-12-31"
+
+class TrainingSession(BaseModel):
+    """Schéma de données d'une séance d'entraînement.
+
+    Attributes:
+        athlete_id (int): Identifiant de l'athlète
+        day (date): Jour de la séance
+        power (list[float]): Échantillons de puissance (W), à intervalle régulier
+        sample_interval (float): Intervalle entre échantillons (s)
+        ftp (float, optional): FTP (W). Defaults to 75 % de la meilleure PPO de l'athlète.
+    """
+    athlete_id: int
+    day: date
+    power: list[float] = Field(min_length=1)
+    sample_interval: float = Field(1.0, gt=0)
+    ftp: float | None = Field(None, gt=0)
+
+@router.post('/sessions')
+async def create_session(session: TrainingSession, db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
+    """Enregistre une séance et met à jour la série CTL/ATL/TSB de l'athlète.
+
+    Args:
+        session (TrainingSession): Séance et échantillons de puissance
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Utilisateur actuellement connecté
+
+    Returns:
+        dict: Charge de la séance (NP, IF, TSS, FTP utilisée) et état
+        CTL/ATL/TSB du jour de la séance
+
+    Raises:
+        HTTPException 400: Si la FTP ne peut pas être estimée (aucune PPO enregistrée)
+        HTTPException 401: Si l'utilisateur n'a pas les droits nécessaires (rôle coach ou admin)
+        HTTPException 404: Si l'athlète n'existe pas
+    """
+    if current_user["role"] not in ["coach", "admin"]:
+        raise HTTPException(status_code=401, detail="You are not allowed to perform this action")
+    # Import différé : numpy n'est chargé qu'au premier calcul de charge
+    import training_load
+
+    await get_accessible_athlete(session.athlete_id, db, current_user)
+    try:
+        return await db.run(training_load.record_session, session.athlete_id, session.day,
+                            session.power, session.sample_interval, session.ftp)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+@router.get('/{athlete_id}/load')
+async def get_load(athlete_id: int,
+                   start: date | None = Query(None, alias="from"),
+                   end: date | None = Query(None, alias="to"),
+                   db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
+    """Récupère la série quotidienne TSS/CTL/ATL/TSB d'un athlète.
+
+    Args:
+        athlete_id (int): Identifiant de l'athlète
+        start (date, optional): Premier jour, inclus (paramètre "from")
+        end (date, optional): Dernier jour, inclus (paramètre "to")
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Utilisateur actuellement connecté
+
+    Returns:
+        dict: Dictionnaire contenant :
+            - athlete_id (int): L'identifiant de l'athlète
+            - current (dict | None): Le dernier jour connu (day, tss, ctl, atl, tsb)
+            - columns (list[str]): Les colonnes de la série
+            - data (list[list]): Une ligne par jour de la plage
+
+    Raises:
+        HTTPException 401: Si un athlète demande les données d'un autre athlète
+        HTTPException 404: Si l'athlète n'existe pas
+
+    Note:
+        La série est lue telle qu'enregistrée (parcours de clé primaire) :
+        aucun recalcul n'est fait à la lecture.
+    """
+    await get_accessible_athlete(athlete_id, db, current_user)
+    current = await db.fetch_one(statement("training.latest"), (athlete_id,))
+    columns, rows = await db.fetch_all(statement("training.range"), (
+        athlete_id, start.isoformat() if start else MIN_DAY, end.isoformat() if end else MAX_DAY))
+    return {"athlete_id": athlete_id, "current": dict(current) if current else None,
+            "columns": columns, "data": rows}
+
+@router.get('/{athlete_id}/sessions')
+async def get_sessions(athlete_id: int,
+                       start: date | None = Query(None, alias="from"),
+                       end: date | None = Query(None, alias="to"),
+                       db: DBExecutor = Depends(get_async_db), current_user=Depends(get_current_user)):
+    """Récupère les séances d'un athlète et leur charge.
+
+    Args:
+        athlete_id (int): Identifiant de l'athlète
+        start (date, optional): Premier jour, inclus (paramètre "from")
+        end (date, optional): Dernier jour, inclus (paramètre "to")
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Utilisateur actuellement connecté
+
+    Returns:
+        list[dict]: Séances triées par date (durée, puissances, IF, TSS, FTP)
+
+    Raises:
+        HTTPException 401: Si un athlète demande les données d'un autre athlète
+        HTTPException 404: Si l'athlète n'existe pas
+    """
+    await get_accessible_athlete(athlete_id, db, current_user)
+    columns, rows = await db.fetch_all(statement("training.sessions"), (
+        athlete_id, start.isoformat() if start else MIN_DAY, end.isoformat() if end else MAX_DAY))
+    return [dict(zip(columns, row)) for row in rows]
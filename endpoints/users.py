@@ -1,9 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlite3 import Connection
+from fastapi import APIRouter, Depends, HTTPException, status, Response, Request, UploadFile, File, Form
+from starlette.concurrency import run_in_threadpool
 from utils import create_access_token, authenticate, get_current_user, bcrypt_context
-from schemas import CreateUserRequest
-from database import get_db
+from schemas import CreateUserRequest, RefreshRequest, RosterRequest
+from database import DBExecutor, get_async_db
+from serialization import RowShape, negotiated_response, shape_query
+import queries
+import coaching
+import onboarding
+import refresh_tokens
+from statements import statement
+from throttling import account_failures, ip_failures, login_retry_after
+import json
+import math
 import os
+import time
 from dotenv import load_dotenv
 import sqlite3
 from fastapi.security import OAuth2PasswordRequestForm
@@ -13,47 +23,126 @@ load_dotenv()
 router = APIRouter(prefix="/user")
 
 @router.post("/auth")
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Connection = Depends(get_db)):
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: DBExecutor = Depends(get_async_db)):
     """Authentifie un utilisateur et génère un token d'accès.
 
     Args:
+        request (Request): Requête HTTP (adresse du client, pour la limitation)
         form_data (OAuth2PasswordRequestForm): Formulaire contenant les identifiants de connexion
             - username: Email de l'utilisateur
             - password: Mot de passe de l'utilisateur
-        db (Connection): Connexion à la base de données
+        db (DBExecutor): Exécuteur asynchrone de la base de données
 
     Returns:
         dict: Dictionnaire contenant :
             - access_token (str): Token JWT d'authentification
+            - refresh_token (str): Jeton de renouvellement (cf. /user/refresh)
             - token_type (str): Type de token (bearer)
 
     Raises:
         HTTPException 401: Si les identifiants sont incorrects
+        HTTPException 429: Si le compte ou l'adresse a cumulé trop d'échecs
+            (en-tête Retry-After), avant toute vérification du mot de passe
         HTTPException 500: En cas d'erreur serveur
     """
     try:
+        email = form_data.username.lower()
+        ip = request.client.host if request.client else "unknown"
+        retry_after = login_retry_after(email, ip)
+        if retry_after > 0:
+            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                                detail="Trop de tentatives de connexion, réessayez plus tard",
+                                headers={"Retry-After": str(math.ceil(retry_after))})
+
         user = await authenticate(form_data.username, form_data.password, db)
         if not user:
+            account_failures.hit(email)
+            ip_failures.hit(ip)
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Identifiants incorrects")
+        account_failures.reset(email)
 
         token_data = {"sub": user["email"]}
         access_token = create_access_token(token_data)
+        refresh_token = await db.run(refresh_tokens.issue, user["user_id"])
 
         return {
             "access_token": access_token,
+            "refresh_token": refresh_token,
+            "token_type": "bearer"
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
+
+@router.post("/refresh")
+async def refresh(refresh_request: RefreshRequest, db: DBExecutor = Depends(get_async_db)):
+    """Échange un jeton de renouvellement contre un nouveau token d'accès.
+
+    Le jeton présenté est consommé et remplacé (rotation) ; aucun mot de
+    passe n'est vérifié.
+
+    Args:
+        refresh_request (RefreshRequest): Jeton de renouvellement
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+
+    Returns:
+        dict: Dictionnaire contenant :
+            - access_token (str): Nouveau token JWT d'authentification
+            - refresh_token (str): Nouveau jeton de renouvellement
+            - token_type (str): Type de token (bearer)
+
+    Raises:
+        HTTPException 401: Si le jeton est inconnu, expiré ou révoqué (un jeton
+            déjà utilisé révoque aussi tous les jetons de la même connexion)
+        HTTPException 500: En cas d'erreur serveur
+    """
+    try:
+        rotated = await db.run(refresh_tokens.rotate, refresh_request.refresh_token)
+        if rotated is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Jeton de renouvellement invalide")
+
+        email, refresh_token = rotated
+        return {
+            "access_token": create_access_token({"sub": email}),
+            "refresh_token": refresh_token,
             "token_type": "bearer"
         }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(refresh_request: RefreshRequest, db: DBExecutor = Depends(get_async_db)):
+    """Révoque le jeton de renouvellement d'une connexion et ceux qui en sont issus.
+
+    Le token d'accès en cours reste valide jusqu'à son expiration
+    (ACCESS_TOKEN_EXPIRE_MINUTES).
+
+    Args:
+        refresh_request (RefreshRequest): Jeton de renouvellement
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+
+    Raises:
+        HTTPException 500: En cas d'erreur serveur
+    """
+    try:
+        await db.run(refresh_tokens.revoke, refresh_request.refresh_token)
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
 
 @router.get("/users")
-async def get_users(db: Connection = Depends(get_db), current_user: dict = Depends(get_current_user)):
+async def get_users(request: Request, shape: RowShape = shape_query, db: DBExecutor = Depends(get_async_db), current_user: dict = Depends(get_current_user)):
     """Récupère la liste de tous les utilisateurs.
 
     Cette route est accessible uniquement aux administrateurs et aux coachs.
 
     Args:
-        db (Connection): Connexion à la base de données
+        request (Request): Requête HTTP (négociation du format via Accept)
+        shape (str): Forme de la réponse ("records" ou "columns")
+        db (DBExecutor): Exécuteur asynchrone de la base de données
         current_user (dict): Utilisateur actuellement connecté
 
     Returns:
@@ -74,18 +163,14 @@ async def get_users(db: Connection = Depends(get_db), current_user: dict = Depen
                 detail="Accès refusé"
             )
 
-        cursor = db.cursor()
-        cursor.execute("SELECT user_id, name, email, role FROM user")
-        users = cursor.fetchall()
-        cursor.close()
-
-        return {"users": users}
+        columns, rows = await db.fetch_all(statement("user.list"))
+        return negotiated_response(request, columns, rows, shape, key="users")
 
     except sqlite3.Error as e:
         raise HTTPException(status_code=500, detail=f"Erreur base de données: {str(e)}")
 
 @router.post("/create_athlete")
-async def create_athlete(create_user_request: CreateUserRequest, db: Connection = Depends(get_db), current_user: dict = Depends(get_current_user)):
+async def create_athlete(create_user_request: CreateUserRequest, db: DBExecutor = Depends(get_async_db), current_user: dict = Depends(get_current_user)):
     """Crée un nouveau compte athlète.
 
     Cette route est accessible uniquement aux coachs.
@@ -97,7 +182,7 @@ async def create_athlete(create_user_request: CreateUserRequest, db: Connection
             - password: Mot de passe
             - password_confirmation: Confirmation du mot de passe
             - role: Rôle (doit être "athlete")
-        db (Connection): Connexion à la base de données
+        db (DBExecutor): Exécuteur asynchrone de la base de données
         current_user (dict): Utilisateur actuellement connecté
 
     Returns:
@@ -108,41 +193,38 @@ async def create_athlete(create_user_request: CreateUserRequest, db: Connection
         HTTPException 403: Si l'utilisateur n'est pas un coach
         HTTPException 500: En cas d'erreur serveur
     """
-    cursor = db.cursor()
     try:
         if create_user_request.password != create_user_request.password_confirmation:
             raise HTTPException(status_code=400, detail="Les mots de passe ne correspondent pas")
 
-        if current_user.role == "coach" :
-            cursor.execute(
-                "SELECT email FROM user WHERE email = ?",
-                (create_user_request.email,))
-            if cursor.fetchone():
+        if current_user["role"] == "coach" :
+            if await db.fetch_one(statement("user.email_exists"), (create_user_request.email,)):
                 raise HTTPException(status_code=400, detail="Email déjà utilisé")
 
-            hashed_password = bcrypt_context.hash(create_user_request.password)
+            hashed_password = await run_in_threadpool(bcrypt_context.hash, create_user_request.password)
 
-            cursor.execute(
-                """INSERT INTO user (name, email, password, role)
-                VALUES (?, ?, ?, ?)""",
-                (create_user_request.name, create_user_request.email, hashed_password, create_user_request.role))
-            db.commit()
+            await db.run(queries.insert_data, "user", {
+                "name": create_user_request.name,
+                "email": create_user_request.email,
+                "password": hashed_password,
+                "role": create_user_request.role,
+            })
 
             return {"message": "Utilisateur créé avec succès"}
         else:
             raise HTTPException(status.HTTP_403_FORBIDDEN, detail="accès refusé")
 
+    except HTTPException:
+        raise
+
     except sqlite3.IntegrityError as e:
         raise HTTPException(status_code=400, detail=f"Erreur d'intégrité: {str(e)}")
 
     except Exception as e:
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
-    finally:
-        cursor.close()
 
 @router.post("/create_coach")
-async def create_coach(create_user_request: CreateUserRequest, db: Connection = Depends(get_db), current_user: dict = Depends(get_current_user)):
+async def create_coach(create_user_request: CreateUserRequest, db: DBExecutor = Depends(get_async_db), current_user: dict = Depends(get_current_user)):
     """Crée un nouveau compte coach.
 
     Cette route est accessible uniquement aux administrateurs.
@@ -154,7 +236,7 @@ async def create_coach(create_user_request: CreateUserRequest, db: Connection =
             - password: Mot de passe
             - password_confirmation: Confirmation du mot de passe
             - role: Rôle (doit être "coach")
-        db (Connection): Connexion à la base de données
+        db (DBExecutor): Exécuteur asynchrone de la base de données
         current_user (dict): Utilisateur actuellement connecté
 
     Returns:
@@ -165,35 +247,148 @@ async def create_coach(create_user_request: CreateUserRequest, db: Connection =
         HTTPException 403: Si l'utilisateur n'est pas un administrateur
         HTTPException 500: En cas d'erreur serveur
     """
-    cursor = db.cursor()
     try:
         if create_user_request.password != create_user_request.password_confirmation:
             raise HTTPException(status_code=400, detail="Les mots de passe ne correspondent pas")
 
-        if current_user.role == "admin" and create_user_request.role == "coach" :
-            cursor.execute(
-                "SELECT email FROM user WHERE email = ?",
-                (create_user_request.email,))
-            if cursor.fetchone():
+        if current_user["role"] == "admin" and create_user_request.role == "coach" :
+            if await db.fetch_one(statement("user.email_exists"), (create_user_request.email,)):
                 raise HTTPException(status_code=400, detail="Email déjà utilisé")
 
-            hashed_password = bcrypt_context.hash(create_user_request.password)
+            hashed_password = await run_in_threadpool(bcrypt_context.hash, create_user_request.password)
 
-            cursor.execute(
-                """INSERT INTO user (name, email, password, role)
-                VALUES (?, ?, ?, ?)""",
-                (create_user_request.name, create_user_request.email, hashed_password, create_user_request.role))
-            db.commit()
+            await db.run(queries.insert_data, "user", {
+                "name": create_user_request.name,
+                "email": create_user_request.email,
+                "password": hashed_password,
+                "role": create_user_request.role,
+            })
 
             return {"message": "Utilisateur créé avec succès"}
         else:
             raise HTTPException(status.HTTP_403_FORBIDDEN, detail="accès refusé")
 
+    except HTTPException:
+        raise
+
+    except sqlite3.IntegrityError as e:
+        raise HTTPException(status_code=400, detail=f"Erreur d'intégrité: {str(e)}")
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
+
+async def run_onboarding(db: DBExecutor, entries: list[dict], defaults: dict, coach_id: int | None = None) -> dict:
+    """Inscrit une liste d'athlètes sans bloquer la boucle d'événements.
+
+    La vérification des emails et l'écriture passent par l'exécuteur SQLite ;
+    le hachage (coûteux en CPU) est réparti sur plusieurs processus depuis
+    un thread du pool, sans occuper de connexion à la base.
+
+    Args:
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        entries (list[dict]): Entrées brutes de la liste
+        defaults (dict): Valeurs par défaut des champs absents
+        coach_id (int, optional): Coach auquel affecter les athlètes créés
+
+    Returns:
+        dict: Rapport d'inscription (cf. onboarding.onboard)
+    """
+    durations = {}
+    start = time.perf_counter()
+    athletes, rejected = onboarding.validate_roster(entries, defaults)
+    athletes = await db.run(onboarding.check_emails, athletes, rejected)
+    durations["check"] = round((time.perf_counter() - start) * 1000, 1)
+    start = time.perf_counter()
+    hashes, generated = await run_in_threadpool(onboarding.hash_roster, athletes)
+    durations["hash"] = round((time.perf_counter() - start) * 1000, 1)
+    start = time.perf_counter()
+    created = await db.run(onboarding.create_accounts, athletes, hashes, generated, coach_id)
+    durations["write"] = round((time.perf_counter() - start) * 1000, 1)
+    return {"created": len(created), "athletes": created, "rejected": rejected, "durations_ms": durations}
+
+@router.post("/onboard", status_code=status.HTTP_201_CREATED)
+async def onboard_athletes(roster: RosterRequest, db: DBExecutor = Depends(get_async_db), current_user: dict = Depends(get_current_user)):
+    """Inscrit en une fois une liste d'athlètes (comptes et profils).
+
+    Cette route est accessible uniquement aux administrateurs et aux coachs.
+    Les athlètes inscrits par un coach lui sont affectés.
+
+    Args:
+        roster (RosterRequest): Liste d'inscription
+            - athletes: Entrées (name, email, password, gender, age, weight, height)
+            - defaults: Valeurs par défaut des champs absents
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Utilisateur actuellement connecté
+
+    Returns:
+        dict: Dictionnaire contenant :
+            - created (int): Nombre d'athlètes créés
+            - athletes (list[dict]): email, user_id, athlete_id et, s'il a
+              été généré, temporary_password de chaque athlète créé
+            - rejected (dict[str, str]): Entrées écartées et raison
+            - durations_ms (dict[str, float]): Durées par étape
+
+    Raises:
+        HTTPException 400: Si un email a été pris pendant l'inscription (aucun compte créé)
+        HTTPException 403: Si l'utilisateur n'est ni coach ni administrateur
+        HTTPException 500: En cas d'erreur serveur
+    """
+    try:
+        if current_user["role"] not in ("admin", "coach"):
+            raise HTTPException(status.HTTP_403_FORBIDDEN, detail="accès refusé")
+
+        return await run_onboarding(db, roster.athletes, roster.defaults, coaching.coach_scope(current_user))
+
+    except HTTPException:
+        raise
+
+    except sqlite3.IntegrityError as e:
+        raise HTTPException(status_code=400, detail=f"Erreur d'intégrité: {str(e)}")
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
+
+@router.post("/onboard/upload", status_code=status.HTTP_201_CREATED)
+async def onboard_athletes_upload(file: UploadFile = File(...), defaults: str = Form("{}"), db: DBExecutor = Depends(get_async_db), current_user: dict = Depends(get_current_user)):
+    """Inscrit la liste d'athlètes d'un fichier CSV ou JSON téléversé.
+
+    Cette route est accessible uniquement aux administrateurs et aux coachs.
+
+    Args:
+        file (UploadFile): Fichier .csv (en-tête : name, email, password,
+            gender, age, weight, height) ou .json
+        defaults (str): Valeurs par défaut des champs absents, en JSON
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Utilisateur actuellement connecté
+
+    Returns:
+        dict: Rapport d'inscription (cf. onboard_athletes)
+
+    Raises:
+        HTTPException 400: Si le fichier ou les valeurs par défaut sont illisibles,
+            ou si un email a été pris pendant l'inscription
+        HTTPException 403: Si l'utilisateur n'est ni coach ni administrateur
+        HTTPException 500: En cas d'erreur serveur
+    """
+    try:
+        if current_user["role"] not in ("admin", "coach"):
+            raise HTTPException(status.HTTP_403_FORBIDDEN, detail="accès refusé")
+
+        try:
+            entries = onboarding.read_roster(await file.read(), file.filename)
+            defaults_values = json.loads(defaults)
+        except (ValueError, UnicodeDecodeError, KeyError) as e:
+            raise HTTPException(status_code=400, detail=f"Liste illisible: {str(e)}")
+        if not isinstance(defaults_values, dict):
+            raise HTTPException(status_code=400, detail="Les valeurs par défaut doivent être un objet JSON")
+
+        return await run_onboarding(db, entries, defaults_values, coaching.coach_scope(current_user))
+
+    except HTTPException:
+        raise
+
     except sqlite3.IntegrityError as e:
         raise HTTPException(status_code=400, detail=f"Erreur d'intégrité: {str(e)}")
 
     except Exception as e:
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
-    finally:
-        cursor.close()
\ No newline at end of file
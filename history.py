@@ -0,0 +1,109 @@
+"""
+Historique daté des performances d'un athlète.
+
+Les tests d'une plage [start, end] sont lus par un parcours de plage sur
+l'index (athlete_id, tested_at) : le coût dépend du nombre de tests de la
+fenêtre, pas de l'historique complet. Les moyennes glissantes et les
+pentes de tendance sont calculées côté serveur sur ces seules lignes
+(plus les window - 1 tests précédant la plage, pour amorcer les moyennes).
+
+Les performances sans date (tested_at NULL, antérieures à l'ajout de la
+colonne) n'apparaissent pas dans l'historique.
+"""
+
+import sqlite3
+from collections import deque
+from datetime import datetime
+
+from queries import DATETIME_FORMAT
+from statements import STATS_METRICS, statement
+
+# Bornes utilisées lorsque la plage est ouverte (comparaison de textes ISO 8601)
+MIN_DATETIME = "0000-01-01T00:00:00Z"
+MAX_DATETIME = "9999-12-31T23:59:59Z"
+
+def rolling_mean(values: list[float | None], window: int) -> list[float | None]:
+    """Moyenne glissante sur les window dernières valeurs non nulles.
+
+    Args:
+        values (list[float | None]): Valeurs dans l'ordre chronologique
+        window (int): Nombre de tests de la fenêtre
+
+    Returns:
+        list[float | None]: Une moyenne par valeur (None tant qu'aucune valeur n'est connue)
+    """
+    means, recent, total = [], deque(), 0.0
+    for value in values:
+        if value is not None:
+            recent.append(value)
+            total += value
+            if len(recent) > window:
+                total -= recent.popleft()
+        means.append(total / len(recent) if recent else None)
+    return means
+
+def trend_slope(days: list[float], values: list[float | None]) -> float | None:
+    """Pente de la droite des moindres carrés (unités de la métrique par jour).
+
+    Args:
+        days (list[float]): Abscisses en jours
+        values (list[float | None]): Valeurs de la métrique (les None sont ignorées)
+
+    Returns:
+        float | None: Pente, None s'il y a moins de deux dates distinctes
+    """
+    points = [(day, value) for day, value in zip(days, values) if value is not None]
+    if len({day for day, _ in points}) < 2:
+        return None
+    mean_day = sum(day for day, _ in points) / len(points)
+    mean_value = sum(value for _, value in points) / len(points)
+    covariance = sum((day - mean_day) * (value - mean_value) for day, value in points)
+    variance = sum((day - mean_day) ** 2 for day, _ in points)
+    return covariance / variance
+
+def build_history(conn: sqlite3.Connection, athlete_id: int, start: str | None = None,
+                  end: str | None = None, window: int = 3) -> dict:
+    """Construit l'historique d'un athlète sur une plage de dates.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        athlete_id (int): Identifiant de l'athlète
+        start (str, optional): Borne basse incluse (format DATETIME_FORMAT)
+        end (str, optional): Borne haute incluse (format DATETIME_FORMAT)
+        window (int, optional): Nombre de tests des moyennes glissantes. Defaults to 3.
+
+    Returns:
+        dict: Dictionnaire contenant :
+            - athlete_id (int): L'identifiant de l'athlète
+            - from, to (str | None): La plage demandée
+            - window (int): La taille des moyennes glissantes
+            - count (int): Le nombre de tests de la plage
+            - tests (list[dict]): Les tests, chacun avec ses métriques et
+              leurs moyennes glissantes (<métrique>_rolling)
+            - trend (dict): Pente de chaque métrique sur la plage (par jour)
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    try:
+        cursor.execute(statement("performance.history"),
+                       (athlete_id, start or MIN_DATETIME, end or MAX_DATETIME))
+        columns = [description[0] for description in cursor.description]
+        rows = cursor.fetchall()
+        previous = []
+        if rows and window > 1:
+            cursor.execute(statement("performance.history_before"), (athlete_id, rows[0][1], window - 1))
+            previous = cursor.fetchall()[::-1]
+    finally:
+        cursor.close()
+
+    tests = [dict(zip(columns, row)) for row in rows]
+    origin = datetime.strptime(rows[0][1], DATETIME_FORMAT) if rows else None
+    days = [(datetime.strptime(row[1], DATETIME_FORMAT) - origin).total_seconds() / 86400 for row in rows]
+    trend = {}
+    for index, metric in enumerate(STATS_METRICS, start=2):
+        history = [row[index] for row in previous] + [row[index] for row in rows]
+        for test, mean in zip(tests, rolling_mean(history, window)[len(previous):]):
+            test[f"{metric}_rolling"] = mean
+        trend[metric] = trend_slope(days, [row[index] for row in rows])
+    return {"athlete_id": athlete_id, "from": start, "to": end, "window": window,
+            "count": len(tests), "tests": tests, "trend": trend}
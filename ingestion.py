@@ -0,0 +1,185 @@
+"""
+Ingestion des métadonnées d'essais (data_int/*.json) dans la table performance.
+
+Chaque fichier décrit un sujet et ses maxima mesurés :
+    {"name": "sbj_1", "power.max": 360.0, "hr.max": 192.0, "vo2.max": 4650.0,
+     "rf.max": 59.0, "cadence.max": 153, "vo2.class": [74, 88], ...}
+
+Correspondance avec la table performance :
+    - athlete_id : clé "athlete_id" du fichier, sinon athlète portant le nom "name"
+    - ppo, hr_max, rf_max, cadence_max : power.max, hr.max, rf.max, cadence.max
+    - vo2max : vo2.max en ml/min ramené au poids de l'athlète (ml/kg/min) ;
+      une valeur inférieure à 100 est considérée comme déjà relative
+    - p1, p2, p3 : clés "p1", "p2", "p3" (puissances mesurées, jamais estimées)
+    - tested_at : clé "tested_at" (ou "date") du fichier
+
+Un fichier sans date de test ou sans l'une des métriques obligatoires
+(dont p1, p2 et p3) est écarté, avec la raison dans le rapport ("skipped") :
+aucune valeur n'est inventée.
+
+Les fichiers CSV d'échantillons listés dans csv_trial_* (colonnes "input")
+et présents à côté du fichier JSON sont enregistrés comme séances
+d'entraînement du jour du test (training_load.record_session) : leur charge
+(NP, IF, TSS) alimente la série CTL/ATL/TSB de l'athlète.
+
+Un fichier dont l'athlète a déjà un test à la même date, en base ou plus
+tôt dans le même lot, est ignoré : relancer l'ingestion d'un même
+répertoire n'insère pas de doublons.
+
+Usage :
+    python ingestion.py [répertoire] [--db cycling.db]
+"""
+
+import argparse
+import json
+import sqlite3
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any
+
+import queries
+import training_load
+from queries import to_utc_iso
+from statements import statement
+
+# Répertoire des métadonnées d'essais
+DATA_DIR = Path(__file__).parent / "data_int"
+
+# Clé du fichier -> colonne de la table performance
+METRIC_KEYS = {
+    "power.max": "ppo",
+    "hr.max": "hr_max",
+    "rf.max": "rf_max",
+    "cadence.max": "cadence_max",
+}
+
+class IngestionError(ValueError):
+    """Fichier d'essai inexploitable (athlète inconnu, métrique manquante, ...)."""
+
+def parse_tested_at(metadata: dict[str, Any]) -> str:
+    """Lit la date du test dans les métadonnées (clé tested_at ou date).
+
+    Args:
+        metadata (dict): Contenu du fichier
+
+    Returns:
+        str: Date au format de stockage (queries.DATETIME_FORMAT)
+
+    Raises:
+        IngestionError: Si le fichier ne porte aucune date de test
+        ValueError: Si la date n'est pas au format ISO 8601
+    """
+    value = metadata.get("tested_at") or metadata.get("date")
+    if not value:
+        raise IngestionError("date de test absente (clé tested_at ou date)")
+    return to_utc_iso(datetime.fromisoformat(str(value).replace("Z", "+00:00")))
+
+def power_files(metadata: dict[str, Any], path: Path) -> list[Path]:
+    """Fichiers CSV d'échantillons listés par un essai et présents à côté de son fichier JSON."""
+    names = [name for key, value in metadata.items() if key.startswith("csv_trial_") for name in value]
+    return [path.parent / name for name in dict.fromkeys(names) if (path.parent / name).is_file()]
+
+def read_trial(conn: sqlite3.Connection, path: Path) -> tuple[dict[str, Any], list[Path]]:
+    """Convertit un fichier d'essai en ligne de la table performance.
+
+    Args:
+        conn (sqlite3.Connection): Connexion (recherche de l'athlète et de son poids)
+        path (Path): Chemin du fichier JSON
+
+    Returns:
+        tuple: Un tuple contenant :
+            - row (dict): Colonne -> valeur, prêt pour queries.insert_many
+            - power_files (list[Path]): Fichiers CSV d'échantillons disponibles
+
+    Raises:
+        IngestionError: Si l'athlète est introuvable, si la date ou une
+            métrique manque, ou si le poids de l'athlète est nul
+    """
+    metadata = json.loads(path.read_text())
+    if "athlete_id" in metadata:
+        athlete = conn.execute(statement("athlete.by_id"), (metadata["athlete_id"],)).fetchone()
+    else:
+        athlete = conn.execute(statement("athlete.by_name"), (metadata.get("name"),)).fetchone()
+    if athlete is None:
+        raise IngestionError(f"athlète introuvable ({metadata.get('athlete_id') or metadata.get('name')})")
+    athlete_id, weight = athlete["athlete_id"], athlete["weight"]
+
+    row: dict[str, Any] = {"athlete_id": athlete_id, "tested_at": parse_tested_at(metadata)}
+    for key, column in METRIC_KEYS.items():
+        row[column] = metadata.get(key)
+    for zone in ("p1", "p2", "p3"):
+        row[zone] = metadata.get(zone)
+    vo2 = metadata.get("vo2.max")
+    if vo2 is not None and vo2 >= 100 and not weight:
+        raise IngestionError("poids de l'athlète nul : VO2max relative incalculable")
+    row["vo2max"] = vo2 if vo2 is None or vo2 < 100 else round(vo2 / weight, 2)
+
+    missing = [column for column in ("vo2max", "hr_max", "cadence_max", "ppo", "p1", "p2", "p3") if row.get(column) is None]
+    if missing:
+        raise IngestionError(f"métriques manquantes : {', '.join(missing)}")
+    return row, power_files(metadata, path)
+
+def ingest_directory(conn: sqlite3.Connection, directory: str | Path = DATA_DIR, pattern: str = "*.json") -> dict[str, Any]:
+    """Ingère tous les fichiers d'essai d'un répertoire en une seule transaction.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        directory (str | Path, optional): Répertoire des fichiers. Defaults to DATA_DIR.
+        pattern (str, optional): Motif des fichiers. Defaults to "*.json".
+
+    Returns:
+        dict: Dictionnaire contenant :
+            - inserted (int): Nombre de performances insérées
+            - sessions (int): Nombre de séances d'entraînement enregistrées
+            - athlete_ids (list[int]): Athlètes ayant reçu au moins un test
+            - skipped (dict[str, str]): Fichier -> raison de l'exclusion
+    """
+    rows, sessions, skipped = [], [], {}
+    seen: set[tuple[int, str]] = set()
+    for path in sorted(Path(directory).glob(pattern)):
+        try:
+            row, files = read_trial(conn, path)
+        except (IngestionError, ValueError, KeyError, TypeError) as e:
+            skipped[path.name] = str(e)
+            continue
+        key = (row["athlete_id"], row["tested_at"])
+        if key in seen:
+            skipped[path.name] = "test en double dans le lot"
+            continue
+        if conn.execute(statement("performance.exists_at"), key).fetchone():
+            skipped[path.name] = "test déjà importé"
+            continue
+        seen.add(key)
+        rows.append(row)
+        sessions += [(row["athlete_id"], date.fromisoformat(row["tested_at"][:10]), file) for file in files]
+
+    # Performances puis séances (dont la FTP dépend des PPO importées), en une transaction
+    inserted = queries.insert_many(conn, "performance", rows, commit=False)
+    recorded = 0
+    for athlete_id, day, file in sessions:
+        try:
+            power, sample_interval = training_load.read_power_csv(file)
+            training_load.record_session(conn, athlete_id, day, power, sample_interval, commit=False)
+            recorded += 1
+        except (ValueError, OSError) as e:
+            skipped[file.name] = str(e)
+    conn.commit()
+    return {"inserted": inserted, "sessions": recorded,
+            "athlete_ids": sorted({row["athlete_id"] for row in rows}), "skipped": skipped}
+
+if __name__ == "__main__":
+    from database import DB_PATH, connect
+
+    parser = argparse.ArgumentParser(description="Ingestion des métadonnées d'essais dans la table performance")
+    parser.add_argument("directory", nargs="?", default=str(DATA_DIR), help="répertoire des fichiers JSON")
+    parser.add_argument("--db", default=DB_PATH, help="chemin de la base SQLite")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    try:
+        report = ingest_directory(conn, args.directory)
+    finally:
+        conn.close()
+    print(f"{report['inserted']} performance(s) et {report['sessions']} séance(s) importée(s)")
+    for name, reason in report["skipped"].items():
+        print(f"  ignoré {name} : {reason}")
@@ -0,0 +1,482 @@
+"""
+Tâches de fond : file SQLite (table job) et pool de workers.
+
+Les traitements coûteux (ingestion d'essais, retraitements, exports) ne
+s'exécutent plus dans une requête HTTP : la route /jobs insère une ligne
+dans la table job et répond immédiatement ; un worker la réserve, l'exécute
+et enregistre son résultat, que le client consulte ensuite (polling).
+
+Fonctionnement :
+    - réservation : une seule instruction UPDATE ... RETURNING passe la plus
+      ancienne tâche prête de queued à running ; SQLite sérialisant les
+      écritures, deux workers (threads ou processus) ne peuvent pas réserver
+      la même tâche
+    - concurrence : le nombre de threads borne le parallélisme d'un pool, et
+      JOB_CONCURRENCY le nombre de tâches d'un même type en cours, tous
+      workers confondus (ex: une seule ingestion à la fois)
+    - reprises : une tâche en erreur est remise en file après un délai
+      exponentiel (JOB_RETRY_DELAY x 2^(tentative - 1)) jusqu'à max_attempts,
+      puis passe à failed avec la dernière erreur
+    - annulation : une tâche en attente est annulée immédiatement ; une tâche
+      en cours s'arrête à son prochain point de contrôle (JobContext.check)
+    - mesures : dates de création, de début et de fin, nombre de tentatives
+      et durée d'exécution (ms) de chaque tâche
+    - planification : les types listés dans JOB_SCHEDULE sont ajoutés à la
+      file par les workers à intervalle régulier ; l'ajout est une seule
+      instruction INSERT ... WHERE NOT EXISTS, sans doublon entre workers
+
+Les workers utilisent leurs propres connexions, hors de l'exécuteur de
+l'API : un traitement long n'occupe aucun des threads qui servent les
+requêtes. Les modules de traitement (ingestion, training_load,
+parquet_export et numpy) ne sont importés qu'à la première tâche qui en a
+besoin. Le pool est démarré par l'API (JOB_WORKERS threads, 0 pour le
+désactiver) ou dans un processus séparé :
+
+    python jobs.py [--workers 2] [--db cycling.db]
+"""
+
+import argparse
+import csv
+import json
+import os
+import signal
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import coaching
+from aggregates import distribution_cache
+from coherence import cache_bus
+from database import connect
+from queries import to_utc_iso
+from serialization import encode_json
+from statements import STATEMENTS, statement
+
+# Nombre de threads du pool démarré par l'API (0 : tâches exécutées par un worker séparé)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+# Tâches d'un même type exécutées simultanément, tous workers confondus
+JOB_CONCURRENCY = os.getenv("JOB_CONCURRENCY", "ingestion=1,reprocessing=1,export=2,parquet_export=1")
+# Tâches planifiées : "type=intervalle (s),..." (ex: parquet_export=86400), vide pour aucune
+JOB_SCHEDULE = os.getenv("JOB_SCHEDULE", "")
+# Intervalle (s) entre deux vérifications des tâches planifiées par un worker
+JOB_SCHEDULE_CHECK = float(os.getenv("JOB_SCHEDULE_CHECK", 60))
+# Nombre de tentatives par défaut et délai (s) avant la première reprise
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_RETRY_DELAY = float(os.getenv("JOB_RETRY_DELAY", 5))
+# Attente (s) d'un worker lorsque la file est vide
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 1))
+# Une tâche en cours depuis plus longtemps (s) au démarrage d'un pool est
+# considérée comme abandonnée (worker arrêté) et remise en file
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", 3600))
+# Répertoire des fichiers produits par les exports et taille des lots lus
+EXPORT_DIR = Path(os.getenv("EXPORT_DIR", "exports"))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 5000))
+
+# Formats des exports en tâche de fond -> extension du fichier produit
+EXPORT_FORMATS = {"csv": "csv", "jsonl": "jsonl"}
+# Tables exportables (requêtes "export.<table>" et "export.<table>_for_athletes")
+EXPORT_TABLES = ("user", "athlete", "performance")
+
+class JobCancelled(Exception):
+    """Levée au point de contrôle d'une tâche dont l'annulation a été demandée."""
+
+class JobContext:
+    """Contexte transmis au traitement d'une tâche.
+
+    Attributes:
+        job_id (int): Identifiant de la tâche
+        attempt (int): Numéro de la tentative en cours (à partir de 1)
+        submitted_by (int | None): Utilisateur à l'origine de la tâche
+            (None pour une tâche planifiée ou soumise hors API)
+    """
+
+    def __init__(self, conn: sqlite3.Connection, job_id: int, attempt: int, submitted_by: int | None = None):
+        self.job_id = job_id
+        self.attempt = attempt
+        self.submitted_by = submitted_by
+        self._conn = conn
+
+    def check(self):
+        """Point de contrôle : interrompt la tâche si son annulation a été demandée.
+
+        Raises:
+            JobCancelled: Si l'annulation a été demandée
+        """
+        row = self._conn.execute(statement("job.cancel_requested"), (self.job_id,)).fetchone()
+        if row and row[0]:
+            raise JobCancelled()
+
+def parse_limits(value: str) -> dict[str, int]:
+    """Convertit "type=limite,..." en dictionnaire (types inconnus ignorés)."""
+    limits = {kind: 1 for kind in JOB_HANDLERS}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        kind, _, limit = item.partition("=")
+        if kind.strip() in limits:
+            limits[kind.strip()] = max(1, int(limit))
+    return limits
+
+def parse_schedule(value: str) -> dict[str, float]:
+    """Convertit "type=intervalle,..." en dictionnaire (types inconnus ignorés)."""
+    schedule = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        kind, _, interval = item.partition("=")
+        if kind.strip() in JOB_HANDLERS and float(interval) > 0:
+            schedule[kind.strip()] = float(interval)
+    return schedule
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+# Traitements ---------------------------------------------------------------
+
+def run_ingestion(conn: sqlite3.Connection, params: dict[str, Any], ctx: JobContext) -> dict:
+    """Ingère un répertoire d'essais (ingestion.ingest_directory).
+
+    Params:
+        directory (str, optional): Répertoire des fichiers JSON. Defaults to data_int.
+
+    Note:
+        L'ingestion se fait en une seule transaction : le seul point de
+        contrôle de l'annulation est avant son début.
+    """
+    import ingestion
+
+    ctx.check()
+    report = ingestion.ingest_directory(conn, params.get("directory") or ingestion.DATA_DIR)
+    if report["inserted"]:
+        cache_bus.publish(conn, ("summary.invalidate", report["athlete_ids"]), ("distribution.clear", None))
+    return report
+
+def run_reprocessing(conn: sqlite3.Connection, params: dict[str, Any], ctx: JobContext) -> dict:
+    """Recalcule les données dérivées : séries CTL/ATL/TSB, sketches et résumé.
+
+    Params:
+        athlete_ids (list[int], optional): Athlètes dont la série est recalculée.
+            Defaults to tous les athlètes ayant des séances.
+
+    Note:
+        Chaque athlète est recalculé dans sa propre transaction, avec un
+        point de contrôle de l'annulation entre deux athlètes.
+    """
+    import training_load
+
+    athlete_ids = params.get("athlete_ids")
+    if athlete_ids is None:
+        athlete_ids = [row[0] for row in conn.execute(statement("training.athletes"))]
+    days = 0
+    for athlete_id in athlete_ids:
+        ctx.check()
+        days += training_load.rebuild_daily_load(conn, athlete_id)
+    ctx.check()
+    cache_bus.publish(conn, ("summary.clear", None), ("distribution.clear", None))
+    rows = distribution_cache.rebuild(conn)
+    return {"athletes": len(athlete_ids), "days": days, "performances": rows}
+
+def run_export(conn: sqlite3.Connection, params: dict[str, Any], ctx: JobContext) -> dict:
+    """Exporte une table dans un fichier de EXPORT_DIR, par lots.
+
+    Params:
+        table (str): Table exportée (requête "export.<table>" du registre)
+        format (str, optional): "csv" ou "jsonl". Defaults to "csv".
+
+    Note:
+        Les lignes sont lues par lots de EXPORT_BATCH_SIZE (fetchmany) et
+        écrites au fil de l'eau dans un fichier temporaire, renommé à la
+        fin : un export interrompu ne laisse pas de fichier partiel.
+        L'export d'un coach ne contient que les athlètes qui lui sont
+        affectés (coaching.visible_athletes de l'auteur de la tâche).
+    """
+    export_format = params.get("format", "csv")
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    path = EXPORT_DIR / f"{params['table']}-{ctx.job_id}.{EXPORT_FORMATS[export_format]}"
+    partial = path.with_name(path.name + ".part")
+    submitter = conn.execute(statement("user.by_id"), (ctx.submitted_by,)).fetchone() if ctx.submitted_by else None
+    visible = coaching.visible_athletes(conn, dict(submitter)) if submitter else None
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    rows = 0
+    try:
+        if visible is None:
+            cursor.execute(statement(f"export.{params['table']}"))
+        else:
+            cursor.execute(statement(f"export.{params['table']}_for_athletes"), (json.dumps(visible),))
+        columns = [description[0] for description in cursor.description]
+        if export_format == "csv":
+            with open(partial, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                while batch := cursor.fetchmany(EXPORT_BATCH_SIZE):
+                    ctx.check()
+                    writer.writerows(batch)
+                    rows += len(batch)
+        else:
+            with open(partial, "wb") as f:
+                while batch := cursor.fetchmany(EXPORT_BATCH_SIZE):
+                    ctx.check()
+                    f.writelines(encode_json(dict(zip(columns, row))) + b"\n" for row in batch)
+                    rows += len(batch)
+        partial.replace(path)
+    finally:
+        cursor.close()
+        partial.unlink(missing_ok=True)
+    return {"path": str(path), "format": export_format, "rows": rows, "bytes": path.stat().st_size}
+
+def run_parquet_export(conn: sqlite3.Connection, params: dict[str, Any], ctx: JobContext) -> dict:
+    """Exporte des tables au format Parquet pour la BI (cf. parquet_export.py).
+
+    Params:
+        tables (list[str], optional): Tables exportées. Par défaut, toutes.
+
+    Note:
+        L'export est publié par remplacement atomique du lien
+        PARQUET_EXPORT_DIR ; les tables non demandées gardent leurs
+        fichiers précédents.
+    """
+    import parquet_export
+
+    return parquet_export.export_snapshot(conn, params.get("tables"), check=ctx.check)
+
+def validate_export(params: dict[str, Any]):
+    """Vérifie la table et le format d'un export (ValueError sinon)."""
+    if params.get("table") not in EXPORT_TABLES:
+        raise ValueError("Unknown export table")
+    if params.get("format", "csv") not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format (expected one of: {', '.join(EXPORT_FORMATS)})")
+
+def validate_reprocessing(params: dict[str, Any]):
+    """Vérifie la liste d'athlètes d'un retraitement (ValueError sinon)."""
+    athlete_ids = params.get("athlete_ids")
+    if athlete_ids is not None and not (isinstance(athlete_ids, list)
+                                        and all(isinstance(athlete_id, int) for athlete_id in athlete_ids)):
+        raise ValueError("athlete_ids must be a list of integers")
+
+def validate_parquet_export(params: dict[str, Any]):
+    """Vérifie la liste de tables d'un export Parquet (ValueError sinon)."""
+    tables = params.get("tables")
+    if tables is None:
+        return
+    if not (isinstance(tables, list) and all(isinstance(table, str) for table in tables)):
+        raise ValueError("tables must be a list of table names")
+    unknown = sorted(table for table in set(tables) if f"parquet.{table}" not in STATEMENTS)
+    if unknown:
+        raise ValueError(f"Unknown Parquet table: {', '.join(unknown)}")
+
+# Type de tâche -> (traitement, validation des paramètres à la soumission)
+JOB_HANDLERS: dict[str, tuple[Callable[[sqlite3.Connection, dict, JobContext], dict], Callable[[dict], None] | None]] = {
+    "ingestion": (run_ingestion, None),
+    "reprocessing": (run_reprocessing, validate_reprocessing),
+    "export": (run_export, validate_export),
+    "parquet_export": (run_parquet_export, validate_parquet_export),
+}
+
+# File ----------------------------------------------------------------------
+
+def job_to_dict(row: sqlite3.Row | dict) -> dict:
+    """Convertit une ligne de la table job (params et result décodés)."""
+    job = dict(row)
+    for key in ("params", "result"):
+        if job.get(key) is not None:
+            job[key] = json.loads(job[key])
+    job["cancel_requested"] = bool(job.get("cancel_requested"))
+    return job
+
+def submit(conn: sqlite3.Connection, kind: str, params: dict[str, Any] | None = None,
+           submitted_by: int | None = None, max_attempts: int = JOB_MAX_ATTEMPTS) -> dict:
+    """Ajoute une tâche à la file.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        kind (str): Type de tâche (clé de JOB_HANDLERS)
+        params (dict, optional): Paramètres du traitement
+        submitted_by (int, optional): Utilisateur à l'origine de la tâche
+        max_attempts (int, optional): Nombre de tentatives. Defaults to JOB_MAX_ATTEMPTS.
+
+    Returns:
+        dict: La tâche créée (statut queued)
+
+    Raises:
+        ValueError: Si le type est inconnu ou si les paramètres sont invalides
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    params = params or {}
+    validate = JOB_HANDLERS[kind][1]
+    if validate:
+        validate(params)
+    now = to_utc_iso(_now())
+    job_id = conn.execute(statement("job.insert"), (
+        kind, json.dumps(params), max_attempts, submitted_by, now, now)).lastrowid
+    conn.commit()
+    return job_to_dict(conn.execute(statement("job.by_id"), (job_id,)).fetchone())
+
+def cancel(conn: sqlite3.Connection, job_id: int) -> str | None:
+    """Demande l'annulation d'une tâche.
+
+    Returns:
+        str | None: Nouveau statut (cancelled si la tâche attendait, running
+        si elle s'arrêtera à son prochain point de contrôle), None si la
+        tâche est déjà terminée ou n'existe pas
+    """
+    row = conn.execute(statement("job.cancel"), (to_utc_iso(_now()), job_id)).fetchone()
+    conn.commit()
+    return row[0] if row else None
+
+def claim(conn: sqlite3.Connection, worker: str, limits: dict[str, int]) -> sqlite3.Row | None:
+    """Réserve la prochaine tâche prête (statut running), ou None si la file est vide."""
+    now = to_utc_iso(_now())
+    row = conn.execute(statement("job.claim"), (now, worker, json.dumps(limits), now)).fetchone()
+    conn.commit()
+    return row
+
+def requeue_stale(conn: sqlite3.Connection, older_than: float = JOB_STALE_AFTER) -> int:
+    """Remet en file les tâches en cours depuis plus de older_than secondes."""
+    now = _now()
+    count = conn.execute(statement("job.requeue_stale"), (
+        to_utc_iso(now), to_utc_iso(now - timedelta(seconds=older_than)))).rowcount
+    conn.commit()
+    return count
+
+def schedule_due(conn: sqlite3.Connection, schedule: dict[str, float]) -> list[str]:
+    """Ajoute à la file les tâches planifiées dont l'intervalle est écoulé.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        schedule (dict[str, float]): Type de tâche -> intervalle (s)
+
+    Returns:
+        list[str]: Types des tâches ajoutées
+    """
+    now = _now()
+    added = []
+    for kind, interval in schedule.items():
+        if conn.execute(statement("job.schedule"), (
+                kind, JOB_MAX_ATTEMPTS, to_utc_iso(now), to_utc_iso(now),
+                kind, to_utc_iso(now - timedelta(seconds=interval)))).rowcount:
+            added.append(kind)
+    conn.commit()
+    return added
+
+def execute_job(conn: sqlite3.Connection, job: sqlite3.Row) -> str:
+    """Exécute une tâche réservée et enregistre son issue.
+
+    Args:
+        conn (sqlite3.Connection): Connexion du worker
+        job (sqlite3.Row): Tâche retournée par claim
+
+    Returns:
+        str: Statut final (succeeded, failed, cancelled) ou queued en cas de reprise
+    """
+    handler = JOB_HANDLERS[job["kind"]][0]
+    ctx = JobContext(conn, job["job_id"], job["attempts"], job["submitted_by"])
+    start = time.perf_counter()
+    try:
+        result = handler(conn, json.loads(job["params"]), ctx)
+    except JobCancelled:
+        outcome, args = "cancelled", (to_utc_iso(_now()),)
+    except Exception as e:
+        if conn.in_transaction:
+            conn.rollback()
+        error = f"{type(e).__name__}: {e}"
+        if job["attempts"] < job["max_attempts"]:
+            delay = JOB_RETRY_DELAY * 2 ** (job["attempts"] - 1)
+            outcome, args = "retry", (error, to_utc_iso(_now() + timedelta(seconds=delay)))
+        else:
+            outcome, args = "failed", (error, to_utc_iso(_now()))
+    else:
+        outcome, args = "succeeded", (json.dumps(result, default=str), to_utc_iso(_now()))
+    duration_ms = round((time.perf_counter() - start) * 1000, 1)
+    conn.execute(statement(f"job.{outcome}"), (*args, duration_ms, job["job_id"]))
+    conn.commit()
+    return "queued" if outcome == "retry" else outcome
+
+class JobWorkerPool:
+    """Pool de threads exécutant les tâches de la file.
+
+    Chaque thread ouvre sa propre connexion et boucle : réservation d'une
+    tâche, exécution, enregistrement de l'issue ; il attend
+    JOB_POLL_INTERVAL secondes lorsque la file est vide.
+
+    Attributes:
+        workers (int): Nombre de threads
+        name (str): Préfixe des noms de workers (hôte:pid)
+        limits (dict[str, int]): Limite de concurrence par type de tâche
+        schedule (dict[str, float]): Intervalle (s) des tâches planifiées
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, db_path: str | None = None, limits: dict[str, int] | None = None,
+                 schedule: dict[str, float] | None = None):
+        self.workers = workers
+        self.db_path = db_path
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.limits = limits or parse_limits(JOB_CONCURRENCY)
+        self.schedule = parse_schedule(JOB_SCHEDULE) if schedule is None else schedule
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self):
+        """Remet en file les tâches abandonnées puis démarre les threads."""
+        conn = connect(self.db_path)
+        try:
+            requeue_stale(conn)
+        finally:
+            conn.close()
+        self._stop.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._loop, args=(f"{self.name}/{index}",),
+                                      name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _loop(self, worker: str):
+        conn = connect(self.db_path)
+        next_schedule = 0.0
+        try:
+            while not self._stop.is_set():
+                if self.schedule and time.monotonic() >= next_schedule:
+                    next_schedule = time.monotonic() + JOB_SCHEDULE_CHECK
+                    try:
+                        schedule_due(conn, self.schedule)
+                    except sqlite3.OperationalError:
+                        pass
+                try:
+                    job = claim(conn, worker, self.limits)
+                except sqlite3.OperationalError:
+                    # Base verrouillée au-delà de busy_timeout : nouvel essai au tour suivant
+                    job = None
+                if job is None:
+                    self._stop.wait(JOB_POLL_INTERVAL)
+                else:
+                    execute_job(conn, job)
+        finally:
+            conn.close()
+
+    def stop(self, timeout: float | None = None):
+        """Arrête les threads après la tâche en cours."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+
+if __name__ == "__main__":
+    from database import DB_PATH
+
+    parser = argparse.ArgumentParser(description="Worker des tâches de fond (table job)")
+    parser.add_argument("--workers", type=int, default=max(JOB_WORKERS, 1), help="nombre de threads")
+    parser.add_argument("--db", default=DB_PATH, help="chemin de la base SQLite")
+    args = parser.parse_args()
+
+    pool = JobWorkerPool(args.workers, args.db)
+    pool.start()
+    print(f"{args.workers} worker(s) démarré(s) ({pool.name}), Ctrl+C pour arrêter")
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    try:
+        while not stopped.wait(1):
+            pass
+    except KeyboardInterrupt:
+        pass
+    pool.stop()
@@ -13,10 +13,79 @@ Modules importés:
         - users: Gestion des utilisateurs
         - performances: Gestion des performances
         - stats: Gestion des statistiques
+        - export: Export des tables pour les outils de BI
+        - training: Charge d'entraînement (CTL/ATL/TSB)
+        - jobs: Tâches de fond (ingestion, retraitements, exports)
 """
 
+import time
+_import_start = time.perf_counter()
+
+import logging
+import os
+from contextlib import asynccontextmanager, contextmanager
 from fastapi import FastAPI, APIRouter
-from endpoints import athletes, users, performances, stats
+from endpoints import athletes, users, performances, stats, export, training, jobs as jobs_router
+import analytics
+from aggregates import distribution_cache, summary_cache
+from coherence import cache_bus
+from database import close_executor, get_executor, init_db
+from jobs import JOB_WORKERS, JobWorkerPool
+
+# Durée (ms) de l'import de l'application et de ses dépendances
+IMPORT_DURATION_MS = round((time.perf_counter() - _import_start) * 1000, 1)
+# Construction des caches statistiques au démarrage plutôt qu'à la première requête
+WARM_CACHES = os.getenv("WARM_CACHES", "1") == "1"
+
+logger = logging.getLogger("uvicorn.error")
+
+@contextmanager
+def timed(report: dict, step: str):
+    """Mesure la durée (ms) d'une étape du démarrage dans report[step]."""
+    start = time.perf_counter()
+    yield
+    report[step] = round((time.perf_counter() - start) * 1000, 1)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Cycle de vie de l'application : tout est initialisé une fois, avant la première requête.
+
+    Démarrage :
+        - init_db : création ou migration du schéma
+        - executor : ouverture et préchauffage des connexions de DBExecutor
+        - analytics : chemin de lecture analytique (ANALYTICS_READ_MODE :
+          exécuteur dédié, première copie de la base en mode snapshot)
+        - caches : résumé par athlète et sketches de quantiles (WARM_CACHES)
+        - jobs : pool de workers des tâches de fond (JOB_WORKERS threads ;
+          avec JOB_WORKERS=0, un worker séparé exécute les tâches)
+
+    La durée de l'import et de chaque étape est journalisée et conservée
+    dans app.state.startup. À l'arrêt, le pool puis l'exécuteur sont fermés.
+    """
+    report = {"imports": IMPORT_DURATION_MS}
+    with timed(report, "init_db"):
+        init_db()
+    with timed(report, "executor"):
+        db = get_executor()
+    with timed(report, "analytics"):
+        analytics.start()
+    if WARM_CACHES:
+        with timed(report, "caches"):
+            await db.run(cache_bus.sync)
+            await db.run(summary_cache.snapshot)
+            await db.run(distribution_cache.rebuild)
+    pool = JobWorkerPool(JOB_WORKERS) if JOB_WORKERS > 0 else None
+    with timed(report, "jobs"):
+        if pool:
+            pool.start()
+    report["total"] = round(sum(report.values()), 1)
+    app.state.startup = report
+    logger.info("Démarrage : " + ", ".join(f"{step} {duration} ms" for step, duration in report.items()))
+    yield
+    if pool:
+        pool.stop()
+    analytics.stop()
+    close_executor()
 
 # Création de l'instance principale de l'application
 app = FastAPI(
@@ -26,7 +95,8 @@ app = FastAPI(
     Permet la gestion des utilisateurs (athlètes, coachs, administrateurs),
     le suivi des performances et l'analyse statistique.
     """,
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Intégration des différents routeurs
@@ -34,6 +104,9 @@ app.include_router(users.router,tags=["Utilisateurs"])
 app.include_router(athletes.router,tags=["Athlètes"])
 app.include_router(performances.router,tags=["Performances"])
 app.include_router(stats.router,tags=["Statistiques"])
+app.include_router(export.router,tags=["Export"])
+app.include_router(training.router,tags=["Entraînement"])
+app.include_router(jobs_router.router,tags=["Tâches de fond"])
 
 @app.get("/")
 def home():
@@ -62,6 +135,9 @@ Notes sur l'utilisation de l'API:
    - /athletes/: Gestion des profils d'athlètes
    - /performances/: Suivi des performances
    - /stats/: Analyses statistiques
+   - /export/: Export des tables (JSON, MessagePack, Arrow)
+   - /training/: Séances et charge d'entraînement
+   - /jobs/: Tâches de fond (soumission, suivi, annulation)
 
 3. Documentation:
    - Documentation interactive disponible sur /docs
@@ -0,0 +1,248 @@
+"""
+Inscription en masse d'athlètes (comptes utilisateurs et profils athlètes).
+
+Une liste d'inscription (roster) est lue depuis :
+    - un fichier CSV (en-tête : name, email, password, gender, age, weight, height)
+    - un fichier JSON (liste d'objets, ou objet {"athletes": [...]})
+    - un répertoire de manifestes d'essais (data_int/*.json) : chaque fichier
+      fournit au moins "name", les autres champs venant des valeurs par défaut
+
+Le traitement d'un lot :
+    1. validation de chaque entrée (schemas.RosterEntry) ; l'email manquant
+       est dérivé du nom, le mot de passe manquant est généré
+    2. une seule requête vérifie tous les emails déjà utilisés, sans tenir
+       compte de la casse (json_each sur l'index unique de lower(email))
+    3. les mots de passe sont hachés en parallèle sur tous les cœurs
+       (passwords.hash_passwords)
+    4. comptes et profils sont créés en une seule transaction
+
+Les entrées invalides, en double dans la liste ou dont l'email existe déjà
+sont écartées et signalées, sans bloquer le reste du lot.
+
+Usage :
+    python onboarding.py roster.csv|roster.json|data_int/ [--set gender=male ...] [--workers 4] [--coach ID] [--db cycling.db]
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import secrets
+import sqlite3
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any
+
+from pydantic import ValidationError
+
+import coaching
+import queries
+from passwords import HASH_WORKERS, hash_passwords
+from schemas import RosterEntry
+from statements import statement
+
+# Domaine des emails dérivés du nom lorsque la liste n'en fournit pas
+ONBOARDING_EMAIL_DOMAIN = os.getenv("ONBOARDING_EMAIL_DOMAIN", "club.local")
+
+# Colonnes de la table athlete alimentées par la liste
+ATHLETE_FIELDS = ("name", "gender", "age", "weight", "height")
+
+def read_roster(source: str | Path | bytes, filename: str | None = None) -> list[dict[str, Any]]:
+    """Lit une liste d'inscription (CSV, JSON ou répertoire de manifestes).
+
+    Args:
+        source (str | Path | bytes): Chemin d'un fichier ou d'un répertoire,
+            ou contenu d'un fichier téléversé
+        filename (str, optional): Nom du fichier téléversé (son extension
+            choisit le format lorsque source contient des octets)
+
+    Returns:
+        list[dict]: Entrées brutes (champs en texte pour un CSV)
+
+    Raises:
+        ValueError: Si le format n'est pas reconnu
+    """
+    if isinstance(source, bytes):
+        text, suffix = source.decode("utf-8-sig"), Path(filename or "").suffix.lower()
+    else:
+        path = Path(source)
+        if path.is_dir():
+            return [json.loads(manifest.read_text()) for manifest in sorted(path.glob("*.json"))]
+        text, suffix = path.read_text(encoding="utf-8-sig"), path.suffix.lower()
+    if suffix == ".csv":
+        return [{key.strip(): value for key, value in row.items() if value not in (None, "")}
+                for row in csv.DictReader(io.StringIO(text))]
+    if suffix == ".json":
+        data = json.loads(text)
+        return data["athletes"] if isinstance(data, dict) and "athletes" in data else (
+            data if isinstance(data, list) else [data])
+    raise ValueError("Format de liste non reconnu (attendu : .csv ou .json)")
+
+def default_email(name: str) -> str:
+    """Email dérivé d'un nom (minuscules, sans accents ni espaces)."""
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    local_part = re.sub(r"[^a-z0-9]+", ".", ascii_name.lower()).strip(".") or "athlete"
+    return f"{local_part}@{ONBOARDING_EMAIL_DOMAIN}"
+
+def validate_roster(entries: list[dict[str, Any]], defaults: dict[str, Any] | None = None
+                    ) -> tuple[list[RosterEntry], dict[str, str]]:
+    """Valide les entrées et écarte les doublons internes à la liste.
+
+    Args:
+        entries (list[dict]): Entrées brutes
+        defaults (dict, optional): Valeurs utilisées pour les champs absents d'une entrée
+
+    Returns:
+        tuple: Un tuple contenant :
+            - valid (list[RosterEntry]): Entrées valides, email renseigné
+            - rejected (dict[str, str]): Entrée (email ou position) -> raison
+    """
+    valid, rejected, seen = [], {}, set()
+    for index, entry in enumerate(entries, start=1):
+        label = str(entry.get("email") or entry.get("name") or f"#{index}")
+        try:
+            athlete = RosterEntry.model_validate({**(defaults or {}), **entry})
+        except ValidationError as e:
+            rejected[label] = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+            continue
+        athlete.email = (athlete.email or default_email(athlete.name)).lower()
+        if athlete.email in seen:
+            rejected[athlete.email] = "email en double dans la liste"
+            continue
+        seen.add(athlete.email)
+        valid.append(athlete)
+    return valid, rejected
+
+def check_emails(conn: sqlite3.Connection, athletes: list[RosterEntry], rejected: dict[str, str]) -> list[RosterEntry]:
+    """Écarte, en une seule requête, les entrées dont l'email est déjà utilisé.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        athletes (list[RosterEntry]): Entrées validées
+        rejected (dict[str, str]): Entrées écartées, complétées par cette vérification
+
+    Returns:
+        list[RosterEntry]: Entrées dont l'email est libre
+    """
+    existing = {row[0] for row in conn.execute(
+        statement("user.existing_emails"), (json.dumps([athlete.email for athlete in athletes]),))}
+    for email in existing:
+        rejected[email] = "email déjà utilisé"
+    return [athlete for athlete in athletes if athlete.email not in existing]
+
+def hash_roster(athletes: list[RosterEntry], workers: int = HASH_WORKERS) -> tuple[list[str], dict[str, str]]:
+    """Génère les mots de passe manquants et hache tous les mots de passe en parallèle.
+
+    Returns:
+        tuple: Un tuple contenant :
+            - hashes (list[str]): Un hash par entrée, dans l'ordre
+            - generated (dict[str, str]): Email -> mot de passe temporaire généré
+    """
+    generated = {athlete.email: secrets.token_urlsafe(12) for athlete in athletes if athlete.password is None}
+    return hash_passwords([athlete.password or generated[athlete.email] for athlete in athletes], workers), generated
+
+def create_accounts(conn: sqlite3.Connection, athletes: list[RosterEntry], hashes: list[str],
+                    generated: dict[str, str], coach_id: int | None = None) -> list[dict[str, Any]]:
+    """Crée comptes et profils en une seule transaction (tout ou rien).
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        athletes (list[RosterEntry]): Entrées à créer
+        hashes (list[str]): Hash du mot de passe de chaque entrée
+        generated (dict[str, str]): Mots de passe temporaires générés
+        coach_id (int, optional): Coach auquel affecter les athlètes créés
+
+    Returns:
+        list[dict]: email, user_id, athlete_id et, s'il a été généré,
+        temporary_password de chaque athlète créé
+
+    Raises:
+        sqlite3.IntegrityError: Si un email a été pris entre la vérification
+            et l'écriture (aucune ligne n'est créée)
+    """
+    created = []
+    try:
+        queries.insert_many(conn, "user", [
+            {"name": athlete.name, "email": athlete.email, "password": password, "role": "athlete"}
+            for athlete, password in zip(athletes, hashes)], commit=False)
+        user_ids = dict(conn.execute(statement("user.ids_by_email"),
+                                     (json.dumps([athlete.email for athlete in athletes]),)).fetchall())
+        for athlete in athletes:
+            row = {field: getattr(athlete, field) for field in ATHLETE_FIELDS}
+            athlete_id = queries.insert_data(conn, "athlete", {**row, "user_id": user_ids[athlete.email]}, commit=False)
+            account = {"email": athlete.email, "user_id": user_ids[athlete.email], "athlete_id": athlete_id}
+            if athlete.email in generated:
+                account["temporary_password"] = generated[athlete.email]
+            created.append(account)
+        if coach_id is not None:
+            coaching.assign(conn, coach_id, [account["athlete_id"] for account in created], commit=False)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    return created
+
+def onboard(conn: sqlite3.Connection, entries: list[dict[str, Any]], defaults: dict[str, Any] | None = None,
+            hash_workers: int = HASH_WORKERS, coach_id: int | None = None) -> dict[str, Any]:
+    """Inscrit une liste d'athlètes : validation, vérification des emails, hachage, écriture.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        entries (list[dict]): Entrées brutes (cf. read_roster)
+        defaults (dict, optional): Valeurs par défaut des champs absents
+        hash_workers (int, optional): Processus de hachage. Defaults to HASH_WORKERS.
+        coach_id (int, optional): Coach auquel affecter les athlètes créés
+
+    Returns:
+        dict: Dictionnaire contenant :
+            - created (int): Nombre d'athlètes créés
+            - athletes (list[dict]): Comptes créés (cf. create_accounts)
+            - rejected (dict[str, str]): Entrée écartée -> raison
+            - durations_ms (dict[str, float]): Durées de la vérification des
+              emails, du hachage et de l'écriture
+    """
+    durations = {}
+    start = time.perf_counter()
+    athletes, rejected = validate_roster(entries, defaults)
+    athletes = check_emails(conn, athletes, rejected)
+    durations["check"] = round((time.perf_counter() - start) * 1000, 1)
+    start = time.perf_counter()
+    hashes, generated = hash_roster(athletes, hash_workers)
+    durations["hash"] = round((time.perf_counter() - start) * 1000, 1)
+    start = time.perf_counter()
+    created = create_accounts(conn, athletes, hashes, generated, coach_id)
+    durations["write"] = round((time.perf_counter() - start) * 1000, 1)
+    return {"created": len(created), "athletes": created, "rejected": rejected, "durations_ms": durations}
+
+def parse_defaults(values: list[str]) -> dict[str, str]:
+    """Convertit des options "--set champ=valeur" en dictionnaire."""
+    return dict(value.split("=", 1) for value in values)
+
+if __name__ == "__main__":
+    from database import DB_PATH, connect
+
+    parser = argparse.ArgumentParser(description="Inscription en masse d'athlètes (comptes et profils)")
+    parser.add_argument("roster", help="fichier CSV ou JSON, ou répertoire de manifestes (data_int/)")
+    parser.add_argument("--set", action="append", default=[], metavar="CHAMP=VALEUR",
+                        help="valeur par défaut d'un champ absent (ex: --set gender=male)")
+    parser.add_argument("--workers", type=int, default=HASH_WORKERS, help="processus de hachage")
+    parser.add_argument("--coach", type=int, default=None, help="identifiant du coach auquel affecter les athlètes")
+    parser.add_argument("--db", default=DB_PATH, help="chemin de la base SQLite")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    try:
+        report = onboard(conn, read_roster(args.roster), parse_defaults(args.set), args.workers, args.coach)
+    finally:
+        conn.close()
+    durations = report["durations_ms"]
+    print(f"{report['created']} athlète(s) créé(s) (vérification {durations['check']} ms,"
+          f" hachage {durations['hash']} ms, écriture {durations['write']} ms)")
+    for account in report["athletes"]:
+        if "temporary_password" in account:
+            print(f"  {account['email']} : mot de passe temporaire {account['temporary_password']}")
+    for label, reason in report["rejected"].items():
+        print(f"  écarté {label} : {reason}")
@@ -0,0 +1,240 @@
+"""
+Export des tables au format Parquet pour les outils de BI (Power BI, notebooks).
+
+Le rapport BI lit un répertoire de fichiers Parquet, compacts et en
+colonnes, au lieu d'interroger la base ou de télécharger des lignes JSON :
+
+    <PARQUET_EXPORT_DIR>/
+        user/part-0.parquet
+        athlete/part-0.parquet
+        performance/tested_month=2025-03/part-0.parquet
+        training_session/session_month=2025-03/part-0.parquet
+
+    - les lignes sont lues par lots (fetchmany de PARQUET_BATCH_SIZE lignes)
+      et écrites au fil de l'eau : la mémoire utilisée dépend de la taille
+      d'un lot, pas de celle de la table
+    - performance et training_session (séances issues des échantillons
+      d'essais ingérés) sont partitionnées par mois (répertoires
+      "colonne=valeur", lus comme une colonne par Power BI et pyarrow)
+    - les colonnes texte à peu de valeurs (genre, rôle) sont encodées en
+      dictionnaire ; chaque fichier est compressé (PARQUET_COMPRESSION)
+    - chaque export est écrit dans un nouveau répertoire de version
+      (<PARQUET_EXPORT_DIR>.v<date>-<suffixe>) ; PARQUET_EXPORT_DIR est un lien
+      symbolique remplacé atomiquement vers la version complète : un
+      lecteur ne voit jamais d'export partiel ni de répertoire absent
+
+Le mot de passe des utilisateurs n'est jamais exporté. pyarrow n'est
+importé qu'au premier export.
+
+Usage (à la demande : tâche parquet_export, cf. jobs.py) :
+    python parquet_export.py [--out exports/parquet] [--table performance ...] [--db cycling.db]
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Iterator
+
+from statements import statement
+
+# Lien symbolique vers la dernière version publiée de l'export
+PARQUET_EXPORT_DIR = Path(os.getenv("PARQUET_EXPORT_DIR", Path(os.getenv("EXPORT_DIR", "exports")) / "parquet"))
+# Nombre de lignes lues et écrites par lot
+PARQUET_BATCH_SIZE = int(os.getenv("PARQUET_BATCH_SIZE", 50000))
+# Codec de compression des fichiers (zstd, snappy, gzip, none...)
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
+
+# Tables exportées -> (table source des types, colonne de partition ou None) ;
+# la requête "parquet.<table>" du registre fournit les lignes
+PARQUET_TABLES: dict[str, tuple[str, str | None]] = {
+    "user": ("user", None),
+    "athlete": ("athlete", None),
+    "performance": ("performance", "tested_month"),
+    "training_session": ("training_session", "session_month"),
+}
+
+# Colonnes texte encodées en dictionnaire (peu de valeurs distinctes)
+DICTIONARY_COLUMNS = {"gender", "role"}
+
+def arrow_schema(conn: sqlite3.Connection, table_name: str, columns: list[str]):
+    """Schéma Arrow des colonnes d'une requête, d'après les types déclarés de la table.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        table_name (str): Table dont les types déclarés sont utilisés
+        columns (list[str]): Colonnes de la requête (les colonnes absentes de
+            la table, comme les partitions calculées, sont du texte)
+
+    Returns:
+        pyarrow.Schema: INTEGER -> int64, REAL -> float64, autres -> string
+    """
+    import pyarrow as pa
+
+    declared = {row[1]: (row[2] or "").upper() for row in conn.execute(f'PRAGMA table_xinfo("{table_name}")')}
+    fields = []
+    for column in columns:
+        declared_type = declared.get(column, "TEXT")
+        if "INT" in declared_type:
+            arrow_type = pa.int64()
+        elif any(name in declared_type for name in ("REAL", "FLOA", "DOUB")):
+            arrow_type = pa.float64()
+        elif column in DICTIONARY_COLUMNS:
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column, arrow_type))
+    return pa.schema(fields)
+
+def _batches(cursor: sqlite3.Cursor, schema, batch_size: int, check: Callable[[], None] | None) -> Iterator:
+    """Convertit les lots d'un curseur en record batches Arrow."""
+    import pyarrow as pa
+
+    while rows := cursor.fetchmany(batch_size):
+        if check:
+            check()
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)], schema=schema)
+
+def export_table(conn: sqlite3.Connection, table: str, target: Path, batch_size: int = PARQUET_BATCH_SIZE,
+                 compression: str = PARQUET_COMPRESSION, check: Callable[[], None] | None = None) -> int:
+    """Écrit une table dans un répertoire Parquet (partitionné s'il y a lieu).
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        table (str): Clé de PARQUET_TABLES
+        target (Path): Répertoire de la table
+        batch_size (int, optional): Lignes par lot. Defaults to PARQUET_BATCH_SIZE.
+        compression (str, optional): Codec. Defaults to PARQUET_COMPRESSION.
+        check (Callable, optional): Appelée entre deux lots (point d'annulation)
+
+    Returns:
+        int: Nombre de lignes exportées
+    """
+    import pyarrow.dataset as ds
+
+    source, partition = PARQUET_TABLES[table]
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    rows = 0
+    try:
+        cursor.execute(statement(f"parquet.{table}"))
+        schema = arrow_schema(conn, source, [description[0] for description in cursor.description])
+
+        def counted():
+            nonlocal rows
+            for batch in _batches(cursor, schema, batch_size, check):
+                rows += batch.num_rows
+                yield batch
+
+        file_format = ds.ParquetFileFormat()
+        ds.write_dataset(
+            counted(), target, schema=schema, format=file_format,
+            file_options=file_format.make_write_options(compression=compression, use_dictionary=True),
+            partitioning=[partition] if partition else None, partitioning_flavor="hive" if partition else None,
+            existing_data_behavior="overwrite_or_ignore")
+    finally:
+        cursor.close()
+    if rows == 0:
+        target.mkdir(parents=True, exist_ok=True)
+    return rows
+
+def _publish(out: Path, version: Path):
+    """Fait pointer le lien symbolique out vers version, en une seule opération.
+
+    Le nouveau lien est créé à côté de out puis renommé par-dessus (rename
+    POSIX, atomique) : out désigne toujours une version complète. Un export
+    antérieur écrit directement dans out (répertoire) est d'abord converti
+    en version.
+    """
+    if out.is_dir() and not out.is_symlink():
+        out.rename(out.with_name(f"{out.name}.v0"))
+    link = out.with_name(f"{out.name}.link-{os.getpid()}")
+    link.unlink(missing_ok=True)
+    link.symlink_to(version.name, target_is_directory=True)
+    os.replace(link, out)
+
+def export_snapshot(conn: sqlite3.Connection, tables: list[str] | None = None, out: Path | str = PARQUET_EXPORT_DIR,
+                    batch_size: int = PARQUET_BATCH_SIZE, compression: str = PARQUET_COMPRESSION,
+                    check: Callable[[], None] | None = None) -> dict:
+    """Exporte des tables en Parquet dans une nouvelle version puis la publie.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        tables (list[str], optional): Tables exportées. Par défaut, toutes
+            celles de PARQUET_TABLES.
+        out (Path | str, optional): Lien de l'export. Defaults to PARQUET_EXPORT_DIR.
+        batch_size (int, optional): Lignes par lot. Defaults to PARQUET_BATCH_SIZE.
+        compression (str, optional): Codec. Defaults to PARQUET_COMPRESSION.
+        check (Callable, optional): Appelée entre deux lots (point d'annulation)
+
+    Returns:
+        dict: Dictionnaire contenant :
+            - path (str): Lien de l'export
+            - version (str): Répertoire de la version publiée
+            - tables (dict): Par table, nombre de lignes, octets écrits et durée (ms)
+
+    Raises:
+        ValueError: Si une table n'est pas exportable
+
+    Note:
+        Les tables non demandées sont reprises de la version précédente par
+        liens physiques (aucune copie). Après publication, seules la nouvelle
+        version et la précédente sont conservées : un lecteur qui a résolu
+        le lien juste avant la bascule termine sa lecture.
+    """
+    tables = tables or list(PARQUET_TABLES)
+    unknown = sorted(set(tables) - set(PARQUET_TABLES))
+    if unknown:
+        raise ValueError(f"Unknown Parquet table: {', '.join(unknown)}")
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    version = Path(tempfile.mkdtemp(prefix=f"{out.name}.v{time.strftime('%Y%m%dT%H%M%S')}-", dir=out.parent))
+    version.chmod(0o755)
+    if out.is_symlink():
+        previous_version = out.resolve()
+    else:
+        previous_version = out.with_name(f"{out.name}.v0") if out.is_dir() else None
+    report = {}
+    try:
+        for table in tables:
+            start = time.perf_counter()
+            rows = export_table(conn, table, version / table, batch_size, compression, check)
+            size = sum(path.stat().st_size for path in (version / table).rglob("*.parquet"))
+            report[table] = {"rows": rows, "bytes": size, "duration_ms": round((time.perf_counter() - start) * 1000, 1)}
+        # Les tables non demandées gardent les fichiers de la version précédente
+        for previous in (list(out.iterdir()) if out.is_dir() else ()):
+            if previous.name not in report:
+                shutil.copytree(previous, version / previous.name, copy_function=os.link)
+        _publish(out, version)
+    except BaseException:
+        shutil.rmtree(version, ignore_errors=True)
+        raise
+    # Comparaison par nom : le lien résolu est absolu, glob() suit la forme de out
+    kept = {version.name, previous_version.name if previous_version else None}
+    for stale in out.parent.glob(f"{out.name}.v*"):
+        if stale.name not in kept:
+            shutil.rmtree(stale, ignore_errors=True)
+    return {"path": str(out), "version": str(version), "tables": report}
+
+if __name__ == "__main__":
+    from database import DB_PATH, connect
+
+    parser = argparse.ArgumentParser(description="Export Parquet des tables pour les outils de BI")
+    parser.add_argument("--out", default=str(PARQUET_EXPORT_DIR), help="répertoire de l'export")
+    parser.add_argument("--table", action="append", choices=list(PARQUET_TABLES), help="table exportée (répétable)")
+    parser.add_argument("--batch-size", type=int, default=PARQUET_BATCH_SIZE, help="lignes par lot")
+    parser.add_argument("--db", default=DB_PATH, help="chemin de la base SQLite")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    try:
+        result = export_snapshot(conn, args.table, args.out, args.batch_size)
+    finally:
+        conn.close()
+    for table, stats in result["tables"].items():
+        print(f"{table} : {stats['rows']} ligne(s), {stats['bytes']} octets, {stats['duration_ms']} ms")
+    print(f"Export écrit dans {result['path']}")
@@ -0,0 +1,118 @@
+"""
+Hachage des mots de passe (bcrypt).
+
+Ce module ne dépend que de passlib : il peut être importé rapidement par
+les processus du pool de hachage, sans charger FastAPI ni le reste de
+l'application.
+
+Le hachage bcrypt est volontairement coûteux en CPU (environ 0,25 s par
+mot de passe au coût par défaut) :
+    - pour un lot (onboarding d'un club), hash_passwords répartit les mots
+      de passe sur plusieurs processus, donc sur tous les cœurs
+    - à la connexion, verify_password retient pendant LOGIN_CACHE_TTL
+      secondes les vérifications réussies : une reconnexion avec le même
+      mot de passe ne refait pas le calcul bcrypt
+
+Le coût (BCRYPT_ROUNDS) est configurable : un hash calculé avec un autre
+coût est signalé par verify_password pour être recalculé à la connexion.
+"""
+
+import hashlib
+import hmac
+import math
+import multiprocessing
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from passlib.context import CryptContext
+
+# Nombre de processus de hachage d'un lot (défaut : un par cœur)
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", os.cpu_count() or 1))
+
+# Coût bcrypt (log2 du nombre d'itérations) des nouveaux hashes
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+
+# Durée (s) pendant laquelle une vérification réussie est retenue (0 : désactivé)
+LOGIN_CACHE_TTL = int(os.getenv("LOGIN_CACHE_TTL", 300))
+
+# Nombre maximal de vérifications retenues (les plus anciennes sont oubliées)
+LOGIN_CACHE_SIZE = int(os.getenv("LOGIN_CACHE_SIZE", 10000))
+
+# Tout hash dont le coût diffère de BCRYPT_ROUNDS est considéré à recalculer
+bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# Empreintes HMAC (clé propre au processus) des couples mot de passe / hash
+# vérifiés -> date d'expiration ; le mot de passe n'est jamais conservé
+_verified: OrderedDict[bytes, float] = OrderedDict()
+_verified_key = secrets.token_bytes(32)
+_verified_lock = threading.Lock()
+
+def hash_password(password: str) -> str:
+    """Hache un mot de passe avec bcrypt_context."""
+    return bcrypt_context.hash(password)
+
+def _fingerprint(password: str, hashed: str) -> bytes:
+    """Empreinte d'un couple mot de passe / hash (HMAC-SHA256, quelques µs)."""
+    return hmac.new(_verified_key, f"{hashed}\0{password}".encode(), hashlib.sha256).digest()
+
+def verify_password(password: str, hashed: str) -> tuple[bool, str | None]:
+    """Vérifie un mot de passe, en évitant le calcul bcrypt s'il vient d'être vérifié.
+
+    Args:
+        password (str): Mot de passe en clair
+        hashed (str): Hash enregistré
+
+    Returns:
+        tuple: Un tuple contenant :
+            - valid (bool): True si le mot de passe correspond
+            - new_hash (str | None): Nouveau hash à enregistrer si le hash
+              enregistré n'utilise pas le coût BCRYPT_ROUNDS
+
+    Note:
+        Seules les vérifications réussies sont retenues, sous forme
+        d'empreinte liée au hash enregistré : un changement de mot de passe
+        (donc de hash) les invalide.
+    """
+    key = _fingerprint(password, hashed)
+    now = time.monotonic()
+    with _verified_lock:
+        expires = _verified.get(key)
+        if expires is not None and expires > now:
+            return True, None
+    valid, new_hash = bcrypt_context.verify_and_update(password, hashed)
+    if valid and LOGIN_CACHE_TTL > 0:
+        # Après un recalcul, c'est le nouveau hash qui sera enregistré
+        key = _fingerprint(password, new_hash) if new_hash else key
+        with _verified_lock:
+            _verified[key] = now + LOGIN_CACHE_TTL
+            _verified.move_to_end(key)
+            while len(_verified) > LOGIN_CACHE_SIZE:
+                _verified.popitem(last=False)
+    return valid, new_hash
+
+def hash_passwords(passwords: list[str], workers: int = HASH_WORKERS) -> list[str]:
+    """Hache un lot de mots de passe en parallèle sur plusieurs processus.
+
+    Args:
+        passwords (list[str]): Mots de passe en clair
+        workers (int, optional): Nombre de processus. Defaults to HASH_WORKERS.
+
+    Returns:
+        list[str]: Hashes, dans l'ordre des mots de passe
+
+    Note:
+        Les processus sont démarrés en mode "spawn" : l'appelant peut avoir
+        des threads actifs (exécuteur SQLite, serveur) sans risque pour les
+        processus enfants. Un petit lot est haché dans le processus courant,
+        le démarrage des processus coûtant plus qu'il ne rapporte.
+    """
+    workers = min(workers, len(passwords))
+    if workers <= 1 or len(passwords) < 2 * workers:
+        return [hash_password(password) for password in passwords]
+    chunksize = math.ceil(len(passwords) / (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(hash_password, passwords, chunksize=chunksize))
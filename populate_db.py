@@ -11,6 +11,9 @@ environnement de production.
 
 import sqlite3
 import random
+from datetime import datetime, timedelta, timezone
+
+from queries import to_utc_iso
 
 def populate_database(db_path="cycling.db"):
     """Peuple la base de données avec des données de test.
@@ -20,6 +23,7 @@ def populate_database(db_path="cycling.db"):
         - 1 nouveau coach
         - Des profils d'athlètes avec données physiologiques
         - Des performances aléatoires pour chaque athlète
+        - L'affectation des athlètes aux coachs, répartis à tour de rôle
 
     Args:
         db_path (str, optional): Chemin vers le fichier de base de données.
@@ -43,6 +47,7 @@ def populate_database(db_path="cycling.db"):
         - P1 (Puissance zone 1) : 180-300 watts
         - P2 (Puissance zone 2) : 160-280 watts
         - P3 (Puissance zone 3) : 140-260 watts
+        - Date du test : dans les 365 derniers jours
     """
     # Ensure proper database connection
     with sqlite3.connect(db_path) as conn:
@@ -86,6 +91,17 @@ def populate_database(db_path="cycling.db"):
         cursor.execute("SELECT athlete_id FROM athlete")
         athlete_ids = [row[0] for row in cursor.fetchall()]
 
+        # Assign athletes to coaches in turn (coach_athlete table)
+        cursor.execute("SELECT user_id FROM user WHERE role = 'coach' ORDER BY user_id")
+        coach_ids = [row[0] for row in cursor.fetchall()]
+        if coach_ids:
+            assigned_at = to_utc_iso(datetime.now(timezone.utc))
+            cursor.executemany(
+                "INSERT OR IGNORE INTO coach_athlete (coach_id, athlete_id, assigned_at) VALUES (?, ?, ?)",
+                [(coach_ids[i % len(coach_ids)], athlete_id, assigned_at) for i, athlete_id in enumerate(athlete_ids)]
+            )
+            conn.commit()
+
         def generate_performance_data(athlete_id):
             """Génère des données de performance aléatoires pour un athlète.
 
@@ -102,6 +118,7 @@ def populate_database(db_path="cycling.db"):
                     - p2 (int)
                     - p3 (int)
                     - athlete_id (int)
+                    - tested_at (str): date du test dans l'année écoulée
             """
             return (
                 round(random.uniform(45, 65), 2),  # vo2max
@@ -111,7 +128,8 @@ def populate_database(db_path="cycling.db"):
                 random.randint(180, 300),          # p1
                 random.randint(160, 280),          # p2
                 random.randint(140, 260),          # p3
-                athlete_id
+                athlete_id,
+                to_utc_iso(datetime.now(timezone.utc) - timedelta(days=random.uniform(0, 365)))  # tested_at
             )
 
         # Generate 0-5 performance records per athlete
@@ -124,8 +142,8 @@ def populate_database(db_path="cycling.db"):
         # Insert performance data
         cursor.executemany(
             """INSERT INTO performance
-               (vo2max, hr_max, cadence_max, ppo, p1, p2, p3, athlete_id)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+               (vo2max, hr_max, cadence_max, ppo, p1, p2, p3, athlete_id, tested_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
             performance_data
         )
 
@@ -1,132 +1,441 @@
 """
 Module de gestion des requêtes SQL pour l'application de gestion de cyclisme.
 
-Ce module fournit des fonctions utilitaires pour effectuer des opérations CRUD
-(Create, Read, Update, Delete) sur la base de données SQLite.
-Toutes les fonctions gèrent automatiquement la connexion et sa fermeture.
+Ce module fournit une couche d'accès aux données (repository) pour effectuer
+des opérations CRUD (Create, Read, Update, Delete) sur la base SQLite :
+    - les métadonnées des tables (colonnes, clé primaire) sont lues une seule
+      fois par PRAGMA table_xinfo puis mises en cache (les colonnes générées
+      sont lisibles, filtrables et triables, mais jamais écrites)
+    - les noms de tables et de colonnes sont validés contre ces métadonnées,
+      les valeurs sont toujours passées en paramètres (aucune f-string de valeurs)
+    - le texte SQL généré est mis en cache : pour une même opération il est
+      identique d'un appel à l'autre, ce qui permet au cache de statements de
+      sqlite3 de réutiliser la requête déjà préparée
+    - les API *_many exécutent un lot complet avec executemany dans une
+      seule transaction
+
+Toutes les fonctions reçoivent la connexion en premier argument afin de
+pouvoir être passées telles quelles à DBExecutor.run.
 """
 
-from sqlite3 import Connection
-from database import get_db
-import json
+import re
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Iterable
+
+from statements import statement
+
+# Cache des métadonnées : nom de table -> (colonnes, clé primaire)
+_TABLE_METADATA: dict[str, tuple[tuple[str, ...], str]] = {}
+# Colonnes générées (lisibles, filtrables et triables, mais jamais écrites) par table
+_GENERATED_COLUMNS: dict[str, tuple[str, ...]] = {}
+_metadata_lock = threading.Lock()
+
+# Format de stockage des dates (texte ISO 8601 en UTC, à largeur fixe) : l'ordre
+# lexicographique est l'ordre chronologique, ce qui permet les parcours de
+# plage sur l'index (athlete_id, tested_at)
+DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+def to_utc_iso(value: datetime) -> str:
+    """Convertit une date au format de stockage (une date sans fuseau est considérée UTC).
+
+    Args:
+        value (datetime): Date à convertir
+
+    Returns:
+        str: Date au format DATETIME_FORMAT (ex: "2025-03-21T09:30:00Z")
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).strftime(DATETIME_FORMAT)
+
+def table_metadata(conn: sqlite3.Connection, table_name: str) -> tuple[tuple[str, ...], str]:
+    """Retourne les colonnes et la clé primaire d'une table (avec cache).
 
-def insert_data(table_name: str, data: tuple[str|int|float|bool], con: Connection = get_db()):
-    """Insère de nouvelles données dans une table spécifiée.
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        table_name (str): Nom de la table
+
+    Returns:
+        tuple: Un tuple contenant :
+            - columns (tuple[str]): Noms des colonnes écrivables dans l'ordre
+              de la table (les colonnes générées sont exclues)
+            - primary_key (str): Nom de la colonne clé primaire
+
+    Raises:
+        ValueError: Si la table n'existe pas
+    """
+    metadata = _TABLE_METADATA.get(table_name)
+    if metadata is not None:
+        return metadata
+
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+    ).fetchone()
+    if not exists:
+        raise ValueError(f"Table inconnue : {table_name}")
+
+    # Dernier champ de table_xinfo : 0 pour une colonne ordinaire, 2 ou 3 pour une colonne générée
+    table_info = conn.execute(f'PRAGMA table_xinfo("{table_name}")').fetchall()
+    columns = tuple(column[1] for column in table_info if column[6] == 0)
+    primary_key = next((column[1] for column in table_info if column[5] == 1), "rowid")
+    with _metadata_lock:
+        _TABLE_METADATA[table_name] = (columns, primary_key)
+        _GENERATED_COLUMNS[table_name] = tuple(column[1] for column in table_info if column[6] in (2, 3))
+    return columns, primary_key
+
+def clear_metadata_cache():
+    """Vide le cache des métadonnées (à appeler après une migration de schéma)."""
+    with _metadata_lock:
+        _TABLE_METADATA.clear()
+        _GENERATED_COLUMNS.clear()
+
+def _check_columns(conn: sqlite3.Connection, table_name: str, columns: Iterable[str],
+                   readable: bool = False) -> tuple[str, ...]:
+    """Valide des noms de colonnes contre les métadonnées de la table.
 
     Args:
+        readable (bool, optional): Accepte aussi les colonnes générées
+            (lectures : filtres et tri). Defaults to False (écritures).
+
+    Returns:
+        tuple[str]: Colonnes remises dans l'ordre de la table, afin qu'un même
+        ensemble de colonnes produise toujours le même texte SQL
+
+    Raises:
+        ValueError: Si une colonne n'existe pas ou si la liste est vide
+    """
+    known, _ = table_metadata(conn, table_name)
+    if readable:
+        known = known + _GENERATED_COLUMNS.get(table_name, ())
+    columns = set(columns)
+    if not columns:
+        raise ValueError("Aucune colonne fournie")
+    unknown = sorted(columns.difference(known))
+    if unknown:
+        raise ValueError(f"Colonnes inconnues pour {table_name} : {', '.join(unknown)}")
+    return tuple(column for column in known if column in columns)
+
+@lru_cache(maxsize=256)
+def insert_sql(table_name: str, columns: tuple[str, ...]) -> str:
+    """Construit (une seule fois) la requête INSERT paramétrée d'une table."""
+    placeholders = ", ".join("?" for _ in columns)
+    return f'INSERT INTO "{table_name}" ({", ".join(columns)}) VALUES ({placeholders})'
+
+@lru_cache(maxsize=256)
+def update_sql(table_name: str, columns: tuple[str, ...], primary_key: str) -> str:
+    """Construit (une seule fois) la requête UPDATE paramétrée d'une table."""
+    assignments = ", ".join(f"{column} = ?" for column in columns)
+    return f'UPDATE "{table_name}" SET {assignments} WHERE {primary_key} = ?'
+
+@lru_cache(maxsize=64)
+def delete_sql(table_name: str, primary_key: str) -> str:
+    """Construit (une seule fois) la requête DELETE paramétrée d'une table."""
+    return f'DELETE FROM "{table_name}" WHERE {primary_key} = ?'
+
+def insert_data(conn: sqlite3.Connection, table_name: str, data: dict[str, Any], commit: bool = True) -> int:
+    """Insère une ligne dans une table.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
         table_name (str): Nom de la table dans laquelle insérer les données
-        data (tuple): Tuple contenant les valeurs à insérer. Les types acceptés sont :
-            - str: Pour les chaînes de caractères
-            - int: Pour les nombres entiers
-            - float: Pour les nombres décimaux
-            - bool: Pour les valeurs booléennes
-        con (Connection, optional): Connexion à la base de données.
-            Defaults to get_db().
+        data (dict): Valeurs à insérer, indexées par nom de colonne.
+            La clé primaire auto-incrémentée peut être omise.
+        commit (bool, optional): Valide la transaction. Defaults to True.
 
-    Note:
-        - La fonction récupère automatiquement les noms des colonnes de la table
-        - La première colonne (généralement l'ID) est exclue car auto-incrémentée
-        - La connexion est automatiquement fermée après l'opération
+    Returns:
+        int: Identifiant (rowid) de la ligne insérée
 
     Raises:
-        Exception: Si une erreur survient pendant l'insertion des données
+        ValueError: Si la table ou une colonne n'existe pas
+        sqlite3.Error: En cas d'erreur SQL (la transaction est annulée)
 
     Example:
-        >>> values = ("4650", "180", "200", 360, 134, 286, 333, "sub_1")
-        >>> insert_data("performance", values)
-        "INSERT INTO performance(col1, col2, ...) VALUES (4650, 180, ...)"
-        "SUCCES"
+        >>> insert_data(conn, "athlete", {"name": "Jean", "gender": "male", "age": 25,
+        ...                              "weight": 70.0, "height": 1.80, "user_id": 3})
+        12
     """
-    connexion = next(con)
+    columns = _check_columns(conn, table_name, data)
     try:
-        cursor = connexion.cursor()
-        table_info = cursor.execute(f"PRAGMA table_info({table_name});").fetchall()
-        columns = tuple([c[1] for c in table_info][1:])
-        query = f"INSERT INTO {table_name}{columns} VALUES {data}"
-        print(query)
-        cursor.execute(query)
-        connexion.commit()
-        print("SUCCES")
-
-    except Exception as e:
-        print(f"Error: {e}")
+        cursor = conn.execute(insert_sql(table_name, columns), tuple(data[column] for column in columns))
+        if commit:
+            conn.commit()
+        return cursor.lastrowid
+    except sqlite3.Error:
+        conn.rollback()
+        raise
 
-    finally:
-        con.close()
+def insert_many(conn: sqlite3.Connection, table_name: str, rows: list[dict[str, Any]], commit: bool = True) -> int:
+    """Insère un lot de lignes en une seule transaction.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        table_name (str): Nom de la table
+        rows (list[dict]): Lignes à insérer. Toutes doivent avoir les mêmes clés.
+        commit (bool, optional): Valide la transaction. Defaults to True.
+
+    Returns:
+        int: Nombre de lignes insérées
+
+    Raises:
+        ValueError: Si les lignes n'ont pas toutes les mêmes colonnes
+        sqlite3.Error: En cas d'erreur SQL (aucune ligne du lot n'est insérée)
+    """
+    if not rows:
+        return 0
+    columns = _check_columns(conn, table_name, rows[0])
+    if any(len(row) != len(columns) or not all(column in row for column in columns) for row in rows):
+        raise ValueError("Toutes les lignes d'un lot doivent avoir les mêmes colonnes")
+    try:
+        cursor = conn.executemany(insert_sql(table_name, columns),
+                                  [tuple(row[column] for column in columns) for row in rows])
+        if commit:
+            conn.commit()
+        return cursor.rowcount
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+def update_data(conn: sqlite3.Connection, table_name: str, id_to_modify: int, changes: dict[str, Any], commit: bool = True) -> int:
+    """Met à jour une ligne identifiée par sa clé primaire.
 
-def update_data(table_name: str, column_name: str, new_value: str|int|float|bool, id_to_modify: int, con: Connection = get_db()):
-    """Met à jour une valeur spécifique dans une table.
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        table_name (str): Nom de la table à modifier
+        id_to_modify (int): Valeur de la clé primaire de la ligne
+        changes (dict): Nouvelles valeurs, indexées par nom de colonne
+        commit (bool, optional): Valide la transaction. Defaults to True.
+
+    Returns:
+        int: Nombre de lignes modifiées (0 si l'identifiant n'existe pas)
+
+    Example:
+        >>> update_data(conn, "athlete", 1, {"name": "John Doe"})
+        1
+    """
+    return update_many(conn, table_name, [(id_to_modify, changes)], commit=commit)
+
+def update_many(conn: sqlite3.Connection, table_name: str, updates: list[tuple[int, dict[str, Any]]], commit: bool = True) -> int:
+    """Applique un lot de mises à jour en une seule transaction.
 
     Args:
+        conn (sqlite3.Connection): Connexion à la base de données
         table_name (str): Nom de la table à modifier
-        column_name (str): Nom de la colonne à modifier
-        new_value (str|int|float|bool): Nouvelle valeur à insérer
-        id_to_modify (int): ID de l'enregistrement à modifier
-        con (Connection, optional): Connexion à la base de données.
-            Defaults to get_db().
+        updates (list[tuple[int, dict]]): Couples (identifiant, modifications)
+        commit (bool, optional): Valide la transaction. Defaults to True.
+
+    Returns:
+        int: Nombre total de lignes modifiées
 
     Note:
-        - La fonction utilise l'ID comme critère de modification
-        - La connexion est automatiquement fermée après l'opération
+        Les mises à jour portant sur le même ensemble de colonnes sont
+        regroupées et exécutées avec un seul executemany.
+    """
+    if not updates:
+        return 0
+    _, primary_key = table_metadata(conn, table_name)
+    groups: dict[tuple[str, ...], list[tuple]] = {}
+    for id_to_modify, changes in updates:
+        columns = _check_columns(conn, table_name, changes)
+        groups.setdefault(columns, []).append((*(changes[column] for column in columns), id_to_modify))
+    try:
+        rowcount = 0
+        for columns, params in groups.items():
+            rowcount += conn.executemany(update_sql(table_name, columns, primary_key), params).rowcount
+        if commit:
+            conn.commit()
+        return rowcount
+    except sqlite3.Error:
+        conn.rollback()
+        raise
 
-    Raises:
-        Exception: Si une erreur survient pendant la mise à jour
+def delete_data(conn: sqlite3.Connection, table_name: str, id_to_delete: int, commit: bool = True) -> int:
+    """Supprime une ligne identifiée par sa clé primaire.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        table_name (str): Nom de la table
+        id_to_delete (int): Valeur de la clé primaire de la ligne
+        commit (bool, optional): Valide la transaction. Defaults to True.
+
+    Returns:
+        int: Nombre de lignes supprimées (0 si l'identifiant n'existe pas)
+
+    Note:
+        Cette opération est irréversible.
 
     Example:
-        >>> update_data("athlete", "name", "John Doe", 1)
-        # Met à jour le nom de l'athlète ayant l'ID 1
+        >>> delete_data(conn, "performance", 1)
+        1
     """
-    connexion = next(con)
-    try:
-        cursor = connexion.cursor()
-        query = f"UPDATE {table_name} SET {column_name} = {new_value} WHERE id = {id_to_modify}"
-        cursor.execute(query)
-        connexion.commit()
+    return delete_many(conn, table_name, [id_to_delete], commit=commit)
 
-    except Exception as e:
-        print(f"Error: {e}")
+def delete_many(conn: sqlite3.Connection, table_name: str, ids: list[int], commit: bool = True) -> int:
+    """Supprime un lot de lignes en une seule transaction.
 
-    finally:
-        con.close()
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        table_name (str): Nom de la table
+        ids (list[int]): Valeurs de clé primaire à supprimer
+        commit (bool, optional): Valide la transaction. Defaults to True.
 
-def delete_data(table_name: str, id_to_delete: int, con: Connection = get_db()):
-    """Supprime un enregistrement d'une table spécifiée.
+    Returns:
+        int: Nombre de lignes supprimées
+    """
+    if not ids:
+        return 0
+    _, primary_key = table_metadata(conn, table_name)
+    try:
+        cursor = conn.executemany(delete_sql(table_name, primary_key), [(id_to_delete,) for id_to_delete in ids])
+        if commit:
+            conn.commit()
+        return cursor.rowcount
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+def select_page(conn: sqlite3.Connection, table_name: str, filters: dict[str, Any] | None = None,
+                ranges: dict[str, tuple[Any, Any]] | None = None,
+                search: tuple[str, str] | None = None, sort_by: str | None = None, descending: bool = False,
+                limit: int | None = None, offset: int = 0,
+                scope: tuple[str, str, tuple] | None = None) -> tuple[list[str], list[tuple], int]:
+    """Lit une page de lignes filtrées et triées côté serveur.
 
     Args:
-        table_name (str): Nom de la table dans laquelle effectuer la suppression
-        id_to_delete (int): ID de l'enregistrement à supprimer
-        con (Connection, optional): Connexion à la base de données.
-            Defaults to get_db().
+        conn (sqlite3.Connection): Connexion à la base de données
+        table_name (str): Nom de la table
+        filters (dict, optional): Filtres d'égalité colonne -> valeur
+            (les valeurs None sont ignorées)
+        ranges (dict, optional): Filtres de plage colonne -> (minimum, maximum),
+            bornes incluses (une borne None est ignorée)
+        search (tuple[str, str], optional): Couple (colonne, texte) pour une
+            recherche LIKE '%texte%'
+        sort_by (str, optional): Colonne de tri. Defaults to la clé primaire.
+        descending (bool, optional): Tri décroissant. Defaults to False.
+        limit (int, optional): Taille de la page. None renvoie toutes les lignes.
+        offset (int, optional): Nombre de lignes à sauter. Defaults to 0.
+        scope (tuple[str, str, tuple], optional): Triplet (colonne, requête,
+            paramètres) restreignant les lignes à celles dont la colonne
+            figure dans le résultat de la requête (une requête enregistrée
+            de statements.py, jamais un texte saisi)
 
-    Note:
-        - La fonction utilise l'ID comme critère de suppression
-        - La connexion est automatiquement fermée après l'opération
-        - Cette opération est irréversible
+    Returns:
+        tuple: Un tuple contenant :
+            - columns (list[str]): Noms des colonnes
+            - rows (list[tuple]): Lignes de la page
+            - total (int): Nombre total de lignes correspondant aux filtres
 
     Raises:
-        Exception: Si une erreur survient pendant la suppression
+        ValueError: Si une colonne de filtre, de recherche ou de tri n'existe pas
 
-    Example:
-        >>> delete_data("performance", 1)
-        # Supprime la performance ayant l'ID 1
+    Note:
+        La clé primaire est ajoutée comme critère de tri secondaire afin que
+        la pagination reste stable lorsque la colonne de tri a des doublons.
     """
-    connexion = next(con)
+    _, primary_key = table_metadata(conn, table_name)
+    filters = {column: value for column, value in (filters or {}).items() if value is not None}
+    clauses, params = [], []
+    if filters:
+        for column in _check_columns(conn, table_name, filters, readable=True):
+            clauses.append(f"{column} = ?")
+            params.append(filters[column])
+    ranges = {column: bounds for column, bounds in (ranges or {}).items() if bounds != (None, None)}
+    if ranges:
+        for column in _check_columns(conn, table_name, ranges, readable=True):
+            for operator, bound in zip((">=", "<="), ranges[column]):
+                if bound is not None:
+                    clauses.append(f"{column} {operator} ?")
+                    params.append(bound)
+    if search and search[1]:
+        column = _check_columns(conn, table_name, [search[0]], readable=True)[0]
+        clauses.append(f"{column} LIKE ?")
+        params.append(f"%{search[1]}%")
+    if scope:
+        column = _check_columns(conn, table_name, [scope[0]])[0]
+        clauses.append(f"{column} IN ({scope[1]})")
+        params.extend(scope[2])
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    sort_by = _check_columns(conn, table_name, [sort_by], readable=True)[0] if sort_by else primary_key
+    direction = "DESC" if descending else "ASC"
+    order = f" ORDER BY {sort_by} {direction}" + (f", {primary_key}" if sort_by != primary_key else "")
+
+    total = conn.execute(f'SELECT COUNT(*) FROM "{table_name}"{where}', params).fetchone()[0]
+    query = f'SELECT * FROM "{table_name}"{where}{order}'
+    if limit is not None:
+        query += " LIMIT ? OFFSET ?"
+        params += [limit, offset]
+    cursor = conn.cursor()
+    cursor.row_factory = None
     try:
-        cursor = connexion.cursor()
-        query = f"DELETE FROM {table_name} WHERE id = {id_to_delete}"
-        cursor.execute(query)
-        connexion.commit()
+        cursor.execute(query, params)
+        columns = [description[0] for description in cursor.description]
+        return columns, cursor.fetchall(), total
+    finally:
+        cursor.close()
 
-    except Exception as e:
-        print(f"Error: {e}")
+def match_expression(text: str) -> str | None:
+    """Convertit un texte saisi en expression MATCH FTS5 (préfixes de mots, tous requis).
 
+    Chaque mot est mis entre guillemets : les opérateurs et caractères
+    spéciaux de la syntaxe FTS5 saisis par l'utilisateur restent du texte.
+
+    Args:
+        text (str): Texte recherché (ex: "emi zol")
+
+    Returns:
+        str | None: Expression (ex: '"emi"* "zol"*'), ou None si le texte
+        ne contient aucun mot
+    """
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{word}"*' for word in words) or None
+
+def search_athletes(conn: sqlite3.Connection, text: str, limit: int = 20, offset: int = 0,
+                    coach_id: int | None = None) -> tuple[list[str], list[tuple], int]:
+    """Recherche plein texte des athlètes (nom, nom et email du compte), par pertinence.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        text (str): Texte recherché, chaque mot étant un préfixe
+        limit (int, optional): Taille de la page. Defaults to 20.
+        offset (int, optional): Nombre de lignes à sauter. Defaults to 0.
+        coach_id (int, optional): Restreint la recherche aux athlètes de ce coach
+
+    Returns:
+        tuple: Un tuple contenant :
+            - columns (list[str]): Colonnes de athlete, puis email et score
+            - rows (list[tuple]): Athlètes de la page, les plus pertinents d'abord
+            - total (int): Nombre total d'athlètes correspondants
+    """
+    expression = match_expression(text)
+    if expression is None:
+        return [], [], 0
+    if coach_id is None:
+        total = conn.execute(statement("athlete.search_count"), (expression,)).fetchone()[0]
+        query, params = statement("athlete.search"), (expression, limit, offset)
+    else:
+        total = conn.execute(statement("athlete.search_count_for_coach"), (expression, coach_id)).fetchone()[0]
+        query, params = statement("athlete.search_for_coach"), (expression, coach_id, limit, offset)
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    try:
+        cursor.execute(query, params)
+        columns = [description[0] for description in cursor.description]
+        return columns, cursor.fetchall(), total
     finally:
-        con.close()
+        cursor.close()
 
 if __name__ == "__main__":
     """
     Point d'entrée du script pour les tests.
     Exemple d'insertion de données de performance.
     """
-    values = ("4650", "180", "200", 360, 134, 286, 333, "sub_1")
-    insert_data("performance", values)
\ No newline at end of file
+    from database import connect
+
+    connexion = connect()
+    values = {"vo2max": 4650, "hr_max": 180, "cadence_max": 200, "ppo": 360,
+              "p1": 134, "p2": 286, "p3": 333, "athlete_id": 1}
+    print(insert_data(connexion, "performance", values))
+    connexion.close()
@@ -0,0 +1,108 @@
+"""
+Jetons de renouvellement (refresh tokens) des tokens d'accès.
+
+À la connexion (/user/auth), l'API retourne, en plus du token d'accès JWT
+de courte durée, un jeton de renouvellement opaque et aléatoire. Lorsque le
+token d'accès expire, le client l'échange sur /user/refresh contre un
+nouveau couple de jetons, sans renvoyer le mot de passe : aucune
+vérification bcrypt n'est faite.
+
+    - seule l'empreinte SHA-256 du jeton est enregistrée (table refresh_token) ;
+      le jeton, aléatoire sur 256 bits, n'a pas besoin d'un hachage lent
+    - rotation : chaque jeton ne sert qu'une fois, par une seule instruction
+      UPDATE ... RETURNING sur l'index unique de son empreinte
+    - révocation : les jetons issus d'une même connexion forment une lignée
+      (family) ; la déconnexion révoque la lignée, et la réutilisation d'un
+      jeton déjà consommé (jeton volé ou rejoué) la révoque aussi
+"""
+
+import hashlib
+import os
+import secrets
+import sqlite3
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from queries import to_utc_iso
+from statements import statement
+
+# Durée de validité (jours) d'un jeton de renouvellement
+REFRESH_TOKEN_EXPIRE_DAYS = float(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 14))
+
+def hash_token(token: str) -> str:
+    """Empreinte SHA-256 (hexadécimale) d'un jeton."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def issue(conn: sqlite3.Connection, user_id: int, family: str | None = None, commit: bool = True) -> str:
+    """Crée un jeton de renouvellement pour un utilisateur.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        user_id (int): Identifiant de l'utilisateur
+        family (str, optional): Lignée du jeton consommé lors d'une rotation.
+            Par défaut, une nouvelle lignée (nouvelle connexion).
+        commit (bool, optional): Valide la transaction. Defaults to True.
+
+    Returns:
+        str: Jeton en clair, à transmettre au client (il n'est pas conservé)
+    """
+    token = secrets.token_urlsafe(32)
+    now = datetime.now(timezone.utc)
+    # Les jetons expirés de l'utilisateur sont purgés au passage (index sur user_id)
+    conn.execute(statement("refresh_token.prune_user"), (user_id, to_utc_iso(now)))
+    conn.execute(statement("refresh_token.insert"), (
+        user_id, hash_token(token), family or uuid.uuid4().hex, to_utc_iso(now),
+        to_utc_iso(now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))))
+    if commit:
+        conn.commit()
+    return token
+
+def rotate(conn: sqlite3.Connection, token: str) -> tuple[str, str] | None:
+    """Consomme un jeton et le remplace par un nouveau jeton de la même lignée.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        token (str): Jeton présenté par le client
+
+    Returns:
+        tuple[str, str] | None: Email du titulaire et nouveau jeton, ou None
+        si le jeton est inconnu, expiré ou révoqué
+
+    Note:
+        La présentation d'un jeton déjà consommé révoque toute sa lignée :
+        le client légitime comme un éventuel voleur devront se reconnecter.
+    """
+    token_hash = hash_token(token)
+    now = to_utc_iso(datetime.now(timezone.utc))
+    try:
+        row = conn.execute(statement("refresh_token.consume"), (now, token_hash, now)).fetchone()
+        if row is None:
+            known = conn.execute(statement("refresh_token.family"), (token_hash,)).fetchone()
+            if known is not None:
+                conn.execute(statement("refresh_token.revoke_family"), (now, known[0]))
+            conn.commit()
+            return None
+        user_id, family, email = row
+        new_token = issue(conn, user_id, family, commit=False)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    return email, new_token
+
+def revoke(conn: sqlite3.Connection, token: str) -> bool:
+    """Révoque la lignée d'un jeton (déconnexion).
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        token (str): Jeton présenté par le client
+
+    Returns:
+        bool: True si le jeton était connu
+    """
+    known = conn.execute(statement("refresh_token.family"), (hash_token(token),)).fetchone()
+    if known is None:
+        return False
+    conn.execute(statement("refresh_token.revoke_family"), (to_utc_iso(datetime.now(timezone.utc)), known[0]))
+    conn.commit()
+    return True
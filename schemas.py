@@ -6,7 +6,7 @@ la validation des données entrantes. Il définit les structures de données
 attendues pour les différentes opérations de l'API.
 """
 
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, field_validator
 from typing import Literal
 
 class CreateUserRequest(BaseModel):
@@ -17,7 +17,7 @@ class CreateUserRequest(BaseModel):
 
     Attributes:
         name (str): Nom et prénom de l'utilisateur
-        email (EmailStr): Adresse email valide de l'utilisateur
+        email (EmailStr): Adresse email valide de l'utilisateur, enregistrée en minuscules
         password (str): Mot de passe avec une longueur minimale de 8 caractères
         password_confirmation (str): Confirmation du mot de passe
         role (str): Rôle de l'utilisateur (coach ou athlete)
@@ -64,6 +64,12 @@ class CreateUserRequest(BaseModel):
         example="athlete"
     )
 
+    @field_validator("email")
+    @classmethod
+    def normalize_email(cls, value: str) -> str:
+        """Enregistre l'email en minuscules (unicité insensible à la casse)."""
+        return value.lower()
+
     class Config:
         """Configuration du schéma avec un exemple complet.
 
@@ -104,4 +110,58 @@ class CreateUserRequest(BaseModel):
         """
         if self.role not in ["coach", "athlete"]:
             raise ValueError("Le rôle doit être 'coach' ou 'athlete'")
-        return True
\ No newline at end of file
+        return True
+
+class RosterEntry(BaseModel):
+    """Schéma d'un athlète d'une liste d'inscription (onboarding en masse).
+
+    Chaque entrée crée un compte utilisateur (rôle athlete) et le profil
+    athlète associé.
+
+    Attributes:
+        name (str): Nom et prénom
+        email (EmailStr, optional): Adresse email. Par défaut, dérivée du nom
+            (onboarding.ONBOARDING_EMAIL_DOMAIN)
+        password (str, optional): Mot de passe (8 caractères minimum). Par
+            défaut, un mot de passe temporaire est généré et retourné
+        gender (str): Genre (male ou female)
+        age (int): Âge
+        weight (float): Poids en kg
+        height (float): Taille en m
+    """
+
+    name: str = Field(min_length=1)
+    email: EmailStr | None = None
+    password: str | None = Field(None, min_length=8)
+    gender: Literal["male", "female"]
+    age: int = Field(gt=0)
+    weight: float = Field(gt=0)
+    height: float = Field(gt=0)
+
+    @field_validator("email")
+    @classmethod
+    def normalize_email(cls, value: str | None) -> str | None:
+        """Enregistre l'email en minuscules (unicité insensible à la casse)."""
+        return value.lower() if value else value
+
+class RosterRequest(BaseModel):
+    """Schéma d'une liste d'inscription envoyée en JSON.
+
+    Attributes:
+        athletes (list[dict]): Entrées de la liste (cf. RosterEntry), validées
+            une à une : une entrée invalide est écartée sans bloquer le lot
+        defaults (dict): Valeurs utilisées pour les champs absents d'une entrée
+    """
+
+    athletes: list[dict] = Field(min_length=1)
+    defaults: dict = {}
+
+class RefreshRequest(BaseModel):
+    """Schéma d'une demande de renouvellement (ou de révocation) de token.
+
+    Attributes:
+        refresh_token (str): Jeton de renouvellement obtenu à la connexion
+            ou au dernier renouvellement
+    """
+
+    refresh_token: str = Field(min_length=1)
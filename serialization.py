@@ -0,0 +1,259 @@
+"""
+Module de sérialisation rapide des résultats SQL pour l'API de cyclisme.
+
+Les handlers renvoyaient jusqu'ici des listes de sqlite3.Row que FastAPI
+convertissait ligne par ligne via jsonable_encoder. Ce module fournit un
+chemin optimisé :
+- les lignes sont récupérées sous forme de tuples (pas de row_factory Python)
+- la conversion en dictionnaires se fait avec map/zip (boucles en C)
+- l'encodage JSON utilise orjson lorsqu'il est installé, json sinon
+- la réponse est une Response brute, sans passer par jsonable_encoder
+
+Deux formes de réponse sont disponibles :
+    - "records" : [{"col": val, ...}, ...] (forme historique)
+    - "columns" : {"columns": [...], "data": [[...], ...]} (plus compacte)
+
+Négociation de contenu (en-têtes Accept / Accept-Encoding) :
+    - application/json (défaut)
+    - application/msgpack : MessagePack, si le module msgpack est installé
+    - application/vnd.apache.arrow.stream : flux Arrow IPC, si pyarrow est installé
+    - compression br (brotli) ou gzip au-delà de COMPRESSION_MIN_SIZE octets
+"""
+
+import gzip
+import importlib.util
+import io
+import json
+import os
+from itertools import repeat
+from typing import Any, Literal
+
+from fastapi import Query, Request, Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    msgpack = None
+
+# pyarrow (et numpy, qu'il importe) représente l'essentiel du temps d'import
+# de l'API : sa présence est vérifiée sans l'importer, l'import n'a lieu
+# qu'à la première réponse Arrow
+ARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    brotli = None
+
+# Taille minimale (octets) à partir de laquelle le corps est compressé
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 5))
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+RowShape = Literal["records", "columns"]
+
+# Paramètre de requête commun aux routes de liste
+shape_query = Query(
+    "records",
+    description="Forme de la réponse : 'records' (liste d'objets) ou 'columns' (colonnes + données)",
+)
+
+class PageParams:
+    """Paramètres de pagination et de tri communs aux routes de liste.
+
+    Attributes:
+        limit (int | None): Taille de la page (None : toutes les lignes)
+        offset (int): Nombre de lignes à sauter
+        sort (str | None): Colonne de tri
+        descending (bool): Tri décroissant
+    """
+
+    def __init__(
+        self,
+        limit: int | None = Query(None, ge=1, le=1000, description="Taille de la page"),
+        offset: int = Query(0, ge=0, description="Nombre de lignes à sauter"),
+        sort: str | None = Query(None, description="Colonne de tri"),
+        order: Literal["asc", "desc"] = Query("asc", description="Sens du tri"),
+    ):
+        self.limit = limit
+        self.offset = offset
+        self.sort = sort
+        self.descending = order == "desc"
+
+    def as_kwargs(self) -> dict:
+        """Arguments à transmettre à queries.select_page."""
+        return {"sort_by": self.sort, "descending": self.descending,
+                "limit": self.limit, "offset": self.offset}
+
+def encode_json(content: Any) -> bytes:
+    """Encode un objet Python en JSON (bytes).
+
+    Args:
+        content (Any): Objet à encoder (dict, list, tuple, types simples)
+
+    Returns:
+        bytes: Document JSON encodé en UTF-8
+
+    Note:
+        Utilise orjson si disponible (encodeur en Rust, plusieurs fois plus
+        rapide), sinon le module json de la bibliothèque standard.
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def rows_payload(columns: list[str], rows: list[tuple], shape: RowShape = "records") -> Any:
+    """Construit le contenu JSON à partir des colonnes et des lignes.
+
+    Args:
+        columns (list[str]): Noms des colonnes
+        rows (list[tuple]): Lignes de résultat
+        shape (str): "records" ou "columns"
+
+    Returns:
+        list | dict: Liste de dictionnaires ("records") ou
+        dictionnaire {"columns": [...], "data": [...]} ("columns")
+
+    Raises:
+        ValueError: Si la forme demandée n'est pas supportée
+    """
+    if shape == "columns":
+        return {"columns": columns, "data": rows}
+    if shape == "records":
+        return list(map(dict, map(zip, repeat(columns), rows)))
+    raise ValueError(f"Forme de réponse inconnue : {shape}")
+
+def parse_header_values(header: str | None) -> list[str]:
+    """Extrait les valeurs d'un en-tête Accept* triées par préférence (q).
+
+    Args:
+        header (str | None): Valeur brute de l'en-tête (ex: "br;q=1.0, gzip;q=0.8")
+
+    Returns:
+        list[str]: Valeurs en minuscules, de la plus à la moins préférée.
+        Les valeurs avec q=0 sont exclues.
+    """
+    if not header:
+        return []
+    weighted = []
+    for position, item in enumerate(header.split(",")):
+        value, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, raw = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(raw)
+                except ValueError:
+                    quality = 0.0
+        if value and quality > 0:
+            weighted.append((-quality, position, value.strip().lower()))
+    return [value for _, _, value in sorted(weighted)]
+
+def negotiate_media_type(request: Request) -> str:
+    """Choisit le format du corps en fonction de l'en-tête Accept.
+
+    Args:
+        request (Request): Requête HTTP entrante
+
+    Returns:
+        str: Type MIME retenu. application/json si aucun format compact
+        demandé n'est disponible sur le serveur.
+    """
+    available = {JSON_MEDIA_TYPE: True, "application/*": True, "*/*": True,
+                 MSGPACK_MEDIA_TYPE: msgpack is not None,
+                 "application/x-msgpack": msgpack is not None,
+                 ARROW_MEDIA_TYPE: ARROW_AVAILABLE}
+    for media_type in parse_header_values(request.headers.get("accept")):
+        if available.get(media_type):
+            if media_type == "application/x-msgpack":
+                return MSGPACK_MEDIA_TYPE
+            if media_type in ("application/*", "*/*"):
+                return JSON_MEDIA_TYPE
+            return media_type
+    return JSON_MEDIA_TYPE
+
+def encode_arrow(columns: list[str], rows: list[tuple]) -> bytes:
+    """Encode des lignes en flux Arrow IPC.
+
+    Args:
+        columns (list[str]): Noms des colonnes
+        rows (list[tuple]): Lignes de résultat
+
+    Returns:
+        bytes: Flux Arrow IPC (un seul record batch)
+    """
+    import pyarrow
+    import pyarrow.ipc
+
+    values = list(map(list, zip(*rows))) if rows else [[] for _ in columns]
+    table = pyarrow.table(dict(zip(columns, values)))
+    sink = io.BytesIO()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+def compress_body(body: bytes, request: Request) -> tuple[bytes, str | None]:
+    """Compresse le corps selon Accept-Encoding si sa taille le justifie.
+
+    Args:
+        body (bytes): Corps de la réponse
+        request (Request): Requête HTTP entrante
+
+    Returns:
+        tuple: Un tuple contenant :
+            - body (bytes): Corps éventuellement compressé
+            - encoding (str | None): Valeur de Content-Encoding, ou None
+    """
+    if len(body) < COMPRESSION_MIN_SIZE:
+        return body, None
+    for encoding in parse_header_values(request.headers.get("accept-encoding")):
+        if encoding == "br" and brotli is not None:
+            return brotli.compress(body, quality=BROTLI_QUALITY), "br"
+        if encoding == "gzip":
+            return gzip.compress(body, compresslevel=GZIP_LEVEL), "gzip"
+    return body, None
+
+def negotiated_response(request: Request, columns: list[str], rows: list[tuple],
+                        shape: RowShape = "records", key: str | None = None,
+                        headers: dict[str, str] | None = None) -> Response:
+    """Construit la réponse dans le format et l'encodage demandés par le client.
+
+    Args:
+        request (Request): Requête HTTP entrante
+        columns (list[str]): Noms des colonnes
+        rows (list[tuple]): Lignes de résultat
+        shape (str): "records" ou "columns" (ignoré pour Arrow)
+        key (str, optional): Clé d'encapsulation du contenu (JSON/MessagePack)
+        headers (dict, optional): En-têtes supplémentaires (ex: X-Total-Count)
+
+    Returns:
+        Response: Réponse avec les en-têtes Content-Type, Content-Encoding
+        et Vary positionnés
+    """
+    media_type = negotiate_media_type(request)
+    if media_type == ARROW_MEDIA_TYPE:
+        body = encode_arrow(columns, rows)
+    else:
+        content = rows_payload(columns, rows, shape)
+        if key is not None:
+            content = {key: content}
+        if media_type == MSGPACK_MEDIA_TYPE:
+            body = msgpack.packb(content)
+        else:
+            body = encode_json(content)
+
+    body, encoding = compress_body(body, request)
+    headers = {**(headers or {}), "Vary": "Accept, Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,54 @@
+"""
+Lanceur de l'API en mode multi-processus.
+
+Démarre plusieurs workers uvicorn (processus indépendants, chacun avec son
+exécuteur SQLite et ses caches) derrière le même port, et exécute les
+tâches de fond (jobs.py) dans le processus superviseur plutôt que dans
+chaque worker HTTP.
+
+Les caches des workers restent cohérents sans service externe : chaque
+écriture publie ses invalidations dans la table cache_event, que les
+autres workers lisent avant de servir un cache (coherence.py).
+
+Usage :
+    python serve.py [--workers 4] [--host 127.0.0.1] [--port 8000] [--job-workers 2]
+"""
+
+import argparse
+import os
+
+import uvicorn
+
+from database import init_db
+
+# Nombre de workers HTTP par défaut (un par cœur)
+API_WORKERS = int(os.getenv("API_WORKERS", os.cpu_count() or 1))
+
+def main():
+    parser = argparse.ArgumentParser(description="API de gestion de cyclisme, mode multi-processus")
+    parser.add_argument("--workers", type=int, default=API_WORKERS, help="nombre de workers HTTP")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "127.0.0.1"), help="adresse d'écoute")
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", 8000)), help="port d'écoute")
+    parser.add_argument("--job-workers", type=int, default=int(os.getenv("JOB_WORKERS", 2)),
+                        help="threads des tâches de fond, dans le superviseur (0 : aucun)")
+    args = parser.parse_args()
+
+    # Le schéma est créé une seule fois, avant le démarrage des workers
+    init_db()
+    # Les workers HTTP (nouveaux interpréteurs) héritent de l'environnement :
+    # ils ne démarrent pas leur propre pool de tâches
+    os.environ["JOB_WORKERS"] = "0"
+    pool = None
+    if args.job_workers > 0:
+        from jobs import JobWorkerPool
+
+        pool = JobWorkerPool(args.job_workers)
+        pool.start()
+    try:
+        uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers)
+    finally:
+        if pool:
+            pool.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Sketch de quantiles KLL (Karnin, Lang, Liberty) en pur Python.
+
+Un sketch résume un flux de valeurs numériques en mémoire bornée
+(quelques centaines de valeurs quel que soit le volume) et répond aux
+questions de rang et de quantile avec une erreur de rang bornée, de
+l'ordre de 1/k (environ 1 % pour k=200).
+
+Principe : les valeurs sont rangées par niveaux (compacteurs). Une valeur
+du niveau h représente 2**h valeurs du flux. Lorsqu'un niveau dépasse sa
+capacité, il est trié et une valeur sur deux (paires ou impaires, au
+hasard) est promue au niveau supérieur, ce qui divise sa taille par deux.
+
+Les sketches sont fusionnables (merge) : un sketch par lot, par processus
+ou par période peut être combiné sans relire les données.
+"""
+
+import math
+import random
+from bisect import bisect_left, bisect_right
+from typing import Iterable
+
+class KLLSketch:
+    """Sketch de quantiles fusionnable.
+
+    Attributes:
+        k (int): Paramètre de précision (taille du niveau le plus haut)
+        n (int): Nombre de valeurs résumées
+        min (float | None): Plus petite valeur vue (exacte)
+        max (float | None): Plus grande valeur vue (exacte)
+    """
+
+    def __init__(self, k: int = 200, c: float = 2 / 3, seed: int | None = None):
+        self.k = k
+        self.c = c
+        self.n = 0
+        self.min: float | None = None
+        self.max: float | None = None
+        self._levels: list[list[float]] = [[]]
+        self._size = 0
+        self._max_size = self._capacity(0)
+        self._random = random.Random(seed)
+        # Table cumulée (valeurs triées, poids cumulés), reconstruite à la demande
+        self._table: tuple[list[float], list[int]] | None = None
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return max(2, math.ceil(self.k * self.c ** depth))
+
+    def _grow(self):
+        self._levels.append([])
+        self._max_size = sum(self._capacity(level) for level in range(len(self._levels)))
+
+    def _compress(self):
+        """Compacte les niveaux pleins jusqu'à repasser sous la taille maximale."""
+        for level in range(len(self._levels)):
+            if len(self._levels[level]) >= self._capacity(level):
+                if level + 1 >= len(self._levels):
+                    self._grow()
+                items = sorted(self._levels[level])
+                # Un nombre impair de valeurs laisse la plus grande au niveau courant
+                keep = [items.pop()] if len(items) % 2 else []
+                self._levels[level + 1].extend(items[self._random.getrandbits(1)::2])
+                self._levels[level] = keep
+                self._size = sum(len(items) for items in self._levels)
+                if self._size < self._max_size:
+                    break
+
+    def update(self, value: float):
+        """Ajoute une valeur au sketch."""
+        self.update_many((value,))
+
+    def update_many(self, values: Iterable[float]):
+        """Ajoute un lot de valeurs (les None sont ignorées).
+
+        Les valeurs sont versées au premier niveau par paquets qui tiennent
+        dans la capacité restante, ce qui évite une compaction par valeur
+        lors d'une reconstruction en masse.
+        """
+        values = [value for value in values if value is not None]
+        if not values:
+            return
+        self._table = None
+        self.n += len(values)
+        low, high = min(values), max(values)
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        start = 0
+        while start < len(values):
+            room = max(1, self._max_size - self._size)
+            chunk = values[start:start + room]
+            self._levels[0].extend(chunk)
+            self._size += len(chunk)
+            start += len(chunk)
+            if self._size >= self._max_size:
+                self._compress()
+
+    def merge(self, other: "KLLSketch"):
+        """Fusionne un autre sketch dans celui-ci.
+
+        Args:
+            other (KLLSketch): Sketch à fusionner (non modifié)
+        """
+        if not other.n:
+            return
+        while len(self._levels) < len(other._levels):
+            self._grow()
+        for level, items in enumerate(other._levels):
+            self._levels[level].extend(items)
+        self._size = sum(len(items) for items in self._levels)
+        self.n += other.n
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self._table = None
+        while self._size >= self._max_size:
+            size = self._size
+            self._compress()
+            if self._size == size:
+                self._grow()
+
+    def _cumulative(self) -> tuple[list[float], list[int]]:
+        if self._table is None:
+            weighted = sorted((value, 1 << level) for level, items in enumerate(self._levels) for value in items)
+            values, cumulative, total = [], [], 0
+            for value, weight in weighted:
+                total += weight
+                values.append(value)
+                cumulative.append(total)
+            self._table = (values, cumulative)
+        return self._table
+
+    def rank(self, value: float, inclusive: bool = True) -> float:
+        """Nombre estimé de valeurs inférieures (ou égales) à value.
+
+        Args:
+            value (float): Valeur de référence
+            inclusive (bool, optional): Compte aussi les valeurs égales. Defaults to True.
+
+        Returns:
+            float: Rang estimé, ramené à l'échelle de n
+        """
+        if not self.n:
+            return 0.0
+        if self.max is not None and value >= self.max and inclusive:
+            return float(self.n)
+        values, cumulative = self._cumulative()
+        position = (bisect_right if inclusive else bisect_left)(values, value)
+        if position == 0:
+            return 0.0
+        # Les poids totaux peuvent différer légèrement de n après compaction
+        return cumulative[position - 1] * self.n / cumulative[-1]
+
+    def cdf(self, value: float) -> float:
+        """Fraction estimée des valeurs inférieures ou égales à value (entre 0 et 1)."""
+        return self.rank(value) / self.n if self.n else 0.0
+
+    def quantile(self, q: float) -> float | None:
+        """Valeur estimée du quantile q (0 <= q <= 1).
+
+        Returns:
+            float | None: Quantile estimé, None si le sketch est vide
+        """
+        if not self.n:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        values, cumulative = self._cumulative()
+        target = q * cumulative[-1]
+        return values[min(bisect_left(cumulative, target), len(values) - 1)]
+
+    def histogram(self, edges: list[float]) -> list[int]:
+        """Effectifs estimés entre des bornes croissantes (dernière classe fermée à droite).
+
+        Args:
+            edges (list[float]): Bornes des classes (au moins deux)
+
+        Returns:
+            list[int]: Un effectif par classe (len(edges) - 1 valeurs)
+        """
+        ranks = [self.rank(edge, inclusive=False) for edge in edges[:-1]] + [self.rank(edges[-1])]
+        return [round(high - low) for low, high in zip(ranks, ranks[1:])]
+
+    def copy(self) -> "KLLSketch":
+        """Copie indépendante du sketch (lecture pendant que l'original évolue)."""
+        sketch = KLLSketch.from_dict(self.to_dict())
+        sketch._table = self._table
+        return sketch
+
+    def to_dict(self) -> dict:
+        """Représentation sérialisable (JSON) du sketch."""
+        return {"k": self.k, "c": self.c, "n": self.n, "min": self.min, "max": self.max,
+                "levels": [list(items) for items in self._levels]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "KLLSketch":
+        """Reconstruit un sketch à partir de to_dict()."""
+        sketch = cls(k=data["k"], c=data["c"])
+        sketch._levels = [[]]
+        for _ in range(len(data["levels"]) - 1):
+            sketch._grow()
+        sketch._levels = [list(items) for items in data["levels"]]
+        sketch._size = sum(len(items) for items in sketch._levels)
+        sketch.n, sketch.min, sketch.max = data["n"], data["min"], data["max"]
+        return sketch
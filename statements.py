@@ -0,0 +1,455 @@
+"""
+Registre central des requêtes SQL nommées et suivi du cache de statements.
+
+sqlite3 garde, par connexion, un cache LRU des requêtes déjà préparées
+(paramètre cached_statements, 128 par défaut). Ce cache n'est utile que si :
+    - les connexions vivent longtemps (cf. DBExecutor dans database.py)
+    - le texte SQL est strictement identique d'un appel à l'autre
+    - le cache est assez grand pour contenir toutes les requêtes chaudes
+
+Ce module fournit :
+    - STATEMENTS : les requêtes des handlers, indexées par un nom stable
+    - warm_statements : prépare ces requêtes (et les requêtes CRUD de
+      queries.py) à l'ouverture de chaque connexion du pool
+    - TrackedConnection : connexion qui compte, en miroir du cache LRU de
+      sqlite3, les préparations (parse) et les réutilisations (reuse)
+"""
+
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Taille du cache de statements de chaque connexion
+DB_CACHED_STATEMENTS = int(os.getenv("DB_CACHED_STATEMENTS", 256))
+
+# Colonnes numériques de la table performance couvertes par les statistiques
+STATS_METRICS = ("vo2max", "hr_max", "rf_max", "cadence_max", "ppo", "p1", "p2", "p3")
+# Métriques dérivées du poids de l'athlète, tenues à jour par triggers (cf. database.create_derived_metrics)
+DERIVED_METRICS = ("power_to_weight", "vo2max_abs")
+
+# Agrégats par athlète de toutes les métriques (min, moyenne, max et nombre de mesures)
+_SUMMARY_SELECT = (
+    "SELECT p.athlete_id, a.name, COUNT(*) AS count, "
+    + ", ".join(f"MIN(p.{metric}) AS {metric}_min, AVG(p.{metric}) AS {metric}_mean, MAX(p.{metric}) AS {metric}_max"
+                for metric in STATS_METRICS)
+    + "".join(f", MIN(p.{metric}) AS {metric}_min, AVG(p.{metric}) AS {metric}_mean, MAX(p.{metric}) AS {metric}_max"
+              for metric in DERIVED_METRICS)
+    + " FROM performance p JOIN athlete a ON a.athlete_id = p.athlete_id"
+)
+
+STATEMENTS: dict[str, str] = {
+    # Utilisateurs
+    # Emails comparés sans casse (index unique idx_user_email_lower sur lower(email))
+    "user.by_email": "SELECT * FROM user WHERE lower(email) = lower(?)",
+    "user.email_exists": "SELECT email FROM user WHERE lower(email) = lower(?)",
+    "user.list": "SELECT user_id, name, email, role FROM user",
+    "user.by_id": "SELECT user_id, name, email, role FROM user WHERE user_id = ?",
+    "user.update_password": "UPDATE user SET password = ? WHERE user_id = ?",
+    # Recherche groupée d'une liste d'emails (tableau JSON) par l'index unique sur email
+    "user.existing_emails": "SELECT lower(email) FROM user WHERE lower(email) IN (SELECT lower(value) FROM json_each(?))",
+    "user.ids_by_email": (
+        "SELECT lower(email), user_id FROM user WHERE lower(email) IN (SELECT lower(value) FROM json_each(?))"
+    ),
+    # Athlètes
+    "athlete.list": "SELECT * FROM athlete",
+    "athlete.by_id": "SELECT * FROM athlete WHERE athlete_id = ?",
+    "athlete.by_name": "SELECT athlete_id, weight FROM athlete WHERE name = ?",
+    "athlete.ids_for_user": "SELECT athlete_id FROM athlete WHERE user_id = ?",
+    # Nombre d'athlètes d'une liste (tableau JSON) rattachés à l'utilisateur
+    "athlete.count_owned": (
+        "SELECT COUNT(*) FROM athlete WHERE user_id = ? AND athlete_id IN (SELECT value FROM json_each(?))"
+    ),
+    # Recherche plein texte (table FTS5 athlete_search, rowid = athlete_id), classée par bm25
+    "athlete.search": (
+        "SELECT a.*, s.email, round(s.rank, 4) AS score FROM athlete_search s"
+        " JOIN athlete a ON a.athlete_id = s.rowid"
+        " WHERE athlete_search MATCH ? ORDER BY s.rank LIMIT ? OFFSET ?"
+    ),
+    "athlete.search_count": "SELECT COUNT(*) FROM athlete_search WHERE athlete_search MATCH ?",
+    "athlete.search_for_coach": (
+        "SELECT a.*, s.email, round(s.rank, 4) AS score FROM athlete_search s"
+        " JOIN athlete a ON a.athlete_id = s.rowid"
+        " WHERE athlete_search MATCH ? AND s.rowid IN (SELECT athlete_id FROM coach_athlete WHERE coach_id = ?)"
+        " ORDER BY s.rank LIMIT ? OFFSET ?"
+    ),
+    "athlete.search_count_for_coach": (
+        "SELECT COUNT(*) FROM athlete_search WHERE athlete_search MATCH ?"
+        " AND rowid IN (SELECT athlete_id FROM coach_athlete WHERE coach_id = ?)"
+    ),
+    # Athlètes d'un coach : parcours de la clé primaire (coach_id, athlete_id) de coach_athlete
+    "athlete.list_for_coach": (
+        "SELECT a.* FROM coach_athlete ca JOIN athlete a ON a.athlete_id = ca.athlete_id"
+        " WHERE ca.coach_id = ? ORDER BY ca.athlete_id"
+    ),
+    # Performances
+    "performance.list": "SELECT * FROM performance",
+    "performance.athlete_of": "SELECT athlete_id FROM performance WHERE performance_id = ?",
+    # Athlète de chaque performance d'un lot (tableau JSON d'identifiants)
+    "performance.athletes_of": (
+        "SELECT performance_id, athlete_id FROM performance"
+        " WHERE performance_id IN (SELECT value FROM json_each(?))"
+    ),
+    "performance.best_ppo": "SELECT MAX(ppo) FROM performance WHERE athlete_id = ?",
+    "performance.exists_at": "SELECT 1 FROM performance WHERE athlete_id = ? AND tested_at = ?",
+    # Historique : parcours de plage sur l'index (athlete_id, tested_at)
+    "performance.history": (
+        f"SELECT performance_id, tested_at, {', '.join(STATS_METRICS)} FROM performance"
+        " WHERE athlete_id = ? AND tested_at >= ? AND tested_at <= ? ORDER BY tested_at"
+    ),
+    # Tests précédant la plage (amorce des moyennes glissantes)
+    "performance.history_before": (
+        f"SELECT performance_id, tested_at, {', '.join(STATS_METRICS)} FROM performance"
+        " WHERE athlete_id = ? AND tested_at < ? ORDER BY tested_at DESC LIMIT ?"
+    ),
+    # Performances des profils athlète d'un utilisateur (index idx_performance_athlete_tested)
+    "performance.list_for_user": (
+        "SELECT p.* FROM athlete a JOIN performance p ON p.athlete_id = a.athlete_id"
+        " WHERE a.user_id = ? ORDER BY p.performance_id"
+    ),
+    "performance.list_for_coach": (
+        "SELECT p.* FROM coach_athlete ca JOIN performance p ON p.athlete_id = ca.athlete_id"
+        " WHERE ca.coach_id = ? ORDER BY p.performance_id"
+    ),
+    # Affectation des athlètes aux coachs (cf. coaching.py)
+    "coach_athlete.assign": "INSERT OR IGNORE INTO coach_athlete (coach_id, athlete_id, assigned_at) VALUES (?, ?, ?)",
+    "coach_athlete.unassign": "DELETE FROM coach_athlete WHERE coach_id = ? AND athlete_id = ?",
+    "coach_athlete.athlete_ids": "SELECT athlete_id FROM coach_athlete WHERE coach_id = ?",
+    # Nombre d'athlètes d'une liste (tableau JSON) affectés au coach
+    "coach_athlete.count_assigned": (
+        "SELECT COUNT(*) FROM coach_athlete WHERE coach_id = ? AND athlete_id IN (SELECT value FROM json_each(?))"
+    ),
+    "coach_athlete.coaches": (
+        "SELECT u.user_id, u.name, u.email, ca.assigned_at FROM coach_athlete ca"
+        " JOIN user u ON u.user_id = ca.coach_id WHERE ca.athlete_id = ? ORDER BY u.user_id"
+    ),
+    # Statistiques
+    "stats.vo2max": "SELECT p.athlete_id, a.name, MAX(p.vo2max) AS vo2max FROM performance p JOIN athlete a ON a.athlete_id = p.athlete_id",
+    "stats.ppo": "SELECT p.athlete_id, a.name, MAX(p.ppo) AS ppo FROM performance p JOIN athlete a ON a.athlete_id = p.athlete_id",
+    "stats.weightpower": "SELECT p.athlete_id, a.name, MAX(p.power_to_weight) AS power_to_weight FROM performance p JOIN athlete a ON a.athlete_id = p.athlete_id",
+    # Mêmes maxima restreints aux athlètes visibles (tableau JSON en paramètre)
+    "stats.vo2max_for_athletes": (
+        "SELECT p.athlete_id, a.name, MAX(p.vo2max) AS vo2max FROM performance p JOIN athlete a ON a.athlete_id = p.athlete_id"
+        " WHERE p.athlete_id IN (SELECT value FROM json_each(?))"
+    ),
+    "stats.ppo_for_athletes": (
+        "SELECT p.athlete_id, a.name, MAX(p.ppo) AS ppo FROM performance p JOIN athlete a ON a.athlete_id = p.athlete_id"
+        " WHERE p.athlete_id IN (SELECT value FROM json_each(?))"
+    ),
+    "stats.weightpower_for_athletes": (
+        "SELECT p.athlete_id, a.name, MAX(p.power_to_weight) AS power_to_weight FROM performance p"
+        " JOIN athlete a ON a.athlete_id = p.athlete_id WHERE p.athlete_id IN (SELECT value FROM json_each(?))"
+    ),
+    "stats.summary": _SUMMARY_SELECT + " GROUP BY p.athlete_id ORDER BY p.athlete_id",
+    # Même agrégat restreint à une liste d'athlètes (tableau JSON en paramètre :
+    # le texte SQL ne dépend pas du nombre d'identifiants)
+    "stats.summary_for_athletes": (
+        _SUMMARY_SELECT + " WHERE p.athlete_id IN (SELECT value FROM json_each(?))"
+        " GROUP BY p.athlete_id ORDER BY p.athlete_id"
+    ),
+    "stats.metric_values": f"SELECT {', '.join(STATS_METRICS)} FROM performance",
+    **{f"stats.range.{metric}": f"SELECT MIN({metric}), MAX({metric}), COUNT({metric}) FROM performance"
+       for metric in STATS_METRICS},
+    **{f"stats.histogram.{metric}": (
+        f"SELECT MIN(CAST(({metric} - ?) / ? AS INTEGER), ?) AS bucket, COUNT(*) FROM performance"
+        f" WHERE {metric} IS NOT NULL GROUP BY bucket ORDER BY bucket"
+    ) for metric in STATS_METRICS},
+    # Mêmes lectures restreintes aux athlètes visibles (tableau JSON en dernier paramètre)
+    **{f"stats.values_for_athletes.{metric}": (
+        f"SELECT {metric} FROM performance WHERE athlete_id IN (SELECT value FROM json_each(?))"
+    ) for metric in STATS_METRICS},
+    **{f"stats.range_for_athletes.{metric}": (
+        f"SELECT MIN({metric}), MAX({metric}), COUNT({metric}) FROM performance"
+        " WHERE athlete_id IN (SELECT value FROM json_each(?))"
+    ) for metric in STATS_METRICS},
+    **{f"stats.histogram_for_athletes.{metric}": (
+        f"SELECT MIN(CAST(({metric} - ?) / ? AS INTEGER), ?) AS bucket, COUNT(*) FROM performance"
+        f" WHERE {metric} IS NOT NULL AND athlete_id IN (SELECT value FROM json_each(?)) GROUP BY bucket ORDER BY bucket"
+    ) for metric in STATS_METRICS},
+    # Charge d'entraînement (clé primaire (athlete_id, day) de training_load_daily)
+    "training.insert_session": (
+        "INSERT INTO training_session (athlete_id, session_date, duration_s, average_power,"
+        " normalized_power, intensity_factor, tss, ftp) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+    ),
+    "training.sessions": (
+        "SELECT * FROM training_session WHERE athlete_id = ? AND session_date >= ? AND session_date <= ?"
+        " ORDER BY session_date, session_id"
+    ),
+    "training.day": "SELECT day, tss, ctl, atl, tsb FROM training_load_daily WHERE athlete_id = ? AND day = ?",
+    "training.day_before": (
+        "SELECT day, ctl, atl FROM training_load_daily WHERE athlete_id = ? AND day < ? ORDER BY day DESC LIMIT 1"
+    ),
+    "training.days_from": "SELECT day, tss FROM training_load_daily WHERE athlete_id = ? AND day >= ? ORDER BY day",
+    "training.upsert_day": (
+        "INSERT INTO training_load_daily (athlete_id, day, tss, ctl, atl, tsb) VALUES (?, ?, ?, ?, ?, ?)"
+        " ON CONFLICT (athlete_id, day) DO UPDATE SET"
+        " tss = excluded.tss, ctl = excluded.ctl, atl = excluded.atl, tsb = excluded.tsb"
+    ),
+    "training.range": (
+        "SELECT day, tss, ctl, atl, tsb FROM training_load_daily WHERE athlete_id = ? AND day >= ? AND day <= ?"
+        " ORDER BY day"
+    ),
+    "training.latest": (
+        "SELECT day, tss, ctl, atl, tsb FROM training_load_daily WHERE athlete_id = ? ORDER BY day DESC LIMIT 1"
+    ),
+    "training.daily_tss": (
+        "SELECT session_date, SUM(tss) FROM training_session WHERE athlete_id = ?"
+        " GROUP BY session_date ORDER BY session_date"
+    ),
+    "training.delete_days": "DELETE FROM training_load_daily WHERE athlete_id = ?",
+    "training.athletes": "SELECT DISTINCT athlete_id FROM training_session ORDER BY athlete_id",
+    # Événements d'invalidation des caches entre processus (cf. coherence.py)
+    "cache_event.insert": "INSERT INTO cache_event (channel, data, origin, created_at) VALUES (?, ?, ?, ?)",
+    "cache_event.latest": "SELECT MAX(event_id) FROM cache_event",
+    "cache_event.since": "SELECT event_id, channel, data, origin FROM cache_event WHERE event_id > ? ORDER BY event_id",
+    "cache_event.prune": "DELETE FROM cache_event WHERE created_at < ?",
+    # Tâches de fond (file job, cf. jobs.py)
+    "job.insert": (
+        "INSERT INTO job (kind, params, status, attempts, max_attempts, submitted_by, created_at, run_after)"
+        " VALUES (?, ?, 'queued', 0, ?, ?, ?, ?)"
+    ),
+    "job.by_id": "SELECT * FROM job WHERE job_id = ?",
+    # Planification : ajout d'une tâche sans paramètres, sauf si une tâche du
+    # même type attend, s'exécute ou a été créée depuis moins d'un intervalle
+    "job.schedule": (
+        "INSERT INTO job (kind, params, status, attempts, max_attempts, created_at, run_after)"
+        " SELECT ?, '{}', 'queued', 0, ?, ?, ? WHERE NOT EXISTS ("
+        "SELECT 1 FROM job WHERE kind = ? AND (status IN ('queued', 'running') OR created_at > ?))"
+    ),
+    # Réservation atomique de la plus ancienne tâche prête dont le type n'a pas
+    # atteint sa limite de concurrence (limites passées en JSON {type: limite})
+    "job.claim": (
+        "UPDATE job SET status = 'running', attempts = attempts + 1, started_at = ?, worker = ?"
+        " WHERE status = 'queued' AND job_id = ("
+        "SELECT j.job_id FROM job j JOIN json_each(?) l ON l.key = j.kind"
+        " WHERE j.status = 'queued' AND j.run_after <= ?"
+        " AND (SELECT COUNT(*) FROM job r WHERE r.status = 'running' AND r.kind = j.kind) < l.value"
+        " ORDER BY j.run_after, j.job_id LIMIT 1)"
+        " RETURNING job_id, kind, params, attempts, max_attempts, submitted_by"
+    ),
+    "job.succeeded": (
+        "UPDATE job SET status = 'succeeded', result = ?, error = NULL, finished_at = ?, duration_ms = ?"
+        " WHERE job_id = ?"
+    ),
+    "job.failed": "UPDATE job SET status = 'failed', error = ?, finished_at = ?, duration_ms = ? WHERE job_id = ?",
+    "job.retry": (
+        "UPDATE job SET status = 'queued', error = ?, run_after = ?, duration_ms = ?, worker = NULL"
+        " WHERE job_id = ?"
+    ),
+    "job.cancelled": "UPDATE job SET status = 'cancelled', finished_at = ?, duration_ms = ? WHERE job_id = ?",
+    # Une tâche en attente est annulée immédiatement, une tâche en cours est
+    # marquée et s'arrête à son prochain point de contrôle
+    "job.cancel": (
+        "UPDATE job SET cancel_requested = 1,"
+        " status = CASE status WHEN 'queued' THEN 'cancelled' ELSE status END,"
+        " finished_at = CASE status WHEN 'queued' THEN ? ELSE finished_at END"
+        " WHERE job_id = ? AND status IN ('queued', 'running') RETURNING status"
+    ),
+    "job.cancel_requested": "SELECT cancel_requested FROM job WHERE job_id = ?",
+    "job.requeue_stale": (
+        "UPDATE job SET status = 'queued', worker = NULL, run_after = ?"
+        " WHERE status = 'running' AND started_at < ?"
+    ),
+    # Jetons de renouvellement (cf. refresh_tokens.py)
+    "refresh_token.insert": (
+        "INSERT INTO refresh_token (user_id, token_hash, family, created_at, expires_at) VALUES (?, ?, ?, ?, ?)"
+    ),
+    # Consommation atomique d'un jeton valide (recherche par l'index unique de
+    # token_hash), l'email du titulaire étant lu par sa clé primaire
+    "refresh_token.consume": (
+        "UPDATE refresh_token SET revoked_at = ?"
+        " WHERE token_hash = ? AND revoked_at IS NULL AND expires_at > ?"
+        " RETURNING user_id, family, (SELECT email FROM user WHERE user.user_id = refresh_token.user_id)"
+    ),
+    "refresh_token.family": "SELECT family FROM refresh_token WHERE token_hash = ?",
+    "refresh_token.revoke_family": "UPDATE refresh_token SET revoked_at = ? WHERE family = ? AND revoked_at IS NULL",
+    "refresh_token.prune_user": "DELETE FROM refresh_token WHERE user_id = ? AND expires_at < ?",
+    # Export
+    "export.user": "SELECT user_id, name, email, role FROM user",
+    "export.athlete": "SELECT * FROM athlete",
+    "export.performance": "SELECT * FROM performance",
+    # Exports restreints aux athlètes visibles (tableau JSON en paramètre)
+    "export.user_for_athletes": (
+        "SELECT user_id, name, email, role FROM user"
+        " WHERE user_id IN (SELECT user_id FROM athlete WHERE athlete_id IN (SELECT value FROM json_each(?)))"
+    ),
+    "export.athlete_for_athletes": "SELECT * FROM athlete WHERE athlete_id IN (SELECT value FROM json_each(?))",
+    "export.performance_for_athletes": (
+        "SELECT * FROM performance WHERE athlete_id IN (SELECT value FROM json_each(?)) ORDER BY performance_id"
+    ),
+    # Export Parquet (parquet_export.py) : colonnes de partition par mois calculées en SQL
+    "parquet.user": "SELECT user_id, name, email, role FROM user",
+    "parquet.athlete": "SELECT * FROM athlete",
+    "parquet.performance": "SELECT *, substr(tested_at, 1, 7) AS tested_month FROM performance",
+    "parquet.training_session": "SELECT *, substr(session_date, 1, 7) AS session_month FROM training_session",
+}
+
+# Tables dont les requêtes CRUD générées par queries.py sont préparées au démarrage
+WARM_TABLES = ("user", "athlete", "performance")
+
+def statement(name: str) -> str:
+    """Retourne le texte SQL d'une requête enregistrée.
+
+    Args:
+        name (str): Nom de la requête (ex: "athlete.list")
+
+    Returns:
+        str: Texte SQL, identique à chaque appel
+
+    Raises:
+        KeyError: Si aucune requête n'est enregistrée sous ce nom
+    """
+    try:
+        return STATEMENTS[name]
+    except KeyError:
+        raise KeyError(f"Requête SQL non enregistrée : {name}") from None
+
+class TrackedCursor(sqlite3.Cursor):
+    """Curseur signalant chaque requête exécutée à sa connexion."""
+
+    def execute(self, sql, parameters=()):
+        self.connection.track_statement(sql)
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self.connection.track_statement(sql)
+        return super().executemany(sql, seq_of_parameters)
+
+class TrackedConnection(sqlite3.Connection):
+    """Connexion sqlite3 comptant les préparations et réutilisations de requêtes.
+
+    Le comptage reproduit le cache LRU interne de sqlite3 (même clé : le
+    texte SQL, même capacité : cached_statements). Une requête absente du
+    miroir est comptée comme préparée (parse), sinon comme réutilisée (reuse).
+
+    Attributes:
+        parses (int): Requêtes préparées (absentes du cache)
+        reuses (int): Requêtes servies depuis le cache
+        warmed (int): Requêtes placées dans le cache lors du préchauffage
+    """
+
+    def __init__(self, *args, cached_statements: int = DB_CACHED_STATEMENTS, **kwargs):
+        super().__init__(*args, cached_statements=cached_statements, **kwargs)
+        self.capacity = cached_statements
+        self.parses = 0
+        self.reuses = 0
+        self.warmed = 0
+        self._seen: OrderedDict[str, None] = OrderedDict()
+
+    def track_statement(self, sql: str):
+        """Met à jour le miroir du cache et les compteurs pour une requête."""
+        if sql in self._seen:
+            self._seen.move_to_end(sql)
+            self.reuses += 1
+            return
+        self._seen[sql] = None
+        if len(self._seen) > self.capacity:
+            self._seen.popitem(last=False)
+        self.parses += 1
+
+    def cursor(self, factory=TrackedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def statement_stats(self) -> dict:
+        """Retourne les compteurs de la connexion."""
+        return {"parses": self.parses, "reuses": self.reuses,
+                "warmed": self.warmed, "cached": len(self._seen)}
+
+def _warm(cursor: sqlite3.Cursor, sql: str) -> bool:
+    """Prépare une requête en l'exécutant avec des paramètres NULL.
+
+    L'exécution est interrompue dès ses premières instructions (progress
+    handler) : le texte exact entre dans le cache de statements sans
+    qu'aucun agrégat ne soit calculé. Les écritures éventuelles sont
+    annulées par warm_statements (savepoint annulé).
+    """
+    conn = cursor.connection
+    if not conn.in_transaction:
+        cursor.execute("SAVEPOINT warm_statements")
+    conn.set_progress_handler(lambda: 1, 1)
+    try:
+        cursor.execute(sql, (None,) * sql.count("?"))
+        return True
+    except sqlite3.Error as exc:
+        # Interrompue ou contrainte violée : la requête a bien été préparée.
+        # SQLITE_ERROR signale un échec de la préparation (table absente, ...)
+        return getattr(exc, "sqlite_errorname", None) not in (None, "SQLITE_ERROR")
+    finally:
+        conn.set_progress_handler(None, 1)
+
+def warm_statements(conn: sqlite3.Connection) -> int:
+    """Prépare les requêtes du registre et les requêtes CRUD générées sur la connexion.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à préchauffer
+
+    Returns:
+        int: Nombre de requêtes placées dans le cache de statements
+
+    Note:
+        Chaque requête est exécutée sous son texte exact, dans un savepoint
+        annulé à la fin : sa première exécution réelle est servie par le
+        cache (comptée dans reuses). Le préchauffage prend un temps
+        indépendant du volume de données, sans attendre le verrou
+        d'écriture d'une autre connexion. Les compteurs de la connexion
+        sont remis à zéro ensuite, pour ne refléter que le trafic réel. Les
+        requêtes qui échouent à la préparation (table absente, ...) sont
+        ignorées.
+    """
+    import queries
+
+    sql_texts = list(STATEMENTS.values())
+    for table_name in WARM_TABLES:
+        try:
+            columns, primary_key = queries.table_metadata(conn, table_name)
+        except (ValueError, sqlite3.Error):
+            continue
+        data_columns = tuple(column for column in columns if column != primary_key)
+        sql_texts += [queries.insert_sql(table_name, data_columns),
+                      queries.update_sql(table_name, data_columns, primary_key),
+                      queries.delete_sql(table_name, primary_key)]
+
+    cursor = conn.cursor()
+    # Pas d'attente si un autre processus écrit : l'écriture refusée (SQLITE_BUSY) est déjà préparée
+    busy_timeout = cursor.execute("PRAGMA busy_timeout").fetchone()[0]
+    cursor.execute("PRAGMA busy_timeout = 0")
+    try:
+        warmed = sum(_warm(cursor, sql) for sql in sql_texts)
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        cursor.execute(f"PRAGMA busy_timeout = {busy_timeout}")
+        cursor.close()
+    if isinstance(conn, TrackedConnection):
+        conn.warmed = warmed
+        conn.parses = conn.reuses = 0
+    return warmed
+
+def aggregate_stats(connections: list[sqlite3.Connection]) -> dict:
+    """Agrège les compteurs de plusieurs connexions.
+
+    Args:
+        connections (list[sqlite3.Connection]): Connexions du pool
+
+    Returns:
+        dict: Compteurs totaux, taux de réutilisation et détail par connexion
+    """
+    per_connection = [conn.statement_stats() for conn in connections if isinstance(conn, TrackedConnection)]
+    parses = sum(stats["parses"] for stats in per_connection)
+    reuses = sum(stats["reuses"] for stats in per_connection)
+    total = parses + reuses
+    return {
+        "cached_statements": DB_CACHED_STATEMENTS,
+        "registered_statements": len(STATEMENTS),
+        "parses": parses,
+        "reuses": reuses,
+        "warmed": sum(stats["warmed"] for stats in per_connection),
+        "reuse_rate": round(reuses / total, 4) if total else None,
+        "connections": per_connection,
+    }
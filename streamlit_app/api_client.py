@@ -0,0 +1,259 @@
+"""
+Client HTTP partagé des pages Streamlit.
+
+Toutes les pages passent par ce module plutôt que d'appeler requests
+directement :
+    - une seule requests.Session (pool de connexions keep-alive) par
+      processus Streamlit, conservée via st.cache_resource
+    - un timeout sur chaque appel
+    - les lectures sont mises en cache avec st.cache_data (TTL), la clé
+      incluant le token : deux utilisateurs ne partagent jamais un résultat
+    - le cache des lectures est vidé après chaque écriture (POST/PUT/DELETE)
+    - fetch_many récupère plusieurs ressources indépendantes en parallèle
+    - keep_session_alive renouvelle le token d'accès avant son expiration
+      avec le jeton de renouvellement (/user/refresh), sans redemander le
+      mot de passe
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, NamedTuple
+
+import requests
+import streamlit as st
+from dotenv import load_dotenv
+from jose import JWTError, jwt
+from requests.adapters import HTTPAdapter
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from urllib3.util.retry import Retry
+
+load_dotenv()
+
+API_URL = os.getenv("API_URL", "http://localhost:8000").rstrip("/")
+# Timeout (s) de chaque appel à l'API
+API_TIMEOUT = float(os.getenv("API_TIMEOUT", 10))
+# Durée de vie (s) des lectures en cache
+API_CACHE_TTL = int(os.getenv("API_CACHE_TTL", 60))
+# Taille du pool de connexions et nombre maximal d'appels parallèles
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", 8))
+# Marge (s) avant expiration à partir de laquelle le token d'accès est renouvelé
+TOKEN_REFRESH_MARGIN = int(os.getenv("TOKEN_REFRESH_MARGIN", 60))
+
+class ApiResult(NamedTuple):
+    """Résultat d'un appel à l'API (sérialisable, donc compatible st.cache_data).
+
+    Attributes:
+        status_code (int): Code HTTP de la réponse
+        data (Any): Corps JSON décodé, ou None si le corps n'est pas du JSON
+        text (str): Corps brut de la réponse
+        total (int | None): Valeur de l'en-tête X-Total-Count (routes paginées)
+    """
+    status_code: int
+    data: Any
+    text: str
+    total: int | None = None
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status_code < 300
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """Retourne la session HTTP partagée du processus Streamlit.
+
+    Returns:
+        requests.Session: Session avec pool de connexions keep-alive et
+        nouvelles tentatives automatiques sur les lectures (GET)
+    """
+    session = requests.Session()
+    retry = Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+    adapter = HTTPAdapter(pool_connections=API_POOL_SIZE, pool_maxsize=API_POOL_SIZE, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"accept": "application/json"})
+    return session
+
+def _headers(token: str | None) -> dict:
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+def _to_result(response: requests.Response) -> ApiResult:
+    try:
+        data = response.json()
+    except ValueError:
+        data = None
+    total = response.headers.get("X-Total-Count")
+    return ApiResult(response.status_code, data, response.text, int(total) if total else None)
+
+def request(method: str, path: str, token: str | None = None, **kwargs) -> ApiResult:
+    """Effectue un appel à l'API sans cache.
+
+    Args:
+        method (str): Méthode HTTP
+        path (str): Chemin de la route (ex: "/athletes/athletes")
+        token (str, optional): Token JWT de l'utilisateur
+        **kwargs: Arguments transmis à requests (json, data, params, ...)
+
+    Returns:
+        ApiResult: Résultat de l'appel. Une erreur réseau est convertie en
+        résultat de code 503 afin que les pages n'aient qu'un cas à gérer.
+    """
+    try:
+        response = get_session().request(method, f"{API_URL}{path}", headers=_headers(token),
+                                          timeout=API_TIMEOUT, **kwargs)
+    except requests.RequestException as e:
+        return ApiResult(503, None, f"API injoignable : {e}")
+    return _to_result(response)
+
+class _UncachedResult(Exception):
+    """Porte un résultat en erreur hors de la fonction en cache (les exceptions ne sont pas mises en cache)."""
+
+    def __init__(self, result: ApiResult):
+        super().__init__(result.status_code)
+        self.result = result
+
+@st.cache_data(ttl=API_CACHE_TTL, show_spinner=False)
+def _cached_get(path: str, token: str | None, params: tuple = ()) -> ApiResult:
+    result = request("GET", path, token, params=list(params))
+    if not result.ok:
+        raise _UncachedResult(result)
+    return result
+
+def get_json(path: str, token: str | None, params: tuple = ()) -> ApiResult:
+    """Lecture mise en cache (clé : chemin, token et paramètres).
+
+    Args:
+        path (str): Chemin de la route
+        token (str): Token JWT de l'utilisateur
+        params (tuple, optional): Paramètres de requête sous forme de
+            tuple de couples (hashable pour le cache)
+
+    Returns:
+        ApiResult: Résultat de l'appel. Seules les réponses réussies
+        sont conservées en cache.
+    """
+    try:
+        return _cached_get(path, token, tuple(params))
+    except _UncachedResult as e:
+        return e.result
+
+def invalidate():
+    """Vide le cache des lectures (à appeler après toute écriture)."""
+    _cached_get.clear()
+
+def mutate(method: str, path: str, token: str | None, **kwargs) -> ApiResult:
+    """Effectue une écriture puis invalide le cache des lectures.
+
+    Args:
+        method (str): POST, PUT, PATCH ou DELETE
+        path (str): Chemin de la route
+        token (str): Token JWT de l'utilisateur
+        **kwargs: Arguments transmis à requests (json, data, ...)
+
+    Returns:
+        ApiResult: Résultat de l'appel
+    """
+    result = request(method, path, token, **kwargs)
+    if result.ok:
+        invalidate()
+    return result
+
+def mutate_many(method: str, paths: list[str], token: str | None) -> list[ApiResult]:
+    """Effectue plusieurs écritures en parallèle puis invalide le cache une seule fois.
+
+    Args:
+        method (str): POST, PUT, PATCH ou DELETE
+        paths (list[str]): Chemins des routes
+        token (str): Token JWT de l'utilisateur
+
+    Returns:
+        list[ApiResult]: Résultats, dans l'ordre des chemins
+    """
+    if not paths:
+        return []
+    with ThreadPoolExecutor(max_workers=min(len(paths), API_POOL_SIZE)) as executor:
+        results = list(executor.map(lambda path: request(method, path, token), paths))
+    if any(result.ok for result in results):
+        invalidate()
+    return results
+
+def fetch_many(token: str | None, paths: dict[str, str]) -> dict[str, ApiResult]:
+    """Récupère plusieurs ressources indépendantes en parallèle.
+
+    Args:
+        token (str): Token JWT de l'utilisateur
+        paths (dict[str, str]): Nom logique -> chemin de la route
+
+    Returns:
+        dict[str, ApiResult]: Nom logique -> résultat (lectures en cache)
+
+    Example:
+        >>> results = fetch_many(token, {"athletes": "/athletes/athletes",
+        ...                              "performances": "/performances/performances"})
+    """
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=min(len(paths), API_POOL_SIZE) or 1,
+                            initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)) as executor:
+        futures = {name: executor.submit(get_json, path, token) for name, path in paths.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+def login(email: str, password: str) -> ApiResult:
+    """Demande un token d'accès à l'API.
+
+    Args:
+        email (str): Email de l'utilisateur
+        password (str): Mot de passe
+
+    Returns:
+        ApiResult: Résultat contenant access_token en cas de succès
+    """
+    return request("POST", "/user/auth", data={
+        "grant_type": "password",
+        "username": email,
+        "password": password,
+    })
+
+def refresh(refresh_token: str) -> ApiResult:
+    """Échange un jeton de renouvellement contre un nouveau couple de jetons.
+
+    Args:
+        refresh_token (str): Jeton de renouvellement
+
+    Returns:
+        ApiResult: Résultat contenant access_token et refresh_token en cas de succès
+    """
+    return request("POST", "/user/refresh", json={"refresh_token": refresh_token})
+
+def logout(refresh_token: str) -> ApiResult:
+    """Révoque le jeton de renouvellement de la session."""
+    return request("POST", "/user/logout", json={"refresh_token": refresh_token})
+
+def keep_session_alive() -> bool:
+    """Renouvelle le token d'accès de la session s'il expire dans moins de TOKEN_REFRESH_MARGIN secondes.
+
+    Returns:
+        bool: False si la session n'a plus de token valide (reconnexion nécessaire)
+
+    Note:
+        La date d'expiration est lue dans le token sans vérifier sa
+        signature : seule l'API la vérifie.
+    """
+    token = st.session_state.get("token")
+    refresh_token = st.session_state.get("refresh_token")
+    if not token or not refresh_token:
+        return bool(token)
+    try:
+        expires = jwt.get_unverified_claims(token).get("exp", 0)
+    except JWTError:
+        expires = 0
+    if expires - time.time() > TOKEN_REFRESH_MARGIN:
+        return True
+    result = refresh(refresh_token)
+    if not result.ok:
+        st.session_state.token = None
+        st.session_state.refresh_token = None
+        return False
+    st.session_state.token = result.data["access_token"]
+    st.session_state.refresh_token = result.data["refresh_token"]
+    return True
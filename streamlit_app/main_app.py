@@ -1,4 +1,5 @@
 import streamlit as st
+import api_client
 from jose import JWTError, jwt
 import os
 from dotenv import load_dotenv
@@ -12,6 +13,10 @@ ALGORITHM = os.getenv("ALGORITHM", "HS256")
 if "authenticated" not in st.session_state:
     st.session_state.authenticated = False
 
+# Renouvelle le token d'accès avant son expiration, sans redemander le mot de passe
+if st.session_state.authenticated and not api_client.keep_session_alive():
+    st.session_state.authenticated = False
+
 
 
 current_user = "coach"
@@ -1,59 +1,24 @@
 import streamlit as st
-from dotenv import load_dotenv
-import os
-import requests
-import json
+import api_client
+from table_view import paged_grid
 
 
-load_dotenv()
-
-API_URL = os.getenv("API_URL", "http://localhost:8501")
-
-
-def get_athletes_from_api():
-    url = f"{API_URL}/athletes/athletes"
-    token = st.session_state.token
-    headers = {
-        "accept": "application/json",
-        "Content-Type": "application/x-www-form-urlencoded",
-        "Authorization": f"Bearer {token}"
-    }
-        
-    response = requests.get(url, headers=headers)
-    return response    
-
-
-def delete_athlete(athlete_id, athlete_name):
+def delete_athletes(athlete_ids):
     # Demander confirmation avant de supprimer
     if st.session_state.get("confirm_delete", False):
-        url = f"{API_URL}/athletes/delete/{athlete_id}"
-        token = st.session_state.token
-        headers = {
-            "accept": "application/json",
-            "Authorization": f"Bearer {token}"
-        }
-        
-        response = requests.delete(url, headers=headers)
+        paths = [f"/athletes/delete/{athlete_id}" for athlete_id in athlete_ids]
+        responses = api_client.mutate_many("DELETE", paths, st.session_state.token)
         
         # Réinitialiser l'état de confirmation
         st.session_state.confirm_delete = False
-        st.session_state.athlete_to_delete = None
+        st.session_state.athletes_to_delete = []
         
-        return response
+        return responses
     return None
 
 
 def create_athlete(athlete_data):
-    url = f"{API_URL}/athletes/create"
-    token = st.session_state.token
-    headers = {
-        "accept": "application/json",
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {token}"
-    }
-    
-    response = requests.post(url, json=athlete_data, headers=headers)
-    return response
+    return api_client.mutate("POST", "/athletes/create", st.session_state.token, json=athlete_data)
 
 
 if st.session_state.authenticated and st.session_state.role in ["admin", "coach"]:
@@ -104,58 +69,51 @@ if st.session_state.authenticated and st.session_state.role in ["admin", "coach"
     
     # Dialogue de confirmation de suppression
     if st.session_state.get("confirm_delete", False):
-        athlete_name = st.session_state.get("athlete_to_delete_name", "")
-        athlete_id = st.session_state.get("athlete_to_delete", None)
+        athlete_ids = st.session_state.get("athletes_to_delete", [])
         
-        st.warning(f"Êtes-vous sûr de vouloir supprimer l'athlète {athlete_name} ?")
+        st.warning(f"Êtes-vous sûr de vouloir supprimer {len(athlete_ids)} athlète(s) ?")
         col1, col2 = st.columns(2)
         
         if col1.button("Oui, supprimer"):
-            delete_response = delete_athlete(athlete_id, athlete_name)
-            if delete_response and delete_response.status_code == 200:
-                st.session_state.success_message = f"Athlète {athlete_name} supprimé avec succès!"
+            delete_responses = delete_athletes(athlete_ids)
+            failures = [response.text for response in delete_responses or [] if not response.ok]
+            if not failures:
+                st.session_state.success_message = f"{len(athlete_ids)} athlète(s) supprimé(s) avec succès!"
                 st.rerun()
-            elif delete_response:
-                st.error(f"Erreur lors de la suppression: {delete_response.text}")
+            else:
+                st.error(f"Erreur lors de la suppression: {failures[0]}")
         
         if col2.button("Annuler"):
             st.session_state.confirm_delete = False
-            st.session_state.athlete_to_delete = None
-            st.session_state.athlete_to_delete_name = None
+            st.session_state.athletes_to_delete = []
             st.rerun()
     
-    # Afficher les athlètes existants
-    response = get_athletes_from_api()
+    # Filtres côté serveur
+    col1, col2 = st.columns(2)
+    search = col1.text_input("Rechercher un nom")
+    gender_filter = col2.selectbox("Genre", ["", "male", "female"], format_func=lambda g: g or "Tous")
     
-    if response.status_code == 200:
-        athletes = json.loads(response.text)
-        
-        # Créer l'en-tête du tableau
-        cols = st.columns([1, 1, 1, 1, 1, 1, 1])
-        headers = ["ID", "Nom", "Genre", "Âge", "Poids", "Taille", "Action"]
-        
-        for col, header in zip(cols, headers):
-            col.write(f"**{header}**")
-        
-        st.divider()
-        
-        # Afficher chaque athlète avec un bouton de suppression
-        for athlete in athletes:
-            cols = st.columns([1, 1, 1, 1, 1, 1, 1])
-            
-            cols[0].write(athlete["athlete_id"])
-            cols[1].write(athlete["name"])
-            cols[2].write(athlete["gender"])
-            cols[3].write(athlete["age"])
-            cols[4].write(f"{athlete['weight']} kg")
-            cols[5].write(f"{athlete['height']} m")
-            
-            if cols[6].button("🗑️", key=f"delete_{athlete['athlete_id']}"):
-                st.session_state.confirm_delete = True
-                st.session_state.athlete_to_delete = athlete['athlete_id']
-                st.session_state.athlete_to_delete_name = athlete['name']
-                st.rerun()
-            
-            st.divider()
-    else:
+    # Afficher les athlètes existants (une page à la fois)
+    response, selected_ids = paged_grid(
+        "athletes", "/athletes/athletes",
+        sort_columns=["athlete_id", "name", "gender", "age", "weight", "height", "bmi"],
+        id_column="athlete_id",
+        filters={"q": search, "gender": gender_filter},
+        column_config={
+            "athlete_id": "ID",
+            "name": "Nom",
+            "gender": "Genre",
+            "age": "Âge",
+            "weight": st.column_config.NumberColumn("Poids", format="%.2f kg"),
+            "height": st.column_config.NumberColumn("Taille", format="%.2f m"),
+            "bmi": st.column_config.NumberColumn("IMC", format="%.1f"),
+            "user_id": "ID utilisateur",
+        },
+    )
+    
+    if not response.ok:
         st.error(f"Erreur lors de la récupération des données: {response.text}")
+    elif st.button(f"🗑️ Supprimer la sélection ({len(selected_ids)})", disabled=not selected_ids):
+        st.session_state.confirm_delete = True
+        st.session_state.athletes_to_delete = selected_ids
+        st.rerun()
@@ -1,19 +1,14 @@
 import streamlit as st
-from dotenv import load_dotenv
-import os
-import requests
+import api_client
 import re
 
 
-load_dotenv()
-
-API_URL = os.getenv("API_URL", "http://localhost:8000")
-
-
 if "authenticated" not in st.session_state:
     st.session_state.authenticated = False
 if "token" not in st.session_state:
     st.session_state.token = None
+if "refresh_token" not in st.session_state:
+    st.session_state.refresh_token = None
 if "role" not in st.session_state : 
     st.session_state.role = None    
 
@@ -22,19 +17,7 @@ st.session_state.role = "coach"
 
 
 def get_token_from_api(email_saisi, password_saisi):
-    url = f"{API_URL}/user/auth"
-    headers = {
-        'accept': 'application/json',
-        'Content-Type': 'application/x-www-form-urlencoded'
-    }
-    data = {
-        'grant_type': 'password',
-        'username': email_saisi,
-        'password': password_saisi,
-    }
-        
-    response = requests.post(url, headers=headers, data=data)
-    return response    
+    return api_client.login(email_saisi, password_saisi)
 
 
 def valid_email(email):
@@ -56,9 +39,10 @@ if st.button("Se connecter") :
             st.warning("Accès refusé")
         else :
             st.warning("Accès autorisé")
-            token = response.json()["access_token"]
+            token = response.data["access_token"]
             st.write("token d'acces : ", token)
             st.session_state.token = token
+            st.session_state.refresh_token = response.data.get("refresh_token")
             st.session_state.authenticated = True
             st.rerun()
 
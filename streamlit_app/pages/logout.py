@@ -1,4 +1,5 @@
 import streamlit as st
+import api_client
 
 
 
@@ -17,8 +18,12 @@ def show_confirmation():
     st.session_state.show_confirmation = True
 
 def logout():
+    if st.session_state.get("refresh_token"):
+        api_client.logout(st.session_state.refresh_token)
+    api_client.invalidate()
     st.session_state.authenticated = False
     st.session_state.token = None
+    st.session_state.refresh_token = None
     st.session_state.show_confirmation = False
     st.rerun()
 
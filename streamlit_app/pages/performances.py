@@ -1,52 +1,19 @@
 import streamlit as st
-from dotenv import load_dotenv
-import os
-import requests
-import json
-import time
+import api_client
+from table_view import paged_grid
 
 
-load_dotenv()
+def get_athletes_from_api():
+    return api_client.get_json("/athletes/athletes", st.session_state.token)
 
-API_URL = os.getenv("API_URL", "http://localhost:8501")
 
-
-def get_performances_from_api():
-    url = f"{API_URL}/performances/performances"
-    token = st.session_state.token
-    headers = {
-        "accept": "application/json",
-        "Content-Type": "application/x-www-form-urlencoded",
-        "Authorization": f"Bearer {token}"
-    }
-        
-    response = requests.get(url, headers=headers)
-    return response    
-
-
-def delete_performance(performance_id):
-    url = f"{API_URL}/performances/delete/{performance_id}"
-    token = st.session_state.token
-    headers = {
-        "accept": "application/json",
-        "Authorization": f"Bearer {token}"
-    }
-    
-    response = requests.delete(url, headers=headers)
-    return response
+def delete_performances(performance_ids):
+    return api_client.mutate("DELETE", "/performances/batch", st.session_state.token,
+                             json={"performance_ids": list(performance_ids)})
 
 
 def create_performance(performance_data):
-    url = f"{API_URL}/performances/create"
-    token = st.session_state.token
-    headers = {
-        "accept": "application/json",
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {token}"
-    }
-    
-    response = requests.post(url, json=performance_data, headers=headers)
-    return response
+    return api_client.mutate("POST", "/performances/create", st.session_state.token, json=performance_data)
 
 
 if st.session_state.authenticated and st.session_state.role in ["admin", "coach"]:
@@ -70,6 +37,7 @@ if st.session_state.authenticated and st.session_state.role in ["admin", "coach"
             p2 = st.number_input("P2", min_value=0.0)
             p3 = st.number_input("P3", min_value=0.0)
             athlete_id = st.number_input("ID de l'athlète", min_value=1, step=1)
+            tested_on = st.date_input("Date du test")
             
             submitted = st.form_submit_button("Soumettre")
             
@@ -83,7 +51,8 @@ if st.session_state.authenticated and st.session_state.role in ["admin", "coach"
                     "p1": p1,
                     "p2": p2,
                     "p3": p3,
-                    "athlete_id": athlete_id
+                    "athlete_id": athlete_id,
+                    "tested_at": tested_on.isoformat()
                 }
                 
                 response = create_performance(performance_data)
@@ -95,43 +64,53 @@ if st.session_state.authenticated and st.session_state.role in ["admin", "coach"
                 else:
                     st.error(f"Erreur lors de la création: {response.text}")
     
-    # Afficher les performances existantes
-    response = get_performances_from_api()
+    # Afficher le message de succès si présent
+    if st.session_state.get("performance_message"):
+        st.success(st.session_state.performance_message)
+        st.session_state.performance_message = None
     
-    if response.status_code == 200:
-        performances = json.loads(response.text)
-        
-        # Créer l'en-tête du tableau
-        cols = st.columns([1, 1, 1, 1, 1, 1, 1, 1, 1])
-        headers = ["athlete_id", "VO2 Max", "HR Max", "Cadence", "PPO", "P1", "P2", "P3", "Action"]
-        
-        for col, header in zip(cols, headers):
-            col.write(f"**{header}**")
-        
-        st.divider()
-        
-        # Afficher chaque performance avec un bouton de suppression
-        for perf in performances:
-            cols = st.columns([1, 1, 1, 1, 1, 1, 1, 1, 1])
-            
-            cols[0].write(perf["athlete_id"])
-            cols[1].write(perf["vo2max"])
-            cols[2].write(perf["hr_max"])
-            cols[3].write(perf["cadence_max"])
-            cols[4].write(perf["ppo"])
-            cols[5].write(perf["p1"])
-            cols[6].write(perf["p2"])
-            cols[7].write(perf["p3"])
-            
-            if cols[8].button("🗑️", key=f"delete_{perf['performance_id']}"):
-                delete_response = delete_performance(perf['performance_id'])
-                if delete_response.status_code == 200:
-                    st.success(f"Performance supprimée avec succès!")
-                    time.sleep(3)
-                    st.rerun()
-                else:
-                    st.error(f"Erreur lors de la suppression: {delete_response.text}")
-            
-            st.divider()
-    else:
+    # Filtre par athlète (liste des athlètes en cache)
+    athletes_response = get_athletes_from_api()
+    athletes = athletes_response.data if athletes_response.ok else []
+    athlete_names = {athlete["athlete_id"]: athlete["name"] for athlete in athletes}
+    athlete_filter = st.selectbox("Athlète", [None, *athlete_names],
+                                  format_func=lambda athlete_id: "Tous" if athlete_id is None else athlete_names[athlete_id])
+    
+    def add_athlete_name(df):
+        df.insert(0, "athlete", df["athlete_id"].map(athlete_names))
+        return df
+    
+    # Afficher les performances existantes (une page à la fois)
+    response, selected_ids = paged_grid(
+        "performances", "/performances/performances",
+        sort_columns=["performance_id", "tested_at", "athlete_id", "vo2max", "hr_max", "cadence_max", "ppo", "p1", "p2", "p3", "power_to_weight", "vo2max_abs"],
+        id_column="performance_id",
+        filters={"athlete_id": athlete_filter},
+        transform=add_athlete_name,
+        column_config={
+            "performance_id": "ID",
+            "tested_at": "Date du test",
+            "athlete": "Athlète",
+            "athlete_id": None,
+            "vo2max": "VO2 Max",
+            "hr_max": "HR Max",
+            "rf_max": "RF Max",
+            "cadence_max": "Cadence",
+            "ppo": "PPO",
+            "p1": "P1",
+            "p2": "P2",
+            "p3": "P3",
+            "power_to_weight": st.column_config.NumberColumn("PPO/Poids", format="%.2f W/kg"),
+            "vo2max_abs": st.column_config.NumberColumn("VO2 Max absolue", format="%.2f L/min"),
+        },
+    )
+    
+    if not response.ok:
         st.error(f"Erreur lors de la récupération des données: {response.text}")
+    elif st.button(f"🗑️ Supprimer la sélection ({len(selected_ids)})", disabled=not selected_ids):
+        delete_response = delete_performances(selected_ids)
+        if delete_response.ok:
+            st.session_state.performance_message = f"{delete_response.data['deleted']} performance(s) supprimée(s) avec succès!"
+            st.rerun()
+        else:
+            st.error(f"Erreur lors de la suppression: {delete_response.text}")
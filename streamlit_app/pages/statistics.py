@@ -1,25 +1,154 @@
+import pandas as pd
 import streamlit as st
-from dotenv import load_dotenv
-import os
-import streamlit.components.v1 as components
-import webbrowser
+import api_client
+
+# Métriques proposées sur le tableau de bord (colonne -> libellé)
+METRICS = {
+    "ppo": "PPO (W)",
+    "hr_max": "FC max (bpm)",
+    "vo2max": "VO2 max (ml/kg/min)",
+    "power_to_weight": "PPO/Poids (W/kg)",
+}
+
+
+def get_statistics_from_api(metric):
+    # Le résumé et la distribution sont indépendants : récupérés en parallèle
+    distribution_metric = "ppo" if metric == "power_to_weight" else metric
+    return api_client.fetch_many(st.session_state.token, {
+        "summary": "/stats/summary?shape=columns",
+        "distribution": f"/stats/distribution?metric={distribution_metric}&bins=20",
+    })
+
+
+def get_athlete_history_from_api(athlete_id):
+    return api_client.get_json(f"/athletes/{athlete_id}/history", st.session_state.token)
+
+
+def get_training_load_from_api(athlete_id):
+    return api_client.get_json(f"/training/{athlete_id}/load", st.session_state.token)
+
+
+def get_percentile_from_api(metric, athlete_id):
+    return api_client.get_json("/stats/percentile", st.session_state.token,
+                               (("athlete_id", athlete_id), ("metric", metric)))
+
+
+def show_overview(summary, metric, label):
+    st.subheader("Vue d'ensemble")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Athlètes mesurés", len(summary))
+    col2.metric("Mesures", int(summary["count"].sum()))
+    col3.metric(f"Meilleur {label}", f"{summary[f'{metric}_max'].max():.1f}")
+
+    st.bar_chart(summary.set_index("name")[[f"{metric}_mean"]].rename(columns={f"{metric}_mean": f"Moyenne {label}"}))
+
+    # Détail max/moyenne/min et nombre de mesures par athlète
+    details = summary[["name", f"{metric}_max", f"{metric}_mean", f"{metric}_min", "count"]]
+    st.dataframe(details, hide_index=True, use_container_width=True, column_config={
+        "name": "Athlète",
+        f"{metric}_max": st.column_config.NumberColumn("Max", format="%.1f"),
+        f"{metric}_mean": st.column_config.NumberColumn("Moyenne", format="%.1f"),
+        f"{metric}_min": st.column_config.NumberColumn("Min", format="%.1f"),
+        "count": "Mesures",
+    })
+
+
+def show_ranking(summary, metric, label):
+    st.subheader(f"Classement ({label} moyen)")
+    ranking = summary.sort_values(f"{metric}_mean", ascending=False).reset_index(drop=True)
+    ranking.insert(0, "rank", ranking.index + 1)
+
+    # Podium des trois premiers
+    for column, (_, athlete) in zip(st.columns(3), ranking.head(3).iterrows()):
+        column.metric(f"{['🥇', '🥈', '🥉'][athlete['rank'] - 1]} {athlete['name']}", f"{athlete[f'{metric}_mean']:.1f}")
+
+    st.dataframe(ranking[["rank", "name", f"{metric}_mean", f"{metric}_max"]], hide_index=True,
+                 use_container_width=True, column_config={
+                     "rank": "Rang",
+                     "name": "Athlète",
+                     f"{metric}_mean": st.column_config.NumberColumn("Moyenne", format="%.2f"),
+                     f"{metric}_max": st.column_config.NumberColumn("Max", format="%.2f"),
+                 })
+
+
+def show_distribution(distribution, label):
+    st.subheader(f"Distribution ({label})")
+    if not distribution["count"]:
+        st.info("Aucune mesure enregistrée")
+        return
+    edges = distribution["edges"]
+    histogram = pd.DataFrame({
+        "classe": [f"{low:.0f}–{high:.0f}" for low, high in zip(edges, edges[1:])],
+        "mesures": distribution["counts"],
+    })
+    st.bar_chart(histogram, x="classe", y="mesures")
+    st.caption(f"{distribution['count']} mesures")
+
+
+def show_trend(summary, metric, label):
+    st.subheader("Tendance par athlète")
+    names = dict(zip(summary["athlete_id"], summary["name"]))
+    athlete_id = st.selectbox("Athlète", list(names), format_func=names.get)
+    if athlete_id is None:
+        return
+    if metric == "power_to_weight":
+        metric = "ppo"
+        label = METRICS["ppo"]
+
+    # Position de la meilleure valeur de l'athlète dans la distribution de l'équipe
+    percentile = get_percentile_from_api(metric, athlete_id)
+    if percentile.ok:
+        st.metric(f"Meilleur {label} : percentile", f"{percentile.data['percentile']:.0f}e",
+                  help=f"Médiane de l'équipe : {percentile.data['quantiles']['p50']:.1f}")
+
+    # Historique daté : moyennes glissantes et pente calculées par l'API
+    response = get_athlete_history_from_api(athlete_id)
+    if not response.ok:
+        st.error(f"Erreur lors de la récupération de l'historique: {response.text}")
+        return
+    if not response.data["tests"]:
+        st.info("Aucun test daté pour cet athlète")
+        return
+    history = pd.DataFrame(response.data["tests"])
+    history["tested_at"] = pd.to_datetime(history["tested_at"])
+    history = history.rename(columns={metric: label, f"{metric}_rolling": "moyenne glissante"})
+    st.line_chart(history, x="tested_at", y=[label, "moyenne glissante"])
+    slope = response.data["trend"][metric]
+    if slope is not None:
+        st.caption(f"Tendance : {slope * 30:+.2f} par mois")
+
+    # Forme (CTL), fatigue (ATL) et fraîcheur (TSB) issues des séances enregistrées
+    load = get_training_load_from_api(athlete_id)
+    if load.ok and load.data["data"]:
+        st.subheader("Charge d'entraînement")
+        series = pd.DataFrame(load.data["data"], columns=load.data["columns"])
+        series["day"] = pd.to_datetime(series["day"])
+        st.line_chart(series.rename(columns={"ctl": "Forme (CTL)", "atl": "Fatigue (ATL)", "tsb": "Fraîcheur (TSB)"}),
+                      x="day", y=["Forme (CTL)", "Fatigue (ATL)", "Fraîcheur (TSB)"])
 
-load_dotenv()
 
 if 'authenticated' in st.session_state and st.session_state.authenticated:
-    st.title("Rapport Power BI")
-    
-    # URL du rapport Power BI
-    report_url = "https://app.powerbi.com/links/xXZpOaMJp0?ctid=a2e466aa-4f86-4545-b5b8-97da7c8febf3&pbi_source=linkShare"
-    
-    # Option 1: Afficher un bouton pour ouvrir le rapport dans une nouvelle fenêtre
-    if st.button("Ouvrir le rapport Power BI dans une nouvelle fenêtre"):
-        st.markdown(f"<a href='{report_url}' target='_blank'>Cliquez ici si la page ne s'ouvre pas automatiquement</a>", unsafe_allow_html=True)
-        st.components.v1.html(
-            f"""
-            <script>
-                window.open('{report_url}', '_blank');
-            </script>
-            """,
-            height=0
-        )
+    st.title("Statistiques")
+
+    metric = st.radio("Métrique", list(METRICS), format_func=METRICS.get, horizontal=True)
+    label = METRICS[metric]
+    results = get_statistics_from_api(metric)
+
+    if not results["summary"].ok:
+        st.error(f"Erreur lors de la récupération des statistiques: {results['summary'].text}")
+    elif not results["summary"].data["data"]:
+        st.info("Aucune performance enregistrée")
+    else:
+        summary = pd.DataFrame(results["summary"].data["data"], columns=results["summary"].data["columns"])
+        overview, ranking, distribution, trend = st.tabs(["Vue d'ensemble", "Classement", "Distribution", "Tendances"])
+        with overview:
+            show_overview(summary, metric, label)
+        with ranking:
+            show_ranking(summary, metric, label)
+        with distribution:
+            if results["distribution"].ok:
+                show_distribution(results["distribution"].data, METRICS["ppo"] if metric == "power_to_weight" else label)
+            else:
+                st.error(f"Erreur lors de la récupération de la distribution: {results['distribution'].text}")
+        with trend:
+            show_trend(summary, metric, label)
@@ -0,0 +1,78 @@
+"""
+Grille paginée partagée par les pages de liste (athlètes, performances).
+
+Au lieu d'un st.columns + bouton + st.divider par enregistrement, la page
+affiche un unique st.dataframe (rendu virtualisé côté navigateur) contenant
+une seule page de résultats. Pagination, tri et filtres sont délégués à
+l'API (paramètres limit, offset, sort, order), si bien que le temps de rendu
+ne dépend que de la taille de page, pas de la taille de la table.
+"""
+
+import math
+
+import pandas as pd
+import streamlit as st
+
+import api_client
+
+PAGE_SIZES = [25, 50, 100, 200]
+
+def paged_grid(key: str, path: str, sort_columns: list[str], id_column: str,
+               filters: dict | None = None, column_config: dict | None = None,
+               transform=None) -> tuple[api_client.ApiResult, list]:
+    """Affiche une page de résultats avec sélection multiple de lignes.
+
+    Args:
+        key (str): Préfixe des clés de widgets (unique par page)
+        path (str): Route de liste de l'API
+        sort_columns (list[str]): Colonnes proposées pour le tri
+        id_column (str): Colonne identifiant les lignes sélectionnées
+        filters (dict, optional): Paramètres de filtre transmis à l'API
+            (les valeurs vides sont ignorées)
+        column_config (dict, optional): Configuration des colonnes du dataframe
+        transform (callable, optional): Fonction appliquée au DataFrame avant
+            affichage (ajout de colonnes calculées, renommage, ...)
+
+    Returns:
+        tuple: Un tuple contenant :
+            - result (ApiResult): Résultat de l'appel à l'API
+            - selected_ids (list): Identifiants des lignes sélectionnées
+    """
+    filters = {name: value for name, value in (filters or {}).items() if value not in (None, "")}
+
+    col1, col2, col3 = st.columns(3)
+    page_size = col1.selectbox("Lignes par page", PAGE_SIZES, index=1, key=f"{key}_page_size")
+    sort = col2.selectbox("Trier par", sort_columns, key=f"{key}_sort")
+    order = col3.radio("Ordre", ["asc", "desc"], horizontal=True, key=f"{key}_order")
+
+    # Revenir à la première page dès que les filtres ou la taille de page changent
+    page_key = f"{key}_page"
+    signature = (tuple(sorted(filters.items())), page_size)
+    if st.session_state.get(f"{key}_signature") != signature:
+        st.session_state[f"{key}_signature"] = signature
+        st.session_state[page_key] = 1
+    page = st.session_state.get(page_key, 1)
+
+    params = {"shape": "columns", "limit": page_size, "offset": (page - 1) * page_size,
+              "sort": sort, "order": order, **filters}
+    result = api_client.get_json(path, st.session_state.token, tuple(sorted(params.items())))
+    if not result.ok:
+        return result, []
+
+    total = result.total or 0
+    n_pages = max(1, math.ceil(total / page_size))
+    if page > n_pages:
+        st.session_state[page_key] = n_pages
+        st.rerun()
+
+    df = pd.DataFrame(result.data["data"], columns=result.data["columns"])
+    if transform is not None:
+        df = transform(df)
+    event = st.dataframe(df, hide_index=True, use_container_width=True, column_config=column_config,
+                         on_select="rerun", selection_mode="multi-row", key=f"{key}_grid")
+    selected_ids = df.iloc[event.selection.rows][id_column].tolist() if len(df) else []
+
+    nav1, nav2 = st.columns([1, 3])
+    nav1.number_input(f"Page (sur {n_pages})", min_value=1, max_value=n_pages, step=1, key=page_key)
+    nav2.caption(f"{total} lignes au total · {len(selected_ids)} sélectionnée(s)")
+    return result, selected_ids
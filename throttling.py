@@ -0,0 +1,91 @@
+"""
+Limitation du débit des tentatives de connexion.
+
+Chaque vérification de mot de passe coûte un calcul bcrypt : une rafale de
+tentatives (force brute sur un compte, script mal configuré) occupe le CPU
+au détriment des autres requêtes. Les tentatives sont donc refusées (429)
+avant toute vérification lorsque :
+    - un compte a cumulé LOGIN_ACCOUNT_LIMIT échecs sur LOGIN_WINDOW secondes
+      (une connexion réussie remet son compteur à zéro)
+    - une adresse IP a cumulé LOGIN_IP_LIMIT échecs sur LOGIN_WINDOW secondes
+      (les connexions réussies ne comptent pas : tous les utilisateurs de
+      l'interface Streamlit partagent son adresse)
+
+Les compteurs sont des fenêtres glissantes en mémoire, propres à chaque
+processus : avec plusieurs workers (serve.py), la limite effective est
+multipliée au plus par leur nombre.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+# Durée (s) de la fenêtre glissante des compteurs
+LOGIN_WINDOW = float(os.getenv("LOGIN_WINDOW", 300))
+# Échecs de connexion tolérés par compte sur la fenêtre
+LOGIN_ACCOUNT_LIMIT = int(os.getenv("LOGIN_ACCOUNT_LIMIT", 5))
+# Échecs de connexion tolérés par adresse IP sur la fenêtre
+LOGIN_IP_LIMIT = int(os.getenv("LOGIN_IP_LIMIT", 100))
+# Nombre de clés au-delà duquel les compteurs expirés sont purgés
+PRUNE_ABOVE = 10000
+
+class SlidingWindowLimiter:
+    """Compteur d'événements par clé sur une fenêtre glissante.
+
+    Attributes:
+        limit (int): Nombre d'événements tolérés par clé sur la fenêtre (0 : illimité)
+        window (float): Durée de la fenêtre en secondes
+    """
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._events: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def _expire(self, events: deque[float], now: float):
+        while events and events[0] <= now - self.window:
+            events.popleft()
+
+    def retry_after(self, key: str) -> float:
+        """Délai (s) avant qu'un nouvel événement soit toléré pour la clé (0 : toléré)."""
+        if self.limit <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            events = self._events.get(key)
+            if not events:
+                return 0.0
+            self._expire(events, now)
+            if len(events) < self.limit:
+                return 0.0
+            return events[len(events) - self.limit] + self.window - now
+
+    def hit(self, key: str):
+        """Enregistre un événement pour la clé."""
+        if self.limit <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            events = self._events.setdefault(key, deque())
+            events.append(now)
+            # Seuls les limit derniers événements déterminent le délai
+            while len(events) > self.limit:
+                events.popleft()
+            if len(self._events) > PRUNE_ABOVE:
+                for stale in [k for k, v in self._events.items() if not v or v[-1] <= now - self.window]:
+                    del self._events[stale]
+
+    def reset(self, key: str):
+        """Oublie les événements de la clé."""
+        with self._lock:
+            self._events.pop(key, None)
+
+# Échecs par compte (email en minuscules) et tentatives par adresse IP
+account_failures = SlidingWindowLimiter(LOGIN_ACCOUNT_LIMIT, LOGIN_WINDOW)
+ip_failures = SlidingWindowLimiter(LOGIN_IP_LIMIT, LOGIN_WINDOW)
+
+def login_retry_after(email: str, ip: str) -> float:
+    """Délai (s) avant qu'une tentative de connexion soit acceptée (0 : acceptée)."""
+    return max(account_failures.retry_after(email.lower()), ip_failures.retry_after(ip))
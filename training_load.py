@@ -0,0 +1,223 @@
+"""
+Charge d'entraînement et modèle forme/fatigue (CTL/ATL/TSB) par athlète.
+
+Pour chaque séance, la charge est calculée de façon vectorisée (numpy) à
+partir des échantillons de puissance :
+    - NP (puissance normalisée) : moyenne glissante sur 30 s, élevée à la
+      puissance 4, moyennée, puis racine quatrième
+    - IF (facteur d'intensité) : NP / FTP
+    - TSS (score de stress) : durée (h) x NP x IF / FTP x 100
+La FTP, si elle n'est pas fournie, est estimée à 75 % de la meilleure PPO
+de l'athlète.
+
+La série quotidienne est ensuite maintenue de façon incrémentale dans la
+table training_load_daily (une ligne par athlète et par jour) :
+    - CTL (forme, constante de 42 jours) et ATL (fatigue, 7 jours) sont des
+      moyennes exponentielles de la TSS quotidienne
+    - TSB (fraîcheur) = CTL - ATL de la veille
+L'ajout d'une séance ne recalcule que les jours à partir de sa date (en
+repartant de l'état de la veille), jamais tout l'historique ; la lecture de
+l'état courant ou d'une plage de jours est une lecture de clé primaire.
+"""
+
+import csv
+import os
+import sqlite3
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from statements import statement
+
+# Constantes de temps (jours) de la forme (CTL) et de la fatigue (ATL)
+CTL_DAYS = float(os.getenv("CTL_DAYS", 42))
+ATL_DAYS = float(os.getenv("ATL_DAYS", 7))
+# Part de la meilleure PPO utilisée comme FTP estimée
+FTP_PPO_RATIO = 0.75
+# Fenêtre (s) de la moyenne glissante de la puissance normalisée
+NP_WINDOW_SECONDS = 30
+
+def session_load(power: np.ndarray, ftp: float, sample_interval: float = 1.0) -> dict[str, float]:
+    """Calcule la charge d'une séance à partir de ses échantillons de puissance.
+
+    Args:
+        power (np.ndarray): Puissance (W) échantillonnée à intervalle régulier
+        ftp (float): Puissance seuil fonctionnelle (W)
+        sample_interval (float, optional): Intervalle entre échantillons (s). Defaults to 1.0.
+
+    Returns:
+        dict: Dictionnaire contenant :
+            - duration_s (float): Durée de la séance
+            - average_power (float): Puissance moyenne
+            - normalized_power (float): Puissance normalisée (NP)
+            - intensity_factor (float): Facteur d'intensité (IF)
+            - tss (float): Training Stress Score
+
+    Raises:
+        ValueError: Si la série est vide ou si la FTP n'est pas positive
+    """
+    power = np.nan_to_num(np.asarray(power, dtype=np.float64), nan=0.0).clip(min=0)
+    if power.size == 0:
+        raise ValueError("Aucun échantillon de puissance")
+    if ftp <= 0:
+        raise ValueError("La FTP doit être positive")
+    window = max(1, int(round(NP_WINDOW_SECONDS / sample_interval)))
+    if power.size >= window:
+        cumulative = np.concatenate(([0.0], np.cumsum(power)))
+        rolling = (cumulative[window:] - cumulative[:-window]) / window
+    else:
+        rolling = np.array([power.mean()])
+    normalized_power = float(np.mean(rolling ** 4) ** 0.25)
+    intensity_factor = normalized_power / ftp
+    duration_s = power.size * sample_interval
+    return {
+        "duration_s": duration_s,
+        "average_power": float(power.mean()),
+        "normalized_power": normalized_power,
+        "intensity_factor": intensity_factor,
+        "tss": duration_s * normalized_power * intensity_factor / (ftp * 3600) * 100,
+    }
+
+def read_power_csv(path: str | Path) -> tuple[np.ndarray, float]:
+    """Lit les colonnes time et power d'un fichier d'essai CSV.
+
+    Args:
+        path (str | Path): Chemin du fichier (en-tête contenant "power", et "time" si disponible)
+
+    Returns:
+        tuple: Un tuple contenant :
+            - power (np.ndarray): Échantillons de puissance
+            - sample_interval (float): Intervalle médian entre échantillons (1 s sans colonne time)
+    """
+    with open(path, newline="") as f:
+        header = next(csv.reader(f))
+    columns = [column.strip().lower() for column in header]
+    data = np.genfromtxt(path, delimiter=",", skip_header=1, usecols=[columns.index("power")]
+                         + ([columns.index("time")] if "time" in columns else []), ndmin=2)
+    power = data[:, 0]
+    if data.shape[1] > 1 and len(data) > 1:
+        sample_interval = float(np.median(np.diff(data[:, 1])))
+    else:
+        sample_interval = 1.0
+    return power, sample_interval if sample_interval > 0 else 1.0
+
+def estimate_ftp(conn: sqlite3.Connection, athlete_id: int) -> float | None:
+    """Estime la FTP d'un athlète (75 % de sa meilleure PPO)."""
+    row = conn.execute(statement("performance.best_ppo"), (athlete_id,)).fetchone()
+    return row[0] * FTP_PPO_RATIO if row and row[0] else None
+
+def _ewma(previous: float, load: float, days: float) -> float:
+    return previous + (load - previous) / days
+
+def update_daily_load(conn: sqlite3.Connection, athlete_id: int, day: date, tss: float) -> int:
+    """Ajoute la TSS d'une séance à la série quotidienne et la met à jour à partir de ce jour.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données (transaction de l'appelant)
+        athlete_id (int): Identifiant de l'athlète
+        day (date): Jour de la séance
+        tss (float): TSS de la séance
+
+    Returns:
+        int: Nombre de jours écrits
+
+    Note:
+        Les jours sans séance entre le dernier jour connu et la séance sont
+        ajoutés avec une TSS nulle : la série est continue, ce qui rend
+        l'état de la veille disponible par simple lecture.
+    """
+    previous = conn.execute(statement("training.day_before"), (athlete_id, day.isoformat())).fetchone()
+    if previous:
+        start = date.fromisoformat(previous["day"]) + timedelta(days=1)
+        ctl, atl = previous["ctl"], previous["atl"]
+    else:
+        start, ctl, atl = day, 0.0, 0.0
+    loads = {row["day"]: row["tss"] for row in conn.execute(
+        statement("training.days_from"), (athlete_id, start.isoformat()))}
+    end = max([day] + [date.fromisoformat(known) for known in loads])
+    loads[day.isoformat()] = loads.get(day.isoformat(), 0.0) + tss
+    return _write_series(conn, athlete_id, start, end, loads, ctl, atl)
+
+def _write_series(conn: sqlite3.Connection, athlete_id: int, start: date, end: date,
+                  loads: dict[str, float], ctl: float, atl: float) -> int:
+    """Écrit les jours [start, end] à partir de l'état (ctl, atl) de la veille."""
+    rows = []
+    current = start
+    while current <= end:
+        key = current.isoformat()
+        load = loads.get(key, 0.0)
+        tsb = ctl - atl
+        ctl, atl = _ewma(ctl, load, CTL_DAYS), _ewma(atl, load, ATL_DAYS)
+        rows.append((athlete_id, key, load, ctl, atl, tsb))
+        current += timedelta(days=1)
+    conn.executemany(statement("training.upsert_day"), rows)
+    return len(rows)
+
+def rebuild_daily_load(conn: sqlite3.Connection, athlete_id: int, commit: bool = True) -> int:
+    """Recalcule toute la série quotidienne d'un athlète à partir de ses séances.
+
+    Utilisé par les retraitements (jobs.py) après une modification des
+    séances ou des constantes CTL_DAYS / ATL_DAYS ; le chemin normal reste
+    la mise à jour incrémentale de update_daily_load.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        athlete_id (int): Identifiant de l'athlète
+        commit (bool, optional): Valide la transaction. Defaults to True.
+
+    Returns:
+        int: Nombre de jours écrits (0 si l'athlète n'a aucune séance)
+    """
+    try:
+        loads = dict(conn.execute(statement("training.daily_tss"), (athlete_id,)).fetchall())
+        conn.execute(statement("training.delete_days"), (athlete_id,))
+        days = 0
+        if loads:
+            days = _write_series(conn, athlete_id, date.fromisoformat(min(loads)),
+                                 date.fromisoformat(max(loads)), loads, 0.0, 0.0)
+        if commit:
+            conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    return days
+
+def record_session(conn: sqlite3.Connection, athlete_id: int, day: date, power: np.ndarray,
+                   sample_interval: float = 1.0, ftp: float | None = None, commit: bool = True) -> dict:
+    """Calcule, enregistre une séance et met à jour la série quotidienne, en une transaction.
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base de données
+        athlete_id (int): Identifiant de l'athlète
+        day (date): Jour de la séance
+        power (np.ndarray): Échantillons de puissance (W)
+        sample_interval (float, optional): Intervalle entre échantillons (s). Defaults to 1.0.
+        ftp (float, optional): FTP (W). Defaults to 75 % de la meilleure PPO.
+        commit (bool, optional): Valide la transaction. Defaults to True.
+
+    Returns:
+        dict: Charge de la séance (cf. session_load), avec session_id, ftp
+        et l'état CTL/ATL/TSB du jour de la séance
+
+    Raises:
+        ValueError: Si la FTP ne peut pas être estimée (aucune performance) ou
+            si la série de puissance est vide
+    """
+    ftp = ftp or estimate_ftp(conn, athlete_id)
+    if not ftp:
+        raise ValueError("FTP inconnue : aucune PPO enregistrée pour cet athlète")
+    load = session_load(power, ftp, sample_interval)
+    try:
+        session_id = conn.execute(statement("training.insert_session"), (
+            athlete_id, day.isoformat(), load["duration_s"], load["average_power"],
+            load["normalized_power"], load["intensity_factor"], load["tss"], ftp)).lastrowid
+        update_daily_load(conn, athlete_id, day, load["tss"])
+        if commit:
+            conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    state = conn.execute(statement("training.day"), (athlete_id, day.isoformat())).fetchone()
+    return {"session_id": session_id, "athlete_id": athlete_id, "day": day.isoformat(), "ftp": ftp,
+            **load, "ctl": state["ctl"], "atl": state["atl"], "tsb": state["tsb"]}
@@ -8,16 +8,18 @@ Ce module fournit les fonctions et configurations nécessaires pour :
 - La récupération de l'utilisateur courant
 """
 
-from passlib.context import CryptContext
+from passwords import bcrypt_context, verify_password
 from fastapi.security import OAuth2PasswordBearer
-from database import get_db
+from database import DBExecutor, get_async_db
 from fastapi import Depends, HTTPException, status
+from starlette.concurrency import run_in_threadpool
+from statements import statement
+import coaching
 from datetime import datetime, timedelta, timezone
 import os
 from typing import Annotated
 from dotenv import load_dotenv
 from jose import JWTError, jwt
-from sqlite3 import Connection
 
 load_dotenv()
 
@@ -26,11 +28,10 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 SECRET_KEY = os.getenv("SECRET_KEY", None)
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 
-# Configuration du contexte de cryptage et OAuth2
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Configuration OAuth2 (le contexte bcrypt est défini dans passwords.py)
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl="/user/auth")
 
-db_dependency = Depends(get_db)
+db_dependency = Depends(get_async_db)
 
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     """Crée un token JWT d'accès.
@@ -65,17 +66,17 @@ def get_password_hash(password: str) -> str:
 
     Note:
         Utilise l'algorithme bcrypt avec les paramètres définis
-        dans bcrypt_context.
+        dans passwords.bcrypt_context.
     """
     return bcrypt_context.hash(password)
 
-async def authenticate(email: str, password: str, db: Connection) -> dict:
+async def authenticate(email: str, password: str, db: DBExecutor) -> dict:
     """Authentifie un utilisateur avec son email et mot de passe.
 
     Args:
         email (str): Email de l'utilisateur
         password (str): Mot de passe en clair
-        db (Connection): Connexion à la base de données
+        db (DBExecutor): Exécuteur asynchrone de la base de données
 
     Returns:
         dict: Données de l'utilisateur si l'authentification réussit
@@ -83,32 +84,35 @@ async def authenticate(email: str, password: str, db: Connection) -> dict:
 
     Note:
         Vérifie l'existence de l'utilisateur et la correspondance
-        du mot de passe avec le hash stocké.
+        du mot de passe avec le hash stocké. La vérification bcrypt,
+        coûteuse en CPU, est exécutée hors de la boucle d'événements
+        (et évitée si ce mot de passe vient d'être vérifié, cf.
+        passwords.verify_password). Un hash calculé avec un autre coût
+        que BCRYPT_ROUNDS est recalculé et enregistré.
     """
-    cursor = db.cursor()
-    try:
-        cursor.execute("SELECT * FROM user WHERE email = ?", (email,))
-        user = cursor.fetchone()
+    user = await db.fetch_one(statement("user.by_email"), (email,))
 
-        if not user:
-            return False
+    if not user:
+        return False
 
-        if not bcrypt_context.verify(password, user["password"]):
-            return False
+    valid, new_hash = await run_in_threadpool(verify_password, password, user["password"])
+    if not valid:
+        return False
 
-        return user
-    finally:
-        cursor.close()
+    if new_hash:
+        await db.execute(statement("user.update_password"), (new_hash, user["user_id"]))
+
+    return user
 
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_bearer)],
-    db: Connection = Depends(get_db)
+    db: DBExecutor = Depends(get_async_db)
 ) -> dict:
     """Récupère l'utilisateur courant à partir du token JWT.
 
     Args:
         token (str): Token JWT d'authentification
-        db (Connection): Connexion à la base de données
+        db (DBExecutor): Exécuteur asynchrone de la base de données
 
     Returns:
         dict: Données de l'utilisateur courant
@@ -132,23 +136,70 @@ async def get_current_user(
                 detail="Token invalide"
             )
 
-        cursor = db.cursor()
-        try:
-            cursor.execute("SELECT * FROM user WHERE email = ?", (email,))
-            user = cursor.fetchone()
+        user = await db.fetch_one(statement("user.by_email"), (email,))
 
-            if not user:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Utilisateur non trouvé"
-                )
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Utilisateur non trouvé"
+            )
 
-            return user
-        finally:
-            cursor.close()
+        return user
 
     except JWTError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Erreur de token : {str(e)}"
-        )
\ No newline at end of file
+        )
+async def get_accessible_athlete(athlete_id: int, db: DBExecutor, current_user: dict):
+    """Récupère un athlète en vérifiant que l'utilisateur courant peut consulter ses données.
+
+    Args:
+        athlete_id (int): Identifiant de l'athlète
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Utilisateur actuellement connecté
+
+    Returns:
+        sqlite3.Row: Ligne de la table athlete
+
+    Raises:
+        HTTPException 401: Si un athlète demande les données d'un autre athlète,
+            ou un coach celles d'un athlète qui ne lui est pas affecté
+        HTTPException 404: Si l'athlète n'existe pas
+
+    Note:
+        Les admins accèdent à tous les athlètes, un coach aux athlètes qui
+        lui sont affectés (table coach_athlete), un athlète uniquement à son
+        propre profil.
+    """
+    athlete = await db.fetch_one(statement("athlete.by_id"), (athlete_id,))
+    if athlete is None:
+        raise HTTPException(status_code=404, detail="Athlete not found")
+    if current_user["role"] == "coach":
+        await ensure_athletes_access([athlete_id], db, current_user)
+    elif current_user["role"] != "admin" and athlete["user_id"] != current_user["user_id"]:
+        raise HTTPException(status_code=401, detail="You are not allowed to perform this action")
+    return athlete
+
+async def ensure_athletes_access(athlete_ids: list[int], db: DBExecutor, current_user: dict):
+    """Vérifie, en une seule requête, que l'utilisateur a accès à tous les athlètes d'une liste.
+
+    Args:
+        athlete_ids (list[int]): Identifiants des athlètes (les None sont ignorés)
+        db (DBExecutor): Exécuteur asynchrone de la base de données
+        current_user (dict): Utilisateur actuellement connecté
+
+    Raises:
+        HTTPException 401: Si l'un des athlètes n'est pas affecté au coach,
+            ou n'est pas un profil de l'athlète connecté
+
+    Note:
+        Les admins accèdent à tous les athlètes, un coach aux athlètes qui
+        lui sont affectés, un athlète uniquement à ses propres profils.
+    """
+    ids = [athlete_id for athlete_id in athlete_ids if athlete_id is not None]
+    if current_user["role"] == "admin" or not ids:
+        return
+    check = coaching.all_assigned if current_user["role"] == "coach" else coaching.all_owned
+    if not await db.run(check, current_user["user_id"], ids):
+        raise HTTPException(status_code=401, detail="You are not allowed to perform this action")